@@ -31,6 +31,10 @@ class Settings(BaseSettings):
     RATE_LIMIT_DEFAULT: str = "100/minute"
     RATE_LIMIT_STRICT: str = "20/minute"  # auth, login
 
+    # Chat WebSocket: merge upstream chunk frames into one frame per window (0 disables)
+    WS_COALESCE_MAX_LATENCY_MS: int = 25
+    WS_COALESCE_MAX_BYTES: int = 1024
+
     model_config = SettingsConfigDict(
         env_file=_env_file(),
         env_file_encoding="utf-8",
@@ -173,4 +173,10 @@ async def proxy_chat_websocket(websocket: WebSocket):
         qs = "&".join(p for p in qs.split("&") if not p.startswith("token="))
         if qs:
             upstream_path = f"{upstream_path}?{qs}"
-    await proxy_websocket(websocket, upstream_path, sub=sub)
+    await proxy_websocket(
+        websocket,
+        upstream_path,
+        sub=sub,
+        coalesce_max_latency_seconds=settings.WS_COALESCE_MAX_LATENCY_MS / 1000,
+        coalesce_max_bytes=settings.WS_COALESCE_MAX_BYTES,
+    )
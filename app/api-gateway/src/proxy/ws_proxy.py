@@ -1,9 +1,14 @@
 """
 Proxy WebSocket connection to upstream (e.g. chat-api).
+
+Upstream chat "chunk" frames ({"t": "chunk", "content": ...}) are coalesced: a chunk arriving after a
+quiet window is forwarded at once, otherwise chunks are merged into one frame per window or once
+max_bytes of content is pending. Every other frame flushes pending chunks and is forwarded as is.
 """
 import asyncio
+import json
 import logging
-from typing import Optional
+from typing import List, Optional, Union
 
 from fastapi import WebSocket
 from starlette.websockets import WebSocketDisconnect
@@ -12,6 +17,77 @@ from websockets.asyncio.client import connect as ws_connect
 logger = logging.getLogger(__name__)
 
 
+_CHUNK_FRAME_PREFIX = '{"t": "chunk"'
+
+
+def _chunk_content(message: Union[str, bytes]) -> Optional[str]:
+    """Content of a chat chunk frame, or None for any other frame."""
+    if not isinstance(message, str) or not message.startswith(_CHUNK_FRAME_PREFIX):
+        return None
+    try:
+        frame = json.loads(message)
+    except ValueError:
+        return None
+    if frame.keys() != {"t", "content"} or not isinstance(frame["content"], str):
+        return None
+    return frame["content"]
+
+
+async def _forward_coalesced(
+    backend,
+    websocket: WebSocket,
+    max_latency_seconds: float,
+    max_bytes: int,
+) -> None:
+    """Forward backend frames to the client, merging chunk frames (see module docstring)."""
+    loop = asyncio.get_running_loop()
+    pending: List[str] = []
+    pending_bytes = 0
+    last_flush: Optional[float] = None
+
+    async def flush(raw: Optional[str] = None) -> None:
+        """Send pending content; raw is the original frame when it is the only one pending."""
+        nonlocal pending_bytes, last_flush
+        if pending:
+            if raw is not None and len(pending) == 1:
+                await websocket.send_text(raw)
+            else:
+                await websocket.send_text(json.dumps({"t": "chunk", "content": "".join(pending)}))
+            pending.clear()
+            pending_bytes = 0
+        last_flush = loop.time()
+
+    while True:
+        timeout = None
+        if pending:
+            timeout = max(last_flush + max_latency_seconds - loop.time(), 0.0)
+        try:
+            # Cancelling recv() on a timeout is safe; no message is lost.
+            async with asyncio.timeout(timeout):
+                message = await backend.recv()
+        except TimeoutError:
+            await flush()
+            continue
+
+        content = _chunk_content(message)
+        if content is None:
+            if pending:
+                await flush()
+            # A non-chunk frame (done / error) ends the response; the next chunk goes out at once.
+            last_flush = None
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_text(message)
+            continue
+
+        pending.append(content)
+        pending_bytes += len(content.encode("utf-8"))
+        window_elapsed = last_flush is None or loop.time() - last_flush >= max_latency_seconds
+        if window_elapsed or (max_bytes > 0 and pending_bytes >= max_bytes):
+            await flush(message)
+
+
 def _redact_url(url: str) -> str:
     """Redact token= from URL for logging."""
     if "token=" in url:
@@ -25,10 +101,13 @@ async def proxy_websocket(
     websocket: WebSocket,
     upstream_ws_url: str,
     sub: Optional[str] = None,
+    coalesce_max_latency_seconds: float = 0.0,
+    coalesce_max_bytes: int = 0,
 ) -> None:
     """
     Accept client WebSocket, connect to upstream_ws_url, forward frames both ways.
     Pass optional sub (from JWT) as header or query for backend if needed.
+    With coalesce_max_latency_seconds > 0, upstream chunk frames are coalesced.
     """
     extra_headers = {}
     if sub is not None:
@@ -67,6 +146,11 @@ async def proxy_websocket(
                     raise
 
             async def backend_to_client():
+                if coalesce_max_latency_seconds > 0:
+                    await _forward_coalesced(
+                        backend, websocket, coalesce_max_latency_seconds, coalesce_max_bytes
+                    )
+                    return
                 try:
                     while True:
                         message = await backend.recv()
@@ -0,0 +1,97 @@
+"""Chunk-frame coalescing in the WebSocket proxy (fake upstream and client)."""
+import asyncio
+import json
+
+from src.proxy.ws_proxy import _chunk_content, _forward_coalesced
+
+
+class _Closed(Exception):
+    pass
+
+
+class _FakeBackend:
+    """Upstream that yields (delay, message) pairs, then raises like a closed connection."""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    async def recv(self):
+        if not self.frames:
+            raise _Closed()
+        delay, message = self.frames[0]
+        await asyncio.sleep(delay)
+        self.frames.pop(0)
+        return message
+
+
+class _FakeClient:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+def _chunk(content):
+    return json.dumps({"t": "chunk", "content": content})
+
+
+def _run(frames, max_latency_seconds=0.05, max_bytes=0):
+    client = _FakeClient()
+
+    async def main():
+        try:
+            await _forward_coalesced(_FakeBackend(frames), client, max_latency_seconds, max_bytes)
+        except _Closed:
+            pass
+
+    asyncio.run(main())
+    return client.sent
+
+
+def test_chunk_content_only_matches_chunk_frames():
+    assert _chunk_content(_chunk("hi")) == "hi"
+    assert _chunk_content(json.dumps({"t": "done", "received_content": "hi"})) is None
+    assert _chunk_content(b'{"t": "chunk", "content": "hi"}') is None
+
+
+def test_burst_of_chunks_is_merged_after_first_and_flushed_before_done():
+    done = json.dumps({"t": "done", "received_content": "abcd"})
+    frames = [(0, _chunk("a")), (0, _chunk("b")), (0, _chunk("c")), (0, _chunk("d")), (0, done)]
+
+    sent = _run(frames)
+
+    assert sent == [_chunk("a"), _chunk("bcd"), done]
+
+
+def test_paced_chunks_pass_through_unchanged():
+    frames = [(0, _chunk("a")), (0.03, _chunk("b")), (0.03, _chunk("c"))]
+
+    sent = _run(frames, max_latency_seconds=0.01)
+
+    assert sent == [_chunk("a"), _chunk("b"), _chunk("c")]
+
+
+def test_pending_chunks_flush_when_upstream_stalls():
+    frames = [(0, _chunk("a")), (0, _chunk("b")), (0.3, _chunk("c"))]
+    client = _FakeClient()
+
+    async def main():
+        task = asyncio.create_task(_forward_coalesced(_FakeBackend(frames), client, 0.02, 0))
+        await asyncio.sleep(0.1)
+        snapshot = list(client.sent)
+        task.cancel()
+        return snapshot
+
+    assert asyncio.run(main()) == [_chunk("a"), _chunk("b")]
+
+
+def test_chunks_flush_at_max_bytes():
+    frames = [(0, _chunk("x" * 4))] + [(0, _chunk("y" * 4)) for _ in range(4)]
+
+    sent = _run(frames, max_latency_seconds=10, max_bytes=8)
+
+    assert sent == [_chunk("x" * 4), _chunk("y" * 8), _chunk("y" * 8)]
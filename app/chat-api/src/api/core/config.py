@@ -6,6 +6,7 @@ Set APP_ENV_FILE to point to a shared env file if desired.
 """
 
 import os
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,6 +23,13 @@ class Settings(BaseSettings):
 
     RERANKER_BM25_TOP_K: int = 10
     RERANKER_COHERE_TOP_K: int = 3
+    # Corpus BM25 statistics written by ingestion-worker; used by the local lexical stage when hybrid is off.
+    BM25_STATS_PATH: str = Field(default="", description="Directory of the BM25 stats artifact (empty disables).")
+
+    # Start retrieval + first rerank concurrently with the semantic cache lookup.
+    RAG_SPECULATIVE_RETRIEVAL: bool = False
+    # Token budget for the packed prompt context (counted with OPENAI_LLM_MODEL's tokenizer); 0 disables packing.
+    RAG_CONTEXT_MAX_TOKENS: int = Field(default=6000, ge=0)
 
     # Keys are optional for unit tests; runtime will fail fast in lifespan if missing.
     OPENAI_API_KEY: str = Field(default="", description="Key for OpenAI Embeddings and LLM")
@@ -29,8 +37,17 @@ class Settings(BaseSettings):
 
     WEAVIATE_URL: str = Field(default="http://localhost:8080")
     WEAVIATE_CLASS_NAME: str = Field(default="document_chunk_embedding")
+    # Hybrid (BM25 + vector) retrieval; replaces the per-request BM25 first-stage rerank.
+    WEAVIATE_HYBRID_ENABLED: bool = True
+    WEAVIATE_HYBRID_ALPHA: float = Field(default=0.5, ge=0.0, le=1.0, description="1 = pure vector, 0 = pure BM25.")
+    WEAVIATE_HYBRID_FUSION_TYPE: Literal["relative_score", "ranked"] = "relative_score"
 
     COHERE_RERANKER_MODEL: str = Field(default="rerank-english-v3.0")
+    # Second-stage deadline: past the budget the first-stage order is used; 0 disables hedging.
+    COHERE_RERANK_BUDGET_MS: int = Field(default=800, gt=0)
+    COHERE_RERANK_HEDGE_DELAY_MS: int = Field(default=0, ge=0)
+    COHERE_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, ge=1)
+    COHERE_CIRCUIT_RESET_SECONDS: float = Field(default=30.0, gt=0)
     OPENAI_EMBEDDING_MODEL: str = Field(default="text-embedding-3-large")
     OPENAI_LLM_MODEL: str = Field(default="gpt-5.1")
 
@@ -38,6 +55,79 @@ class Settings(BaseSettings):
     CACHE_TTL_SECONDS: int = Field(default=86400)
     CACHE_SIMILARITY_THRESHOLD: float = Field(default=0.95, ge=0.0, le=1.0)
     CACHE_EMBED_DIM: int = Field(default=3072, description="Embedding dimension.")
+    CACHE_MAX_CONNECTIONS: int = Field(default=32, ge=1, description="Async semantic cache connection pool size.")
+    # Compact cache vectors: Matryoshka prefix length (0 = full CACHE_EMBED_DIM) and storage type.
+    CACHE_VECTOR_DIM: int = Field(default=0, ge=0)
+    CACHE_VECTOR_TYPE: Literal["FLOAT32", "FLOAT16", "INT8"] = "FLOAT32"
+    # HNSW graph parameters; M / EF_CONSTRUCTION apply when the index is (re)created.
+    CACHE_HNSW_M: int = Field(default=16, ge=2)
+    CACHE_HNSW_EF_CONSTRUCTION: int = Field(default=200, ge=1)
+    CACHE_HNSW_EF_RUNTIME: int = Field(default=10, ge=1)
+    # How often caches re-read the generation counter ingestion-worker bumps to invalidate them.
+    CACHE_GENERATION_REFRESH_SECONDS: float = Field(default=1.0, gt=0)
+    # In-process L1 semantic cache in front of Redis (per worker; cleared on a generation change,
+    # kept short-lived as a bound on staleness).
+    LOCAL_CACHE_MAX_ENTRIES: int = Field(default=1024, ge=0, description="0 disables the L1 tier.")
+    LOCAL_CACHE_TTL_SECONDS: int = Field(default=300, ge=1)
+
+    # Retrieval-result cache (reranked chunk ids), looser threshold than the answer cache.
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_TTL_SECONDS: int = Field(default=3600)
+    RETRIEVAL_CACHE_SIMILARITY_THRESHOLD: float = Field(default=0.90, ge=0.0, le=1.0)
+
+    # Cohere score cache keyed on (normalized query, chunk content).
+    RERANK_SCORE_CACHE_ENABLED: bool = True
+    RERANK_SCORE_CACHE_TTL_SECONDS: int = Field(default=86400, ge=1)
+
+    EMBEDDING_CACHE_MAX_BYTES: int = Field(
+        default=64 * 1024 * 1024, ge=0, description="In-process query embedding cache budget (0 disables)."
+    )
+    EMBEDDING_CACHE_TTL_SECONDS: int = Field(default=3600, ge=1)
+
+    # Admission control: concurrent RAG generations and a bounded, time-limited wait queue.
+    ADMISSION_MAX_CONCURRENT: int = Field(default=32, ge=0, description="0 disables admission control.")
+    ADMISSION_MAX_QUEUE: int = Field(default=64, ge=0)
+    ADMISSION_QUEUE_TIMEOUT_MS: int = Field(default=2000, ge=0)
+    ADMISSION_RETRY_AFTER_SECONDS: int = Field(default=2, ge=1)
+
+    # Single-flight: identical concurrent queries share one pipeline run (optionally across pods).
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_REDIS_LOCK: bool = False
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS: float = Field(default=120.0, gt=0)
+    SINGLE_FLIGHT_LOCK_WAIT_SECONDS: float = Field(default=30.0, ge=0)
+
+    # WebSocket streaming: batch LLM deltas into one frame per window (first token is sent at once).
+    WS_COALESCE_MAX_LATENCY_MS: int = Field(default=25, ge=0, description="0 sends every delta as its own frame.")
+    WS_COALESCE_MAX_BYTES: int = Field(default=1024, ge=0)
+
+    # Chat memory write-behind: exchanges are queued and flushed to Cassandra in micro-batches;
+    # failed batches are retried with backoff, then spilled to a local JSONL file and replayed.
+    CHAT_MEMORY_WRITE_BEHIND: bool = Field(default=True)
+    CHAT_MEMORY_MAX_PENDING: int = Field(default=10000, ge=1, description="Queued messages before new ones spill.")
+    CHAT_MEMORY_BATCH_SIZE: int = Field(default=64, ge=1)
+    CHAT_MEMORY_FLUSH_INTERVAL_MS: int = Field(default=20, ge=0)
+    CHAT_MEMORY_MAX_RETRIES: int = Field(default=5, ge=0)
+    CHAT_MEMORY_SPILL_PATH: str = Field(
+        default="/var/tmp/chat-api/chat_memory_spill.jsonl", description="Empty drops unwritable messages."
+    )
+    CHAT_MEMORY_DRAIN_TIMEOUT_SECONDS: float = Field(default=5.0, ge=0)
+    # Per-pod cache of active sessions' recent messages, updated on append.
+    CHAT_MEMORY_CACHE_MAX_SESSIONS: int = Field(default=1024, ge=0, description="0 disables the cache.")
+    CHAT_MEMORY_CACHE_MAX_MESSAGES: int = Field(default=50, ge=1)
+    CHAT_MEMORY_CACHE_TTL_SECONDS: int = Field(default=300, ge=1)
+    CHAT_MEMORY_CACHE_VALIDATE: bool = Field(
+        default=False, description="Check each cache hit against the store's latest timestamp (one read per hit)."
+    )
+    # Conversation history in prompts: the last turns verbatim within a token budget, older turns
+    # folded into a rolling summary stored with the session (one extra LLM call per fold).
+    CHAT_HISTORY_ENABLED: bool = Field(default=False)
+    CHAT_HISTORY_MAX_TOKENS: int = Field(default=1500, ge=1, description="Budget for summary plus verbatim turns.")
+    CHAT_HISTORY_MAX_TURNS: int = Field(default=6, ge=1)
+    CHAT_HISTORY_SUMMARY_MAX_TOKENS: int = Field(default=300, ge=1)
+    CHAT_HISTORY_WINDOW_MESSAGES: int = Field(default=40, ge=2, description="Recent messages read per turn.")
+    CHAT_HISTORY_MAX_FOLD_MESSAGES: int = Field(
+        default=200, ge=2, description="Most unsummarized messages one fold reads back and summarizes."
+    )
 
     ENVIRONMENT: str = Field(default="development")
     LOG_LEVEL: str = Field(default="INFO")
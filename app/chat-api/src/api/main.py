@@ -1,29 +1,59 @@
 """
 FastAPI application entrypoint for US Law RAG Controller.
 """
+import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
 
-from src.api.routers import chat_router, helper_router
-from src.api.services.reranker_client import BM25Reranker, CohereReranker
+from src.api.routers import chat_router, helper_router, metrics_router
+from src.api.services.admission import AdmissionController
+from src.api.services.context_packer import get_token_counter
+from src.api.services.deadline_reranker import CircuitBreaker, DeadlineReranker
+from src.api.services.history_compactor import HistoryCompactor, openai_summarizer
+from src.api.services.single_flight import RedisFlightLock, SingleFlight
+from src.api.services.reranker_client import BM25Reranker, CohereReranker, CorpusBM25Reranker, TopKReranker
+from src.chat_memory.cache import RecentMessagesCache
 from src.chat_memory.service import ChatMemoryService
 from src.chat_memory.store import CassandraChatMemoryStore, InMemoryChatMemoryStore
+from src.chat_memory.write_behind import ChatMemoryWriteBehind
 from code_shared.llm import OpenAILLM
+from code_shared.text import BM25Stats
 from src.api.core.config import settings
 from src.vector_store import WeaviateClient
-from src.semantic_cache import SemanticCache
+from src.rerank_score_cache import RerankScoreCache
+from src.retrieval_cache import RetrievalCache
+from src.local_semantic_cache import LocalSemanticCache
+from src.semantic_cache import AsyncSemanticCache, VectorEncoding
 
 # Prompts live in chat-api (not code-shared)
 _PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
 
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
 
 
+def _first_stage_reranker():
+    """
+    Hybrid retrieval already fuses corpus-level BM25 server-side, so only its top-k is kept.
+    Otherwise use corpus-statistics BM25 when the ingestion artifact is available.
+    """
+    top_k = settings.RERANKER_BM25_TOP_K
+    if settings.WEAVIATE_HYBRID_ENABLED:
+        return TopKReranker(top_k=top_k)
+    if settings.BM25_STATS_PATH:
+        try:
+            return CorpusBM25Reranker(BM25Stats.load(settings.BM25_STATS_PATH), top_k=top_k)
+        except Exception as e:
+            logger.warning("BM25 stats unavailable at %s (%s); using per-request BM25", settings.BM25_STATS_PATH, e)
+    return BM25Reranker(top_k=top_k)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle: init resources on startup, cleanup on shutdown."""
@@ -40,8 +70,13 @@ async def lifespan(app: FastAPI):
         weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
         openai_api_key=settings.OPENAI_API_KEY,
         openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+        embedding_cache_max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+        embedding_cache_ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        hybrid_alpha=settings.WEAVIATE_HYBRID_ALPHA if settings.WEAVIATE_HYBRID_ENABLED else None,
+        hybrid_fusion_type=settings.WEAVIATE_HYBRID_FUSION_TYPE,
     )
     db.connect()
+    await db.aconnect()
 
     llm = OpenAILLM(
         api_key=settings.OPENAI_API_KEY,
@@ -49,13 +84,58 @@ async def lifespan(app: FastAPI):
         prompt_dir=_PROMPTS_DIR,
     )
 
-    bm25_reranker = BM25Reranker(top_k=settings.RERANKER_BM25_TOP_K)
-    cohere_reranker = CohereReranker(top_k=settings.RERANKER_COHERE_TOP_K)
-    semantic_cache = SemanticCache(
+    first_reranker = _first_stage_reranker()
+    rerank_score_cache = RerankScoreCache(
+        redis_url=settings.REDIS_URL if settings.RERANK_SCORE_CACHE_ENABLED else "",
+        ttl_seconds=settings.RERANK_SCORE_CACHE_TTL_SECONDS,
+    )
+    rerank_budget_seconds = settings.COHERE_RERANK_BUDGET_MS / 1000
+    cohere_reranker = DeadlineReranker(
+        CohereReranker(
+            top_k=settings.RERANKER_COHERE_TOP_K,
+            timeout_seconds=rerank_budget_seconds,
+            score_cache=rerank_score_cache,
+        ),
+        budget_seconds=rerank_budget_seconds,
+        top_k=settings.RERANKER_COHERE_TOP_K,
+        hedge_delay_seconds=settings.COHERE_RERANK_HEDGE_DELAY_MS / 1000,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.COHERE_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout_seconds=settings.COHERE_CIRCUIT_RESET_SECONDS,
+        ),
+    )
+    vector_encoding = VectorEncoding(
+        dim=settings.CACHE_VECTOR_DIM,
+        vector_type=settings.CACHE_VECTOR_TYPE,
+        hnsw_m=settings.CACHE_HNSW_M,
+        hnsw_ef_construction=settings.CACHE_HNSW_EF_CONSTRUCTION,
+        hnsw_ef_runtime=settings.CACHE_HNSW_EF_RUNTIME,
+    )
+    local_cache = None
+    if settings.LOCAL_CACHE_MAX_ENTRIES > 0:
+        local_cache = LocalSemanticCache(
+            max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LOCAL_CACHE_TTL_SECONDS,
+            similarity_threshold=settings.CACHE_SIMILARITY_THRESHOLD,
+            embed_dim=settings.CACHE_EMBED_DIM,
+        )
+    semantic_cache = AsyncSemanticCache(
         redis_url=settings.REDIS_URL,
         ttl_seconds=settings.CACHE_TTL_SECONDS,
         similarity_threshold=settings.CACHE_SIMILARITY_THRESHOLD,
         embed_dim=settings.CACHE_EMBED_DIM,
+        max_connections=settings.CACHE_MAX_CONNECTIONS,
+        vector_encoding=vector_encoding,
+        local=local_cache,
+        generation_refresh_seconds=settings.CACHE_GENERATION_REFRESH_SECONDS,
+    )
+    retrieval_cache = RetrievalCache(
+        redis_url=settings.REDIS_URL if settings.RETRIEVAL_CACHE_ENABLED else "",
+        ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS,
+        similarity_threshold=settings.RETRIEVAL_CACHE_SIMILARITY_THRESHOLD,
+        embed_dim=settings.CACHE_EMBED_DIM,
+        vector_encoding=vector_encoding,
+        generation_refresh_seconds=settings.CACHE_GENERATION_REFRESH_SECONDS,
     )
 
     # Chat memory: try Cassandra, fall back to in-memory store for dev/tests.
@@ -63,24 +143,88 @@ async def lifespan(app: FastAPI):
         memory_store = CassandraChatMemoryStore()
     except Exception:  # pragma: no cover - exercised via integration
         memory_store = InMemoryChatMemoryStore()
-    chat_memory = ChatMemoryService(memory_store)
+    write_behind = None
+    if settings.CHAT_MEMORY_WRITE_BEHIND:
+        write_behind = ChatMemoryWriteBehind(
+            memory_store,
+            max_pending=settings.CHAT_MEMORY_MAX_PENDING,
+            batch_size=settings.CHAT_MEMORY_BATCH_SIZE,
+            flush_interval_seconds=settings.CHAT_MEMORY_FLUSH_INTERVAL_MS / 1000,
+            max_retries=settings.CHAT_MEMORY_MAX_RETRIES,
+            spill_path=settings.CHAT_MEMORY_SPILL_PATH,
+        )
+    recent_cache = None
+    if settings.CHAT_MEMORY_CACHE_MAX_SESSIONS > 0:
+        recent_cache = RecentMessagesCache(
+            max_sessions=settings.CHAT_MEMORY_CACHE_MAX_SESSIONS,
+            max_messages=settings.CHAT_MEMORY_CACHE_MAX_MESSAGES,
+            ttl_seconds=settings.CHAT_MEMORY_CACHE_TTL_SECONDS,
+        )
+    chat_memory = ChatMemoryService(
+        memory_store,
+        write_behind=write_behind,
+        recent_cache=recent_cache,
+        validate_cache=settings.CHAT_MEMORY_CACHE_VALIDATE,
+    )
+    chat_memory.start()
 
     app.state.db = db
     app.state.llm = llm
-    app.state.first_reranker = bm25_reranker
+    app.state.first_reranker = first_reranker
     app.state.second_reranker = cohere_reranker
     app.state.semantic_cache = semantic_cache
+    app.state.retrieval_cache = retrieval_cache
     app.state.embed_model = getattr(db, "embed_model", None)
     app.state.chat_memory = chat_memory
+    app.state.count_tokens = get_token_counter(settings.OPENAI_LLM_MODEL)
+    history_compactor = None
+    if settings.CHAT_HISTORY_ENABLED:
+        history_compactor = HistoryCompactor(
+            chat_memory,
+            summarize=openai_summarizer(
+                api_key=settings.OPENAI_API_KEY,
+                model=settings.OPENAI_LLM_MODEL,
+                max_tokens=settings.CHAT_HISTORY_SUMMARY_MAX_TOKENS,
+                prompt_path=_PROMPTS_DIR / "history_summary.txt",
+            ),
+            count_tokens=app.state.count_tokens,
+            max_tokens=settings.CHAT_HISTORY_MAX_TOKENS,
+            max_turns=settings.CHAT_HISTORY_MAX_TURNS,
+            window_messages=settings.CHAT_HISTORY_WINDOW_MESSAGES,
+            max_fold_messages=settings.CHAT_HISTORY_MAX_FOLD_MESSAGES,
+        )
+        app.state.history_compactor = history_compactor
+    single_flight = None
+    if settings.SINGLE_FLIGHT_ENABLED:
+        flight_lock = None
+        if settings.SINGLE_FLIGHT_REDIS_LOCK and settings.REDIS_URL:
+            flight_lock = RedisFlightLock(
+                settings.REDIS_URL,
+                ttl_seconds=settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS,
+                wait_seconds=settings.SINGLE_FLIGHT_LOCK_WAIT_SECONDS,
+            )
+        single_flight = SingleFlight(lock=flight_lock)
+        app.state.single_flight = single_flight
+    if settings.ADMISSION_MAX_CONCURRENT > 0:
+        app.state.admission = AdmissionController(
+            max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout_seconds=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+            retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        )
 
     yield
 
-    semantic_cache.close()
-    # Close chat memory store if it has a close() method
-    store = getattr(app.state, "chat_memory", None)
-    close_fn = getattr(getattr(store, "_store", None), "close", None)
-    if callable(close_fn):
-        close_fn()
+    await semantic_cache.aclose()
+    retrieval_cache.close()
+    rerank_score_cache.close()
+    if single_flight is not None:
+        single_flight.close()
+    if history_compactor is not None:
+        await history_compactor.aclose()
+    # Drain queued chat memory writes (spilling what does not make it), then close the store.
+    await chat_memory.aclose(settings.CHAT_MEMORY_DRAIN_TIMEOUT_SECONDS)
+    await db.aclose()
     if db.client:
         db.close()
 
@@ -89,6 +233,7 @@ app = FastAPI(title=settings.APP_TITLE, lifespan=lifespan)
 
 app.include_router(chat_router.router)
 app.include_router(helper_router.router)
+app.include_router(metrics_router.router)
 
 if __name__ == "__main__":  # pragma: no cover - manual server entrypoint
     uvicorn.run(
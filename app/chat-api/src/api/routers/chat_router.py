@@ -1,14 +1,24 @@
 import asyncio
 import json
-from queue import Queue
+import logging
+from contextlib import aclosing, nullcontext
+from typing import AsyncIterator, Awaitable, Callable, List
 
-from fastapi import APIRouter, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 
-from src.api.services.rag_pipeline import answer, answer_stream
+from src.api.core.config import settings
+from src.api.services.admission import AdmissionRejected
+from src.api.services.rag_pipeline import answer_async, answer_stream_async
+from src.api.services.token_coalescer import coalesce_tokens
 from src.dtos.chat_dto import ChatDto
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Max seconds to wait for the next streamed token before giving up on a response.
+STREAM_IDLE_TIMEOUT_SECONDS = 300.0
+
 
 def _scoped_session_id(session_id: str | None, user_id: str | None) -> str:
     """Prefix session_id with user_id so sessions are isolated per user.
@@ -27,22 +37,40 @@ def _scoped_session_id(session_id: str | None, user_id: str | None) -> str:
 async def list_sessions(
     request: Request,
     limit: int = 50,
+    page_token: str | None = None,
     x_user_id: str | None = Header(default=None),
 ):
-    """List chat session ids (from Cassandra), scoped to the requesting user."""
+    """List the requesting user's chat sessions (from Cassandra), most recently updated first.
+
+    Pass next_page_token back as page_token to fetch the following page.
+    """
+    empty = {"session_ids": [], "sessions": [], "next_page_token": None}
     chat_memory = getattr(request.app.state, "chat_memory", None)
-    if chat_memory is None:
-        return {"session_ids": []}
+    if chat_memory is None or not x_user_id:
+        return empty
     try:
-        all_ids = chat_memory.list_sessions(limit=min(limit, 100))
-        if x_user_id:
-            prefix = f"{x_user_id}:"
-            session_ids = [sid[len(prefix):] for sid in all_ids if sid.startswith(prefix)]
-        else:
-            session_ids = []
-        return {"session_ids": session_ids}
+        page = await chat_memory.alist_user_sessions(
+            x_user_id, limit=max(1, min(limit, 100)), page_token=page_token
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
-        return {"session_ids": []}
+        return empty
+    prefix = f"{x_user_id}:"
+    sessions = [
+        {
+            "session_id": s.session_id[len(prefix):] if s.session_id.startswith(prefix) else s.session_id,
+            "title": s.title,
+            "preview": s.preview,
+            "updated_at": s.updated_at.isoformat(),
+        }
+        for s in page.sessions
+    ]
+    return {
+        "session_ids": [s["session_id"] for s in sessions],
+        "sessions": sessions,
+        "next_page_token": page.next_page_token,
+    }
 
 
 @router.get("/sessions/{session_id}/messages")
@@ -58,7 +86,7 @@ async def get_session_messages(
         return {"messages": []}
     try:
         scoped_id = _scoped_session_id(session_id, x_user_id)
-        records = chat_memory.get_context(scoped_id, limit=min(limit, 100))
+        records = await chat_memory.aget_context(scoped_id, limit=min(limit, 100))
         return {
             "messages": [
                 {"role": r.role, "content": r.content, "timestamp": r.timestamp.isoformat()}
@@ -70,10 +98,62 @@ async def get_session_messages(
 
 
 def _get_query_embedding_fn(embed_model):
-    """Return a callable that embeds query text, or None if no embed model."""
+    """Return an async callable that embeds query text, or None if no embed model."""
     if embed_model is None:
         return None
-    return lambda q: embed_model.get_text_embedding(q)
+    return lambda q: embed_model.aget_text_embedding(q)
+
+
+def _admit(app_state):
+    """Admission slot for one generation, or a no-op when admission control is not configured."""
+    admission = getattr(app_state, "admission", None)
+    return admission.admit() if admission is not None else nullcontext()
+
+
+async def _admitted_stream(app_state, tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    async with _admit(app_state), aclosing(tokens):
+        async for token in tokens:
+            yield token
+
+
+async def _history(app_state, session_id: str) -> str:
+    """Compacted conversation history for the session's next turn; empty when not configured."""
+    history_compactor = getattr(app_state, "history_compactor", None)
+    if history_compactor is None:
+        return ""
+    try:
+        return await history_compactor.abuild(session_id)
+    except Exception as e:
+        # Answer without history rather than fail the turn.
+        logger.warning("Conversation history unavailable for session %s: %s", session_id, e)
+        return ""
+
+
+def _schedule_history_fold(app_state, session_id: str) -> None:
+    history_compactor = getattr(app_state, "history_compactor", None)
+    if history_compactor is not None:
+        history_compactor.schedule_fold(session_id)
+
+
+async def _shared_answer(app_state, query: str, fn: Callable[[], Awaitable[str]], history: str = "") -> str:
+    """
+    Run fn() once per identical in-flight query when single-flight is configured.
+    A turn carrying conversation history is answered on its own.
+    """
+    single_flight = getattr(app_state, "single_flight", None)
+    if single_flight is None or history:
+        return await fn()
+    return await single_flight.run(query, fn)
+
+
+def _shared_stream(
+    app_state, query: str, make_stream: Callable[[], AsyncIterator[str]], history: str = ""
+) -> AsyncIterator[str]:
+    """Fan out one token stream per identical in-flight query (without history) when single-flight is configured."""
+    single_flight = getattr(app_state, "single_flight", None)
+    if single_flight is None or history:
+        return make_stream()
+    return single_flight.stream(query, make_stream)
 
 
 @router.post("/")
@@ -89,25 +169,44 @@ async def chat_post(
     first_reranker = request.app.state.first_reranker
     second_reranker = request.app.state.second_reranker
     semantic_cache = getattr(request.app.state, "semantic_cache", None)
+    retrieval_cache = getattr(request.app.state, "retrieval_cache", None)
     get_query_embedding = _get_query_embedding_fn(getattr(request.app.state, "embed_model", None))
+    count_tokens = getattr(request.app.state, "count_tokens", None)
+    session_id = _scoped_session_id(x_session_id, x_user_id)
+    history = await _history(request.app.state, session_id)
 
-    result = await asyncio.to_thread(
-        answer,
-        db=db,
-        llm=llm,
-        first_reranker=first_reranker,
-        second_reranker=second_reranker,
-        query=dto.content,
-        semantic_cache=semantic_cache,
-        get_query_embedding=get_query_embedding,
-    )
+    async def generate() -> str:
+        async with _admit(request.app.state):
+            return await answer_async(
+                db=db,
+                llm=llm,
+                first_reranker=first_reranker,
+                second_reranker=second_reranker,
+                query=dto.content,
+                semantic_cache=semantic_cache,
+                get_query_embedding=get_query_embedding,
+                retrieval_cache=retrieval_cache,
+                speculative_retrieval=settings.RAG_SPECULATIVE_RETRIEVAL,
+                context_max_tokens=settings.RAG_CONTEXT_MAX_TOKENS,
+                count_tokens=count_tokens,
+                history=history,
+            )
+
+    try:
+        result = await _shared_answer(request.app.state, dto.content, generate, history)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_seconds)},
+        )
 
     # Persist exchange to chat memory if available
-    session_id = _scoped_session_id(x_session_id, x_user_id)
     chat_memory = getattr(request.app.state, "chat_memory", None)
     if chat_memory is not None:
         try:
-            chat_memory.append_exchange(session_id, dto.content, result)
+            await chat_memory.aappend_exchange(session_id, dto.content, result, user_id=x_user_id)
+            _schedule_history_fold(request.app.state, session_id)
         except Exception:
             # chat memory failures should not break the main flow
             pass
@@ -119,18 +218,6 @@ async def chat_post(
     }
 
 
-def _run_stream_into_queue(thread_queue: Queue, stream_args: dict) -> None:
-    """Run sync answer_stream and put chunks + done into thread-safe queue."""
-    try:
-        chunks = []
-        for chunk in answer_stream(**stream_args):
-            chunks.append(chunk)
-            thread_queue.put(("chunk", chunk))
-        thread_queue.put(("done", "".join(chunks)))
-    except Exception as e:  # pragma: no cover - defensive; tested via integration
-        thread_queue.put(("error", str(e)))
-
-
 @router.websocket("/")
 async def chat_websocket(websocket: WebSocket):
     """Handle chat over WebSocket: stream RAG response tokens, then send done."""
@@ -141,7 +228,9 @@ async def chat_websocket(websocket: WebSocket):
     first_reranker = websocket.app.state.first_reranker
     second_reranker = websocket.app.state.second_reranker
     semantic_cache = getattr(websocket.app.state, "semantic_cache", None)
+    retrieval_cache = getattr(websocket.app.state, "retrieval_cache", None)
     get_query_embedding = _get_query_embedding_fn(getattr(websocket.app.state, "embed_model", None))
+    count_tokens = getattr(websocket.app.state, "count_tokens", None)
 
     raw_session_id = (
         websocket.headers.get("x-session-id")
@@ -157,59 +246,77 @@ async def chat_websocket(websocket: WebSocket):
             payload = json.loads(raw)
             dto = ChatDto.model_validate(payload)
 
-            thread_queue = Queue()
-            stream_args = {
-                "db": db,
-                "llm": llm,
-                "first_reranker": first_reranker,
-                "second_reranker": second_reranker,
-                "query": dto.content,
-                "semantic_cache": semantic_cache,
-                "get_query_embedding": get_query_embedding,
-            }
-            loop = asyncio.get_event_loop()
-            loop.run_in_executor(
-                None, _run_stream_into_queue, thread_queue, stream_args
-            )
-
-            def get_from_thread():
-                return thread_queue.get()
-
             history_payload = [m.model_dump() for m in dto.history]
             history_len = len(dto.history)
 
-            while True:
-                msg = await asyncio.wait_for(
-                    loop.run_in_executor(None, get_from_thread),
-                    timeout=300.0,
+            loop = asyncio.get_running_loop()
+            chunks: List[str] = []
+            try:
+                query = dto.content
+                history = await _history(websocket.app.state, session_id)
+                stream = coalesce_tokens(
+                    _shared_stream(
+                        websocket.app.state,
+                        query,
+                        lambda: _admitted_stream(
+                            websocket.app.state,
+                            answer_stream_async(
+                                db=db,
+                                llm=llm,
+                                first_reranker=first_reranker,
+                                second_reranker=second_reranker,
+                                query=query,
+                                semantic_cache=semantic_cache,
+                                get_query_embedding=get_query_embedding,
+                                retrieval_cache=retrieval_cache,
+                                speculative_retrieval=settings.RAG_SPECULATIVE_RETRIEVAL,
+                                context_max_tokens=settings.RAG_CONTEXT_MAX_TOKENS,
+                                count_tokens=count_tokens,
+                                history=history,
+                            ),
+                        ),
+                        history,
+                    ),
+                    max_latency_seconds=settings.WS_COALESCE_MAX_LATENCY_MS / 1000,
+                    max_bytes=settings.WS_COALESCE_MAX_BYTES,
+                )
+                async with aclosing(stream), asyncio.timeout(STREAM_IDLE_TIMEOUT_SECONDS) as idle:
+                    async for chunk in stream:
+                        chunks.append(chunk)
+                        await websocket.send_text(
+                            json.dumps({"t": "chunk", "content": chunk})
+                        )
+                        idle.reschedule(loop.time() + STREAM_IDLE_TIMEOUT_SECONDS)
+            except AdmissionRejected as e:
+                await websocket.send_text(
+                    json.dumps({"t": "busy", "error": str(e), "retry_after": e.retry_after_seconds})
+                )
+                continue
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:  # pragma: no cover - error from pipeline
+                await websocket.send_text(
+                    json.dumps({"t": "error", "error": str(e) or type(e).__name__})
                 )
-                kind, value = msg
-                if kind == "chunk":
-                    await websocket.send_text(
-                        json.dumps({"t": "chunk", "content": value})
-                    )
-                elif kind == "done":
-                    # Append full exchange into chat memory if available
-                    if chat_memory is not None:
-                        try:
-                            chat_memory.append_exchange(session_id, dto.content, value)
-                        except Exception:
-                            pass
-                    await websocket.send_text(
-                        json.dumps({
-                            "t": "done",
-                            "received_content": value,
-                            "history": history_payload,
-                            "received_role": "assistant",
-                            "history_length": history_len,
-                        })
-                    )
-                    break
-                else:  # pragma: no cover - error from pipeline/queue
-                    await websocket.send_text(
-                        json.dumps({"t": "error", "error": value})
-                    )
-                    break
+                continue
+
+            value = "".join(chunks)
+            # Append full exchange into chat memory if available
+            if chat_memory is not None:
+                try:
+                    await chat_memory.aappend_exchange(session_id, dto.content, value, user_id=user_id)
+                    _schedule_history_fold(websocket.app.state, session_id)
+                except Exception:
+                    pass
+            await websocket.send_text(
+                json.dumps({
+                    "t": "done",
+                    "received_content": value,
+                    "history": history_payload,
+                    "received_role": "assistant",
+                    "history_length": history_len,
+                })
+            )
     except WebSocketDisconnect:  # pragma: no cover - client disconnect
         pass
     except json.JSONDecodeError as e:  # pragma: no cover - invalid payload
@@ -15,7 +15,11 @@ def health_check(request: Request):
     except Exception:
         pass
 
-    return {
+    result = {
         "status": "online",
         "database": "connected" if db_alive else "disconnected",
     }
+    embed_stats = getattr(getattr(request.app.state, "embed_model", None), "stats", None)
+    if callable(embed_stats):
+        result["embedding_cache"] = embed_stats()
+    return result
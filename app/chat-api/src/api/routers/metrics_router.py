@@ -0,0 +1,13 @@
+"""
+Prometheus scrape endpoint.
+"""
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    """Expose process and RAG pipeline metrics in Prometheus text format."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
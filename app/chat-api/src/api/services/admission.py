@@ -0,0 +1,124 @@
+"""
+Admission control for RAG generation in chat-api.
+
+At most max_concurrent pipelines run at once; up to max_queue more wait (FIFO) for at most
+queue_timeout_seconds. Anything beyond that is rejected immediately with AdmissionRejected, which
+the router turns into 503 + Retry-After (HTTP) or a `busy` frame (WebSocket). A slot released by a
+finished pipeline is handed directly to the oldest waiter.
+"""
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque
+
+from src.metrics import (
+    record_admission_rejected,
+    record_admission_wait,
+    set_admission_gauges,
+)
+
+logger = logging.getLogger(__name__)
+
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_QUEUE_TIMEOUT = "queue_timeout"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; retry_after_seconds is the client hint."""
+
+    def __init__(self, reason: str, retry_after_seconds: int) -> None:
+        super().__init__(f"Server busy ({reason}); retry after {retry_after_seconds}s")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """Bounded concurrency plus a bounded, time-limited FIFO wait queue (single event loop)."""
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+        retry_after_seconds: int = 1,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._active = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _publish(self) -> None:
+        set_admission_gauges(in_flight=self._active, queue_depth=len(self._waiters))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        record_admission_rejected(reason)
+        return AdmissionRejected(reason, self.retry_after_seconds)
+
+    async def _acquire(self) -> None:
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            record_admission_wait(0.0)
+            self._publish()
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(REJECT_QUEUE_FULL)
+
+        loop = asyncio.get_running_loop()
+        waiter: "asyncio.Future[None]" = loop.create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        start = loop.time()
+        try:
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                await waiter
+        except BaseException as e:
+            # Timed out or cancelled while waiting: pass on a slot that was already handed to us.
+            if waiter.done() and not waiter.cancelled():
+                self._waiters_remove(waiter)
+                self._release()
+            if isinstance(e, TimeoutError):
+                raise self._reject(REJECT_QUEUE_TIMEOUT) from None
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            self._waiters_remove(waiter)
+            self._publish()
+        record_admission_wait(loop.time() - start)
+
+    def _waiters_remove(self, waiter: "asyncio.Future[None]") -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot over; _active stays the same.
+                waiter.set_result(None)
+                self._publish()
+                return
+        self._active -= 1
+        self._publish()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a generation slot for the duration of the block; raises AdmissionRejected."""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
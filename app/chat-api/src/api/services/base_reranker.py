@@ -1,9 +1,18 @@
 """
 Abstract base class for reranker implementations.
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List
 
+# Set on docs a reranker hands back in their incoming order instead of reranking them
+# (DeadlineReranker's first-stage fallback), so callers can avoid caching them.
+RERANK_FALLBACK_KEY = "rerank_fallback"
+
+
+def is_rerank_fallback(docs: List[Dict[str, Any]]) -> bool:
+    return any(doc.get(RERANK_FALLBACK_KEY) for doc in docs)
+
 
 class BaseReranker(ABC):
     """Interface for reranking retrieved documents by relevance to a query."""
@@ -21,3 +30,12 @@ class BaseReranker(ABC):
             Reranked list of documents (possibly reordered and/or truncated).
         """
         pass  # pragma: no cover
+
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Async variant of rerank().
+
+        Default implementation runs rerank() in a worker thread; rerankers that call
+        a remote API should override this with a native async client.
+        """
+        return await asyncio.to_thread(self.rerank, query, docs)
@@ -0,0 +1,229 @@
+"""
+Token-budgeted context packing for the RAG prompt.
+
+Chunks are taken in rerank-score order and packed into a token budget counted with the target
+model's tokenizer. Sentences already present in an earlier chunk (overlap between adjacent chunks)
+are dropped, and a chunk that does not fit is truncated at a sentence boundary (one sentence fewer
+at a time until the formatted chunk fits); the remaining budget then goes to the next chunks. Kept
+sentences are joined with their original separators, so an untouched chunk is its original text.
+A chunk of which not even the first sentence fits is skipped for the next one; only if nothing fits
+at all is the top chunk cut at a word boundary, so the context is never empty while there are chunks.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+UNKNOWN_SOURCE = "Unknown"
+# Encoding used when tiktoken does not know the model name (gpt-4o / gpt-5 family).
+DEFAULT_ENCODING = "o200k_base"
+# Rough chars-per-token for English text; only used when tiktoken is unavailable.
+_FALLBACK_CHARS_PER_TOKEN = 4
+CHUNK_SEPARATOR = "\n\n"
+
+# Sentence end followed by whitespace and something that starts a new sentence or provision.
+# Citation abbreviations (U.S.C., Sec., No., Stat., v.) do not end a sentence.
+_SENTENCE_SPLIT_RE = re.compile(
+    r"(?<!\.[A-Z]\.)(?<!\bSec\.)(?<!\bNo\.)(?<!\bStat\.)(?<!\bArt\.)(?<!\bv\.)"
+    r"(?<=[.!?;:])\s+(?=[A-Z0-9(\[\"'§])|\n{2,}"
+)
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+@dataclass
+class PackedContext:
+    """Result of pack_context(): the prompt context plus token accounting."""
+
+    context: str
+    tokens_used: int
+    tokens_unpacked: int
+    chunks_used: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_unpacked - self.tokens_used, 0)
+
+
+def _approximate_token_count(text: str) -> int:
+    return (len(text) + _FALLBACK_CHARS_PER_TOKEN - 1) // _FALLBACK_CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model: str) -> TokenCounter:
+    """
+    Token counter for the given model. Uses tiktoken when its encoding can be loaded,
+    otherwise a character-based approximation.
+    """
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning("tiktoken unavailable for %s (%s); approximating token counts", model, e)
+        return _approximate_token_count
+
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets in text of each sentence, surrounding whitespace excluded."""
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    # Each sentence runs up to the next separator match; the last one up to the end of text.
+    bounds = [(match.start(), match.end()) for match in _SENTENCE_SPLIT_RE.finditer(text)]
+    for end, next_start in bounds + [(len(text), len(text))]:
+        piece = text[start:end]
+        stripped = piece.strip()
+        if stripped:
+            offset = start + len(piece) - len(piece.lstrip())
+            spans.append((offset, offset + len(stripped)))
+        start = next_start
+    return spans
+
+
+def split_sentences(text: str) -> List[str]:
+    return [text[start:end] for start, end in _sentence_spans(text)]
+
+
+def _join_sentences(text: str, spans: List[Tuple[int, int]], kept: List[int]) -> str:
+    """
+    Sentences spans[i] for i in kept, each followed by the separator that followed it in text
+    (newlines and blank lines included). With every sentence kept this is text without outer whitespace.
+    """
+    out: List[str] = []
+    for position, i in enumerate(kept):
+        start, end = spans[i]
+        out.append(text[start:end])
+        if position + 1 < len(kept):
+            out.append(text[end : spans[i + 1][0]])
+    return "".join(out)
+
+
+def _sentence_key(sentence: str) -> str:
+    """Normalized form used to detect the same sentence repeated across overlapping chunks."""
+    return _NON_WORD_RE.sub(" ", sentence).strip().casefold()
+
+
+def format_chunk(index: int, source: str, text: str) -> str:
+    return f"[Chunk {index}]\nSource: {source}\nContent:\n{text}".strip()
+
+
+def _by_rerank_score(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Highest rerank_score first; docs without a score keep their relative order after scored ones."""
+
+    def key(item):
+        position, doc = item
+        score = doc.get("rerank_score")
+        return (score is None, -(score or 0.0), position)
+
+    return [doc for _, doc in sorted(enumerate(docs), key=key)]
+
+
+def _truncate_words(index: int, source: str, text: str, max_tokens: int, count: TokenCounter) -> Optional[str]:
+    """Longest word prefix of text whose formatted chunk fits max_tokens (binary search), or None."""
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count(format_chunk(index, source, " ".join(words[:mid]))) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return format_chunk(index, source, " ".join(words[:low])) if low else None
+
+
+def pack_context(
+    docs: List[Dict[str, Any]],
+    max_tokens: int,
+    count_tokens: Optional[TokenCounter] = None,
+) -> PackedContext:
+    """
+    Pack chunks by rerank score into at most max_tokens tokens.
+
+    Args:
+        docs: Reranked chunks with 'text', 'source' and optionally 'rerank_score'.
+        max_tokens: Token budget for the whole context string.
+        count_tokens: Token counter; defaults to the approximation (callers pass the model's).
+
+    Returns:
+        PackedContext with the context string and used / unpacked token counts.
+    """
+    count = count_tokens or _approximate_token_count
+    unpacked = CHUNK_SEPARATOR.join(
+        format_chunk(i, doc.get("source", UNKNOWN_SOURCE), doc.get("text", ""))
+        for i, doc in enumerate(docs, start=1)
+    )
+    tokens_unpacked = count(unpacked) if unpacked else 0
+
+    seen: Set[str] = set()
+    parts: List[str] = []
+    used = 0
+    separator_tokens = count(CHUNK_SEPARATOR)
+    # Top chunk whose first sentence alone exceeded the budget: the last resort if nothing fits.
+    oversized: Optional[Dict[str, Any]] = None
+
+    for doc in _by_rerank_score(docs):
+        source = doc.get("source", UNKNOWN_SOURCE)
+        text = doc.get("text", "")
+        spans = _sentence_spans(text)
+        fresh = [i for i, (start, end) in enumerate(spans) if _sentence_key(text[start:end]) not in seen]
+        if not fresh:
+            continue
+
+        index = len(parts) + 1
+        overhead = count(format_chunk(index, source, "")) + (separator_tokens if parts else 0)
+        remaining = max_tokens - used - overhead
+        if remaining <= 0:
+            break
+
+        kept: List[int] = []
+        kept_tokens = 0
+        for i in fresh:
+            # +1 for the separator before each sentence after the first (an estimate, checked below).
+            sentence_tokens = count(text[spans[i][0] : spans[i][1]]) + (1 if kept else 0)
+            if kept_tokens + sentence_tokens > remaining:
+                break
+            kept.append(i)
+            kept_tokens += sentence_tokens
+        part = ""
+        part_tokens = 0
+        while kept:
+            part = format_chunk(index, source, _join_sentences(text, spans, kept))
+            part_tokens = count(part) + (separator_tokens if parts else 0)
+            if used + part_tokens <= max_tokens:
+                break
+            # Tokens merged across sentence joins can overshoot the estimate: one sentence fewer.
+            kept.pop()
+        if not kept:
+            # Not even its first sentence fits; a later (smaller) chunk may still fit.
+            if oversized is None:
+                oversized = {"source": source, "text": _join_sentences(text, spans, fresh)}
+            continue
+
+        parts.append(part)
+        used += part_tokens
+        seen.update(_sentence_key(text[spans[i][0] : spans[i][1]]) for i in kept)
+
+    if not parts and oversized is not None:
+        part = _truncate_words(1, oversized["source"], oversized["text"], max_tokens, count)
+        if part is not None:
+            parts.append(part)
+
+    context = CHUNK_SEPARATOR.join(parts)
+    return PackedContext(
+        context=context,
+        tokens_used=count(context) if context else 0,
+        tokens_unpacked=tokens_unpacked,
+        chunks_used=len(parts),
+    )
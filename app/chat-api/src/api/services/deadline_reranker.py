@@ -0,0 +1,162 @@
+"""
+Deadline-aware wrapper for a remote reranker (Cohere).
+
+The wrapped call gets a latency budget; an optional hedged duplicate request is sent if the first
+has not answered after hedge_delay_seconds, and the first successful response wins. When the budget
+expires or the call fails, the first-stage ordering is returned instead. A circuit breaker skips the
+remote call entirely while it keeps failing.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.api.services.base_reranker import RERANK_FALLBACK_KEY, BaseReranker
+from src.metrics import record_rerank_fallback, record_rerank_hedge
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_CIRCUIT_OPEN = "circuit_open"
+FALLBACK_TIMEOUT = "timeout"
+FALLBACK_ERROR = "error"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls allowed. After failure_threshold consecutive failures it opens for
+    reset_timeout_seconds; then a single trial call is allowed (half-open), and its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_timeout_seconds:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up a call's slot without a verdict (it was cancelled); the next call may retry."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Reranker circuit opened after %s consecutive failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class DeadlineReranker(BaseReranker):
+    """
+    Runs `inner` within budget_seconds, falling back to the first top_k docs in their incoming
+    (first-stage) order on timeout, error or an open circuit. Fallback docs carry RERANK_FALLBACK_KEY.
+    """
+
+    def __init__(
+        self,
+        inner: BaseReranker,
+        budget_seconds: float,
+        top_k: int,
+        hedge_delay_seconds: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.inner = inner
+        self.budget_seconds = budget_seconds
+        self.top_k = top_k
+        self.hedge_delay_seconds = hedge_delay_seconds or None
+        self.breaker = breaker or CircuitBreaker()
+
+    def _fallback(self, docs: List[Dict[str, Any]], reason: str) -> List[Dict[str, Any]]:
+        record_rerank_fallback(reason)
+        return [dict(doc, **{RERANK_FALLBACK_KEY: True}) for doc in docs[: self.top_k]]
+
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sync path: circuit breaker and error fallback only (bound the call with the client timeout)."""
+        if not docs:
+            return []
+        if not self.breaker.allow():
+            return self._fallback(docs, FALLBACK_CIRCUIT_OPEN)
+        try:
+            result = self.inner.rerank(query, docs)
+        except Exception as e:
+            logger.warning("Rerank failed, using first-stage order: %s", e)
+            self.breaker.record_failure()
+            return self._fallback(docs, FALLBACK_ERROR)
+        self.breaker.record_success()
+        return result
+
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not docs:
+            return []
+        if not self.breaker.allow():
+            return self._fallback(docs, FALLBACK_CIRCUIT_OPEN)
+        try:
+            async with asyncio.timeout(self.budget_seconds):
+                result = await self._hedged(query, docs)
+        except asyncio.CancelledError:
+            # The caller went away (disconnect, single-flight teardown): no verdict on the reranker,
+            # but a half-open trial must not stay in flight forever.
+            self.breaker.release_trial()
+            raise
+        except TimeoutError:
+            logger.warning("Rerank exceeded %.0f ms budget, using first-stage order", self.budget_seconds * 1000)
+            self.breaker.record_failure()
+            return self._fallback(docs, FALLBACK_TIMEOUT)
+        except Exception as e:
+            logger.warning("Rerank failed, using first-stage order: %s", e)
+            self.breaker.record_failure()
+            return self._fallback(docs, FALLBACK_ERROR)
+        self.breaker.record_success()
+        return result
+
+    async def _hedged(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """First successful response of the primary request and (after the hedge delay) a duplicate."""
+        primary = asyncio.create_task(self.inner.arerank(query, docs))
+        if self.hedge_delay_seconds is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay_seconds)
+            if not done:
+                record_rerank_hedge()
+                pending.add(asyncio.create_task(self.inner.arerank(query, docs)))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,288 @@
+"""
+Token-bounded conversation history for the RAG prompt.
+
+Each turn's prompt carries the session's rolling summary plus the newest turns verbatim, kept within
+max_tokens (counted with the target model's tokenizer) and max_turns. Turns that no longer fit are
+folded into the summary after the exchange is stored: a background task summarizes only the turns
+newer than the summary's covered_until, so each fold costs one small LLM call regardless of session
+length. If more than window_messages messages piled up since covered_until (e.g. folds failed for a
+while), the fold reads back to covered_until and summarizes them oldest first, window_messages at a
+time, so every turn is summarized exactly once. The backfill is capped at max_fold_messages: past
+that, only the newest max_fold_messages are summarized, the older ones are marked covered and the
+summary notes that earlier turns were left out. The summary is stored alongside the session in chat
+memory (session_summaries in Cassandra).
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.api.services.context_packer import TokenCounter, _approximate_token_count
+from src.chat_memory.models import ChatMessageRecord, SessionSummary
+from src.chat_memory.service import ChatMemoryService
+from src.metrics import STAGE_HISTORY, STAGE_HISTORY_FOLD, observe_stage, record_history_fold, record_history_tokens
+
+logger = logging.getLogger(__name__)
+
+# summarize(previous_summary, new_turns) -> updated summary
+Summarizer = Callable[[str, str], Awaitable[str]]
+
+SUMMARY_HEADER = "CONVERSATION SUMMARY:"
+TURNS_HEADER = "RECENT CONVERSATION:"
+_ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+# Added to the previous summary when a capped backfill skips unsummarized turns.
+TRUNCATION_NOTE = "(Earlier turns of this conversation were too many to summarize and were left out.)"
+# Summaries cached per pod so building a prompt does not read the store every turn.
+_SUMMARY_CACHE_SIZE = 1024
+
+
+def _render_message(msg: ChatMessageRecord) -> str:
+    return f"{_ROLE_LABELS.get(msg.role, msg.role.capitalize())}: {msg.content}"
+
+
+def render_turns(turns: List[List[ChatMessageRecord]]) -> str:
+    return "\n".join(_render_message(m) for turn in turns for m in turn)
+
+
+def _chunk_turns(turns: List[List[ChatMessageRecord]], max_messages: int) -> List[List[List[ChatMessageRecord]]]:
+    """Consecutive runs of whole turns with at most max_messages messages each (a longer turn stands alone)."""
+    chunks: List[List[List[ChatMessageRecord]]] = []
+    size = 0
+    for turn in turns:
+        if not chunks or size + len(turn) > max_messages:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(turn)
+        size += len(turn)
+    return chunks
+
+
+def group_turns(messages: List[ChatMessageRecord]) -> List[List[ChatMessageRecord]]:
+    """Split messages (oldest first) into turns, each starting at a user message."""
+    turns: List[List[ChatMessageRecord]] = []
+    for msg in messages:
+        if msg.role == "user" or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return turns
+
+
+@dataclass
+class CompactedHistory:
+    """Result of compact_history(): the summary and the verbatim turns that fit the budget."""
+
+    summary: str = ""
+    turns: List[List[ChatMessageRecord]] = field(default_factory=list)
+    summary_tokens: int = 0
+    turn_tokens: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_tokens + self.turn_tokens
+
+    def render(self) -> str:
+        blocks = []
+        if self.summary:
+            blocks.append(f"{SUMMARY_HEADER}\n{self.summary}")
+        if self.turns:
+            blocks.append(f"{TURNS_HEADER}\n{render_turns(self.turns)}")
+        return "\n\n".join(blocks)
+
+
+def compact_history(
+    messages: List[ChatMessageRecord],
+    summary: str,
+    count_tokens: TokenCounter,
+    max_tokens: int,
+    max_turns: int,
+) -> CompactedHistory:
+    """
+    Keep the newest whole turns of messages (oldest first, not yet summarized) that fit max_tokens
+    after the summary, up to max_turns. A summary that alone exceeds the budget is left out.
+    """
+    summary_tokens = count_tokens(f"{SUMMARY_HEADER}\n{summary}") if summary else 0
+    if summary_tokens > max_tokens:
+        summary, summary_tokens = "", 0
+    budget = max_tokens - summary_tokens
+    kept: List[List[ChatMessageRecord]] = []
+    used = 0
+    for turn in reversed(group_turns(messages)):
+        if len(kept) >= max_turns:
+            break
+        # +1 for the newline that joins this turn to the next.
+        cost = count_tokens(render_turns([turn])) + 1
+        if used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+    return CompactedHistory(summary=summary, turns=kept, summary_tokens=summary_tokens, turn_tokens=used)
+
+
+class HistoryCompactor:
+    """Builds each turn's history block from chat memory and folds older turns into the summary."""
+
+    def __init__(
+        self,
+        chat_memory: ChatMemoryService,
+        summarize: Summarizer,
+        count_tokens: Optional[TokenCounter] = None,
+        max_tokens: int = 1500,
+        max_turns: int = 6,
+        window_messages: int = 40,
+        max_fold_messages: int = 200,
+    ) -> None:
+        if max_tokens <= 0 or max_turns <= 0:
+            raise ValueError("max_tokens and max_turns must be > 0")
+        if max_fold_messages < window_messages:
+            raise ValueError("max_fold_messages must be >= window_messages")
+        self._chat_memory = chat_memory
+        self._summarize = summarize
+        self._count_tokens = count_tokens or _approximate_token_count
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+        self.window_messages = window_messages
+        self.max_fold_messages = max_fold_messages
+        self._summaries: "OrderedDict[str, Optional[SessionSummary]]" = OrderedDict()
+        self._folds: Dict[str, asyncio.Task] = {}
+        self._refold: Set[str] = set()
+
+    def _cache_summary(self, session_id: str, summary: Optional[SessionSummary]) -> None:
+        self._summaries[session_id] = summary
+        self._summaries.move_to_end(session_id)
+        while len(self._summaries) > _SUMMARY_CACHE_SIZE:
+            self._summaries.popitem(last=False)
+
+    async def _aget_summary(self, session_id: str) -> Optional[SessionSummary]:
+        if session_id in self._summaries:
+            self._summaries.move_to_end(session_id)
+            return self._summaries[session_id]
+        summary = await self._chat_memory.aget_summary(session_id)
+        self._cache_summary(session_id, summary)
+        return summary
+
+    def _compact(self, messages: List[ChatMessageRecord], summary: Optional[SessionSummary]) -> CompactedHistory:
+        if summary is not None:
+            messages = [m for m in messages if m.timestamp > summary.covered_until]
+        return compact_history(
+            messages, summary.text if summary else "", self._count_tokens, self.max_tokens, self.max_turns
+        )
+
+    async def abuild(self, session_id: str) -> str:
+        """History block for the next turn of session_id; empty for a new session."""
+        with observe_stage(STAGE_HISTORY):
+            messages = await self._chat_memory.aget_context(session_id, limit=self.window_messages)
+            if not messages:
+                return ""
+            compacted = self._compact(messages, await self._aget_summary(session_id))
+        record_history_tokens(verbatim=compacted.turn_tokens, summary=compacted.summary_tokens)
+        return compacted.render()
+
+    def schedule_fold(self, session_id: str) -> None:
+        """Fold turns that fell out of the verbatim window into the summary, in the background."""
+        task = self._folds.get(session_id)
+        if task is not None and not task.done():
+            # One fold per session at a time; rerun once it finishes to pick up this exchange.
+            self._refold.add(session_id)
+            return
+        task = asyncio.create_task(self._run_folds(session_id))
+        self._folds[session_id] = task
+        task.add_done_callback(lambda t: self._fold_done(session_id, t))
+
+    def _fold_done(self, session_id: str, task: asyncio.Task) -> None:
+        if self._folds.get(session_id) is task:
+            del self._folds[session_id]
+
+    async def _run_folds(self, session_id: str) -> None:
+        while True:
+            self._refold.discard(session_id)
+            try:
+                await self._fold(session_id)
+            except Exception as e:
+                record_history_fold(folded=False)
+                logger.warning("History summary update failed for session %s: %s", session_id, e)
+                return
+            if session_id not in self._refold:
+                return
+
+    async def _unsummarized(
+        self, session_id: str, summary: Optional[SessionSummary]
+    ) -> Tuple[List[ChatMessageRecord], bool]:
+        """
+        Messages after the summary's covered_until, reading further back until it is reached or
+        max_fold_messages were read. The flag is True if older unsummarized messages were left out.
+        """
+        limit = self.window_messages
+        while True:
+            # Read through the per-pod cache: the fold must not work from a tail missing other pods' turns.
+            messages = await self._chat_memory.aget_context(session_id, limit=limit, read_through=True)
+            # Fewer rows than asked for means the read returned the whole session.
+            if len(messages) < limit or (summary is not None and messages[0].timestamp <= summary.covered_until):
+                truncated = False
+                break
+            if limit >= self.max_fold_messages:
+                truncated = True
+                break
+            limit = min(limit * 2, self.max_fold_messages)
+        if summary is not None:
+            messages = [m for m in messages if m.timestamp > summary.covered_until]
+        return messages, truncated
+
+    async def _fold(self, session_id: str) -> None:
+        # Read through to the store: another pod may have folded this session since it was cached.
+        summary = await self._chat_memory.aget_summary(session_id)
+        self._cache_summary(session_id, summary)
+        messages, truncated = await self._unsummarized(session_id, summary)
+        compacted = self._compact(messages, summary)
+        kept_from = compacted.turns[0][0].timestamp if compacted.turns else None
+        folded = [m for m in messages if kept_from is None or m.timestamp < kept_from]
+        previous = summary.text if summary else ""
+        if truncated and folded:
+            # The skipped turns end up before the new covered_until, i.e. marked covered.
+            logger.warning("History fold for session %s skipped turns past the backfill cap", session_id)
+            previous = f"{previous}\n{TRUNCATION_NOTE}".strip()
+        # Oldest first and window_messages at a time, so each summarize call stays small.
+        for chunk in _chunk_turns(group_turns(folded), self.window_messages):
+            with observe_stage(STAGE_HISTORY_FOLD):
+                text = await self._summarize(previous, render_turns(chunk))
+            updated = SessionSummary(session_id=session_id, text=text.strip(), covered_until=chunk[-1][-1].timestamp)
+            if not await self._chat_memory.aput_summary(updated):
+                # Another pod stored a summary covering later turns; re-read it on the next build.
+                self._summaries.pop(session_id, None)
+                return
+            self._cache_summary(session_id, updated)
+            record_history_fold(folded=True)
+            summary = updated
+            previous = updated.text
+
+    async def aclose(self, timeout_seconds: float = 5.0) -> None:
+        """Wait for running folds (up to timeout_seconds), then cancel the rest."""
+        tasks = [t for t in self._folds.values() if not t.done()]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def openai_summarizer(api_key: str, model: str, max_tokens: int, prompt_path: Path) -> Summarizer:
+    """Summarizer backed by an OpenAI chat model, capped at max_tokens of output."""
+    from llama_index.core.llms import ChatMessage
+    from llama_index.llms.openai import OpenAI
+
+    llm = OpenAI(model=model, api_key=api_key, max_tokens=max_tokens)
+    # English runs ~0.75 words per token; asking for 0.6 leaves headroom under the output cap.
+    system_prompt = prompt_path.read_text(encoding="utf-8").format(max_words=max(int(max_tokens * 0.6), 1))
+
+    async def summarize(previous_summary: str, new_turns: str) -> str:
+        user_prompt = f"PREVIOUS SUMMARY:\n{previous_summary or '(none)'}\n\nNEW TURNS:\n{new_turns}"
+        response = await llm.achat(
+            [ChatMessage(role="system", content=system_prompt), ChatMessage(role="user", content=user_prompt)]
+        )
+        return response.message.content or ""
+
+    return summarize
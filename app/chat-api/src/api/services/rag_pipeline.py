@@ -1,10 +1,49 @@
 """
 RAG pipeline: retrieval, reranking, context building, and LLM generation.
 Optional semantic cache: if query embedding matches a cached one above threshold, return cached response.
+The query is embedded at most once per request; the same vector feeds the cache lookup, the vector
+search and the cache write.
+
+answer_async / answer_stream_async also accept a RetrievalCache: on an answer-cache miss, a similar
+earlier query's reranked chunk ids are reused so generation starts without retrieval or reranking.
+
+answer_async / answer_stream_async are the asyncio-native variants used by the routers: every
+network-bound stage is awaited so a single worker can hold many in-flight chats.
 """
-from typing import Any, Callable, Dict, Iterator, List, Optional
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 
-from src.api.services.base_reranker import BaseReranker
+from src.api.services.base_reranker import BaseReranker, is_rerank_fallback
+from src.api.services.context_packer import (
+    CHUNK_SEPARATOR,
+    UNKNOWN_SOURCE,
+    TokenCounter,
+    _approximate_token_count,
+    format_chunk,
+    pack_context,
+)
+from src.api.services.single_flight import track_answer_store
+from src.metrics import (
+    LLM_TOKENS,
+    STAGE_CACHE_GET,
+    STAGE_CACHE_SET,
+    STAGE_CONTEXT_BUILD,
+    STAGE_EMBED,
+    STAGE_FIRST_RERANK,
+    STAGE_LLM_FIRST_TOKEN,
+    STAGE_LLM_TOTAL,
+    STAGE_RETRIEVAL_CACHE_GET,
+    STAGE_RETRIEVAL_CACHE_SET,
+    STAGE_RETRIEVE,
+    STAGE_SECOND_RERANK,
+    observe_latency,
+    observe_stage,
+    record_cache_result,
+    record_context_tokens,
+    record_retrieval_cache_result,
+    record_speculative_retrieval,
+)
 from src.vector_store.base import BaseVectorStore
 from code_shared.llm import BaseLLM
 
@@ -12,26 +51,101 @@ from code_shared.llm import BaseLLM
 # Constants
 # ---------------------------------------------------------------------------
 DEFAULT_RETRIEVAL_TOP_K = 25
-UNKNOWN_SOURCE = "Unknown"
 
 
-def transform(docs: List[Dict[str, Any]]) -> str:
+def _record_prompt_tokens(query: str, context: str, count_tokens: Optional[TokenCounter]) -> None:
+    """Count what this pipeline sends the LLM: the query plus the packed context (and any history)."""
+    count = count_tokens or _approximate_token_count
+    LLM_TOKENS.labels(kind="prompt").inc(count(query) + (count(context) if context else 0))
+
+
+def _record_completion_tokens(chunks: List[str], count_tokens: Optional[TokenCounter]) -> None:
+    """Count the answer with the model's tokenizer; a streamed delta is not always one token."""
+    if chunks:
+        count = count_tokens or _approximate_token_count
+        LLM_TOKENS.labels(kind="completion").inc(count("".join(chunks)))
+
+
+def transform(
+    docs: List[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
+) -> str:
     """
     Build a formatted context string from retrieved document chunks.
 
     Args:
-        docs: List of dicts with 'text' and 'source' keys.
+        docs: List of dicts with 'text' and 'source' keys (and 'rerank_score' when reranked).
+        max_tokens: Optional token budget; when set, chunks are packed by rerank score with
+            sentence-boundary truncation and overlap removal (see context_packer.pack_context).
+        count_tokens: Token counter for the target model, used with max_tokens.
 
     Returns:
         Formatted string with numbered chunks and source metadata.
     """
+    if max_tokens:
+        packed = pack_context(docs, max_tokens, count_tokens)
+        record_context_tokens(packed.tokens_used, packed.tokens_saved)
+        return packed.context
+
     parts = []
     for i, doc in enumerate(docs, start=1):
-        source = doc.get("source", UNKNOWN_SOURCE)
-        text = doc.get("text", "")
-        part = f"[Chunk {i}]\nSource: {source}\nContent:\n{text}"
-        parts.append(part.strip())
-    return "\n\n".join(parts)
+        parts.append(format_chunk(i, doc.get("source", UNKNOWN_SOURCE), doc.get("text", "")))
+    return CHUNK_SEPARATOR.join(parts)
+
+
+def _embed_query(
+    query: str,
+    get_query_embedding: Optional[Callable[[str], List[float]]],
+) -> Optional[List[float]]:
+    """Embed the query once; None if no embedder is configured or the call fails."""
+    if get_query_embedding is None:
+        return None
+    try:
+        with observe_stage(STAGE_EMBED):
+            return get_query_embedding(query)
+    except Exception:
+        return None
+
+
+async def _aembed_query(
+    query: str,
+    get_query_embedding: Optional[Callable[[str], Awaitable[List[float]]]],
+) -> Optional[List[float]]:
+    """Async variant of _embed_query()."""
+    if get_query_embedding is None:
+        return None
+    try:
+        with observe_stage(STAGE_EMBED):
+            return await get_query_embedding(query)
+    except Exception:
+        return None
+
+
+def _cache_usable(semantic_cache: Optional[Any], query_embedding: Optional[List[float]]) -> bool:
+    return bool(semantic_cache and semantic_cache.enabled and query_embedding is not None)
+
+
+def _doc_sources(docs: List[Dict[str, Any]]) -> List[str]:
+    """Distinct source documents behind an answer, recorded so re-ingesting one invalidates it."""
+    return sorted({str(doc["source"]) for doc in docs if doc.get("source")})
+
+
+def _retrieve(db: BaseVectorStore, query: str, query_embedding: Optional[List[float]]) -> List[Dict[str, Any]]:
+    """
+    Hybrid (BM25 + vector) search reusing the precomputed embedding when available; stores
+    without hybrid support do plain vector search.
+    """
+    with observe_stage(STAGE_RETRIEVE):
+        return db.retrieve_hybrid(query, query_embedding, top_k=DEFAULT_RETRIEVAL_TOP_K)
+
+
+async def _aretrieve(
+    db: BaseVectorStore, query: str, query_embedding: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    """Async variant of _retrieve()."""
+    with observe_stage(STAGE_RETRIEVE):
+        return await db.aretrieve_hybrid(query, query_embedding, top_k=DEFAULT_RETRIEVAL_TOP_K)
 
 
 def answer(
@@ -43,32 +157,45 @@ def answer(
     *,
     semantic_cache: Optional[Any] = None,
     get_query_embedding: Optional[Callable[[str], List[float]]] = None,
+    context_max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
 ) -> str:
     """
     Run full RAG pipeline: optional semantic cache check, then retrieve, rerank, build context, generate.
 
     If semantic_cache and get_query_embedding are provided and cache returns a hit (similarity >= threshold),
     the cached response is returned immediately. Otherwise: retrieval -> first rerank -> second (Cohere) rerank -> LLM.
+    When get_query_embedding is provided, the query is embedded once and that vector is reused for retrieval.
     """
-    if semantic_cache and semantic_cache.enabled and get_query_embedding is not None:
+    query_embedding = _embed_query(query, get_query_embedding)
+
+    if _cache_usable(semantic_cache, query_embedding):
         try:
-            query_embedding = get_query_embedding(query)
-            cached = semantic_cache.get(query_embedding)
+            with observe_stage(STAGE_CACHE_GET):
+                cached = semantic_cache.get(query_embedding)
+            record_cache_result(cached is not None)
             if cached is not None:
                 return cached
         except Exception:
             pass
 
-    vec_docs = db.retrieve(query, top_k=DEFAULT_RETRIEVAL_TOP_K)
-    filtered_docs = first_reranker.rerank(query, vec_docs)
-    final_docs = second_reranker.rerank(query, filtered_docs)
-    context = transform(final_docs)
-    response = llm.generate(query, context)
+    vec_docs = _retrieve(db, query, query_embedding)
+    with observe_stage(STAGE_FIRST_RERANK):
+        filtered_docs = first_reranker.rerank(query, vec_docs)
+    with observe_stage(STAGE_SECOND_RERANK):
+        final_docs = second_reranker.rerank(query, filtered_docs)
+    with observe_stage(STAGE_CONTEXT_BUILD):
+        context = transform(final_docs, context_max_tokens, count_tokens)
+    _record_prompt_tokens(query, context, count_tokens)
+    with observe_stage(STAGE_LLM_TOTAL):
+        response = llm.generate(query, context)
+    _record_completion_tokens([response], count_tokens)
 
-    if semantic_cache and semantic_cache.enabled and get_query_embedding is not None:
+    # An answer built on a rerank fallback (first-stage order) is not cached for similar queries.
+    if _cache_usable(semantic_cache, query_embedding) and not is_rerank_fallback(final_docs):
         try:
-            query_embedding = get_query_embedding(query)
-            semantic_cache.set(query_embedding, response)
+            with observe_stage(STAGE_CACHE_SET):
+                semantic_cache.set(query_embedding, response, sources=_doc_sources(final_docs))
         except Exception:
             pass
 
@@ -84,35 +211,302 @@ def answer_stream(
     *,
     semantic_cache: Optional[Any] = None,
     get_query_embedding: Optional[Callable[[str], List[float]]] = None,
+    context_max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
 ) -> Iterator[str]:
     """
     Run RAG pipeline and stream LLM response tokens.
     If semantic cache hits, yields the full cached response as a single chunk then stops.
     Otherwise: retrieval -> rerank -> context -> stream LLM.
     """
-    if semantic_cache and semantic_cache.enabled and get_query_embedding is not None:
+    query_embedding = _embed_query(query, get_query_embedding)
+
+    if _cache_usable(semantic_cache, query_embedding):
         try:
-            query_embedding = get_query_embedding(query)
-            cached = semantic_cache.get(query_embedding)
+            with observe_stage(STAGE_CACHE_GET):
+                cached = semantic_cache.get(query_embedding)
+            record_cache_result(cached is not None)
             if cached is not None:
                 yield cached
                 return
         except Exception:
             pass
 
-    vec_docs = db.retrieve(query, top_k=DEFAULT_RETRIEVAL_TOP_K)
-    filtered_docs = first_reranker.rerank(query, vec_docs)
-    final_docs = second_reranker.rerank(query, filtered_docs)
-    context = transform(final_docs)
+    vec_docs = _retrieve(db, query, query_embedding)
+    with observe_stage(STAGE_FIRST_RERANK):
+        filtered_docs = first_reranker.rerank(query, vec_docs)
+    with observe_stage(STAGE_SECOND_RERANK):
+        final_docs = second_reranker.rerank(query, filtered_docs)
+    with observe_stage(STAGE_CONTEXT_BUILD):
+        context = transform(final_docs, context_max_tokens, count_tokens)
+    _record_prompt_tokens(query, context, count_tokens)
     chunks: List[str] = []
-    for chunk in llm.generate_stream(query, context):
-        chunks.append(chunk)
-        yield chunk
+    with observe_stage(STAGE_LLM_TOTAL):
+        llm_start = time.perf_counter()
+        for chunk in llm.generate_stream(query, context):
+            if not chunks:
+                observe_latency(STAGE_LLM_FIRST_TOKEN, time.perf_counter() - llm_start)
+            chunks.append(chunk)
+            yield chunk
+    _record_completion_tokens(chunks, count_tokens)
 
-    if semantic_cache and semantic_cache.enabled and get_query_embedding is not None:
+    if _cache_usable(semantic_cache, query_embedding) and not is_rerank_fallback(final_docs):
         try:
             full_response = "".join(chunks)
-            query_embedding = get_query_embedding(query)
-            semantic_cache.set(query_embedding, full_response)
+            with observe_stage(STAGE_CACHE_SET):
+                semantic_cache.set(query_embedding, full_response, sources=_doc_sources(final_docs))
         except Exception:
             pass
+
+
+async def _acache_get(semantic_cache: Optional[Any], query_embedding: Optional[List[float]]) -> Optional[str]:
+    """Semantic cache lookup; None on miss, when the cache is unusable, or on error."""
+    if not _cache_usable(semantic_cache, query_embedding):
+        return None
+    try:
+        with observe_stage(STAGE_CACHE_GET):
+            if hasattr(semantic_cache, "aget"):
+                cached = await semantic_cache.aget(query_embedding)
+            else:
+                cached = await asyncio.to_thread(semantic_cache.get, query_embedding)
+        record_cache_result(cached is not None)
+        return cached
+    except Exception:
+        return None
+
+
+async def _acache_set(
+    semantic_cache: Optional[Any],
+    query_embedding: Optional[List[float]],
+    response: str,
+    sources: List[str],
+) -> None:
+    if not _cache_usable(semantic_cache, query_embedding):
+        return
+    try:
+        with observe_stage(STAGE_CACHE_SET):
+            if hasattr(semantic_cache, "set_behind"):
+                # Write-behind: the store runs in the background, off the response path.
+                store = semantic_cache.set_behind(query_embedding, response, sources=sources)
+                if store is not None:
+                    track_answer_store(store)
+            else:
+                await asyncio.to_thread(semantic_cache.set, query_embedding, response, sources=sources)
+    except Exception:
+        pass
+
+
+async def _aretrieve_and_first_rerank(
+    db: BaseVectorStore,
+    first_reranker: BaseReranker,
+    query: str,
+    query_embedding: Optional[List[float]],
+) -> List[Dict[str, Any]]:
+    vec_docs = await _aretrieve(db, query, query_embedding)
+    with observe_stage(STAGE_FIRST_RERANK):
+        return await first_reranker.arerank(query, vec_docs)
+
+
+async def _aretrieval_cache_get(
+    retrieval_cache: Optional[Any],
+    db: BaseVectorStore,
+    query_embedding: Optional[List[float]],
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Reranked docs for a similar earlier query, or None. A hit whose chunks are no longer all in the
+    vector store (reindexed since) counts as a miss.
+    """
+    if not _cache_usable(retrieval_cache, query_embedding):
+        return None
+    try:
+        with observe_stage(STAGE_RETRIEVAL_CACHE_GET):
+            hits = await asyncio.to_thread(retrieval_cache.get_hits, query_embedding)
+            docs = await db.afetch_by_ids([hit.chunk_id for hit in hits]) if hits else []
+        if not hits or len(docs) != len(hits):
+            record_retrieval_cache_result(False)
+            return None
+        for doc, hit in zip(docs, hits):
+            if hit.score is not None:
+                doc["rerank_score"] = hit.score
+        record_retrieval_cache_result(True)
+        return docs
+    except Exception:
+        return None
+
+
+async def _aretrieval_cache_set(
+    retrieval_cache: Optional[Any],
+    query_embedding: Optional[List[float]],
+    docs: List[Dict[str, Any]],
+) -> None:
+    if not _cache_usable(retrieval_cache, query_embedding):
+        return
+    try:
+        with observe_stage(STAGE_RETRIEVAL_CACHE_SET):
+            await asyncio.to_thread(retrieval_cache.set_docs, query_embedding, docs)
+    except Exception:
+        pass
+
+
+def _with_history(context: str, history: str) -> str:
+    return f"{history}\n\n{context}" if history else context
+
+
+async def _acached_answer_or_docs(
+    db: BaseVectorStore,
+    first_reranker: BaseReranker,
+    second_reranker: BaseReranker,
+    query: str,
+    query_embedding: Optional[List[float]],
+    semantic_cache: Optional[Any],
+    retrieval_cache: Optional[Any],
+    speculative_retrieval: bool,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Return (cached_response, []) on an answer-cache hit, else (None, final reranked docs).
+
+    Final docs come from the retrieval cache when a similar query was answered recently, otherwise
+    from retrieval -> first rerank -> second rerank (then written to the retrieval cache, unless
+    the second reranker fell back to first-stage order).
+    With speculative_retrieval, retrieval + first rerank start alongside the cache lookups so they
+    are off the critical path of a miss; the speculative task is cancelled on a hit.
+    """
+    speculative: Optional[asyncio.Task] = None
+    if speculative_retrieval and _cache_usable(semantic_cache, query_embedding):
+        speculative = asyncio.create_task(_aretrieve_and_first_rerank(db, first_reranker, query, query_embedding))
+    try:
+        cached = await _acache_get(semantic_cache, query_embedding)
+        if cached is not None:
+            return cached, []
+        final_docs = await _aretrieval_cache_get(retrieval_cache, db, query_embedding)
+        if final_docs is not None:
+            return None, final_docs
+
+        if speculative is not None:
+            filtered_docs = await speculative
+            record_speculative_retrieval(used=True)
+            speculative = None
+        else:
+            filtered_docs = await _aretrieve_and_first_rerank(db, first_reranker, query, query_embedding)
+        with observe_stage(STAGE_SECOND_RERANK):
+            final_docs = await second_reranker.arerank(query, filtered_docs)
+        # A degraded (first-stage order) result must not be served to similar queries for the TTL.
+        if not is_rerank_fallback(final_docs):
+            await _aretrieval_cache_set(retrieval_cache, query_embedding, final_docs)
+        return None, final_docs
+    finally:
+        if speculative is not None:
+            speculative.cancel()
+            # A task that turns the cancellation into another error would log it as never retrieved.
+            speculative.add_done_callback(lambda t: t.cancelled() or t.exception())
+            record_speculative_retrieval(used=False)
+
+
+async def answer_async(
+    db: BaseVectorStore,
+    llm: BaseLLM,
+    first_reranker: BaseReranker,
+    second_reranker: BaseReranker,
+    query: str,
+    *,
+    semantic_cache: Optional[Any] = None,
+    get_query_embedding: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+    retrieval_cache: Optional[Any] = None,
+    speculative_retrieval: bool = False,
+    context_max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
+    history: str = "",
+) -> str:
+    """
+    Async variant of answer(). get_query_embedding must be an async callable.
+
+    An AsyncSemanticCache is awaited directly and stores write-behind; a synchronous cache's
+    get/set run in a worker thread.
+    On an answer-cache miss, retrieval_cache (RetrievalCache) can supply the reranked docs of a
+    similar earlier query, skipping retrieval and both reranks.
+    With speculative_retrieval, retrieval and first rerank run concurrently with the cache lookup.
+    history (HistoryCompactor block) is put ahead of the retrieved context; the answer then depends
+    on the conversation, so the answer cache is neither read nor written.
+    """
+    if history:
+        semantic_cache = None
+    query_embedding = await _aembed_query(query, get_query_embedding)
+
+    cached, final_docs = await _acached_answer_or_docs(
+        db,
+        first_reranker,
+        second_reranker,
+        query,
+        query_embedding,
+        semantic_cache,
+        retrieval_cache,
+        speculative_retrieval,
+    )
+    if cached is not None:
+        return cached
+
+    with observe_stage(STAGE_CONTEXT_BUILD):
+        context = _with_history(transform(final_docs, context_max_tokens, count_tokens), history)
+    _record_prompt_tokens(query, context, count_tokens)
+    with observe_stage(STAGE_LLM_TOTAL):
+        response = await llm.agenerate(query, context)
+    _record_completion_tokens([response], count_tokens)
+
+    if not is_rerank_fallback(final_docs):
+        await _acache_set(semantic_cache, query_embedding, response, _doc_sources(final_docs))
+    return response
+
+
+async def answer_stream_async(
+    db: BaseVectorStore,
+    llm: BaseLLM,
+    first_reranker: BaseReranker,
+    second_reranker: BaseReranker,
+    query: str,
+    *,
+    semantic_cache: Optional[Any] = None,
+    get_query_embedding: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+    retrieval_cache: Optional[Any] = None,
+    speculative_retrieval: bool = False,
+    context_max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
+    history: str = "",
+) -> AsyncIterator[str]:
+    """
+    Async variant of answer_stream(). get_query_embedding must be an async callable.
+    Tokens are yielded as the LLM produces them, with no thread hop per token.
+    With history, the answer cache is skipped as in answer_async().
+    """
+    if history:
+        semantic_cache = None
+    query_embedding = await _aembed_query(query, get_query_embedding)
+
+    cached, final_docs = await _acached_answer_or_docs(
+        db,
+        first_reranker,
+        second_reranker,
+        query,
+        query_embedding,
+        semantic_cache,
+        retrieval_cache,
+        speculative_retrieval,
+    )
+    if cached is not None:
+        yield cached
+        return
+
+    with observe_stage(STAGE_CONTEXT_BUILD):
+        context = _with_history(transform(final_docs, context_max_tokens, count_tokens), history)
+    _record_prompt_tokens(query, context, count_tokens)
+    chunks: List[str] = []
+    with observe_stage(STAGE_LLM_TOTAL):
+        llm_start = time.perf_counter()
+        async for chunk in llm.agenerate_stream(query, context):
+            if not chunks:
+                observe_latency(STAGE_LLM_FIRST_TOKEN, time.perf_counter() - llm_start)
+            chunks.append(chunk)
+            yield chunk
+    _record_completion_tokens(chunks, count_tokens)
+
+    if not is_rerank_fallback(final_docs):
+        await _acache_set(semantic_cache, query_embedding, "".join(chunks), _doc_sources(final_docs))
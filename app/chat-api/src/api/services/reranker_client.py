@@ -1,13 +1,23 @@
 """
-Reranker implementations: BM25 (local) and Cohere (API).
+Reranker implementations: BM25 (local), corpus-statistics BM25 (local, NumPy), top-k passthrough
+(after hybrid retrieval) and Cohere (API, with an optional (query, chunk) score cache).
 """
-from typing import Any, Dict, List
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import cohere
+import numpy as np
 from rank_bm25 import BM25Okapi
 
 from src.api.services.base_reranker import BaseReranker
 from src.api.core.config import settings
+from src.metrics import record_rerank_score_cache
+from src.rerank_score_cache import RerankScoreCache
+from code_shared.text import BM25Stats, legal_tokenize
 
 
 class BM25Reranker(BaseReranker):
@@ -31,33 +41,238 @@ class BM25Reranker(BaseReranker):
         return [doc for doc, _ in ranked[: self.top_k]]
 
 
+class CorpusBM25Reranker(BaseReranker):
+    """
+    BM25 with document frequencies and average length of the whole corpus (BM25Stats artifact
+    written by ingestion-worker), scored with NumPy over cached token ids.
+
+    Chunks are tokenized with the legal tokenizer once and their term ids cached (keyed by chunk_id,
+    else a text digest); query term ids are LRU-cached. Terms absent from the corpus score zero.
+    """
+
+    def __init__(
+        self,
+        stats: BM25Stats,
+        top_k: int = 5,
+        k1: float = 1.2,
+        b: float = 0.75,
+        doc_cache_size: int = 50_000,
+        query_cache_size: int = 4096,
+    ):
+        self.stats = stats
+        self.top_k = top_k
+        self.k1 = k1
+        self.b = b
+        self._idf = stats.idf()
+        self._avgdl = stats.avgdl or 1.0
+        # key -> (unique known term ids, their counts, document length in tokens)
+        self._doc_cache: "OrderedDict[Any, Tuple[np.ndarray, np.ndarray, int]]" = OrderedDict()
+        self._doc_cache_size = doc_cache_size
+        self._lock = threading.Lock()
+        self._query_pos = np.full(len(stats.vocab), -1, dtype=np.int32)
+        self._score_lock = threading.Lock()
+        self._query_term_ids = lru_cache(maxsize=query_cache_size)(self._query_term_ids_uncached)
+
+    def _term_ids(self, tokens: List[str]) -> np.ndarray:
+        vocab = self.stats.vocab
+        return np.fromiter((vocab.get(t, -1) for t in tokens), dtype=np.int32, count=len(tokens))
+
+    def _query_term_ids_uncached(self, query: str) -> np.ndarray:
+        ids = self._term_ids(legal_tokenize(query))
+        return np.unique(ids[ids >= 0])
+
+    def _doc_term_counts(self, doc: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, int]:
+        text = doc.get("text", "")
+        key = doc.get("chunk_id") or hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._doc_cache.get(key)
+            if cached is not None:
+                self._doc_cache.move_to_end(key)
+                return cached
+        ids = self._term_ids(legal_tokenize(text))
+        term_ids, counts = np.unique(ids[ids >= 0], return_counts=True)
+        entry = (term_ids, counts.astype(np.float32), len(ids))
+        with self._lock:
+            self._doc_cache[key] = entry
+            while len(self._doc_cache) > self._doc_cache_size:
+                self._doc_cache.popitem(last=False)
+        return entry
+
+    def scores(self, query: str, docs: List[Dict[str, Any]]) -> np.ndarray:
+        """BM25 score per doc (float32), in input order."""
+        q_ids = self._query_term_ids(query)
+        if not docs or q_ids.size == 0:
+            return np.zeros(len(docs), dtype=np.float32)
+
+        entries = [self._doc_term_counts(doc) for doc in docs]
+        lengths = np.array([length for _, _, length in entries], dtype=np.float32)
+        ids = np.concatenate([term_ids for term_ids, _, _ in entries])
+        counts = np.concatenate([term_counts for _, term_counts, _ in entries])
+        owner = np.repeat(np.arange(len(docs)), [term_ids.size for term_ids, _, _ in entries])
+
+        # Map term id -> query position through a reusable vocab-sized table (O(1) per doc term).
+        with self._score_lock:
+            self._query_pos[q_ids] = np.arange(q_ids.size, dtype=np.int32)
+            pos = self._query_pos[ids]
+            self._query_pos[q_ids] = -1
+        match = pos >= 0
+        tf = np.bincount(
+            owner[match] * q_ids.size + pos[match], weights=counts[match], minlength=len(docs) * q_ids.size
+        ).reshape(len(docs), q_ids.size).astype(np.float32)
+
+        norm = self.k1 * (1.0 - self.b + self.b * lengths / self._avgdl)
+        weights = tf * (self.k1 + 1.0) / (tf + norm[:, None])
+        return weights @ self._idf[q_ids]
+
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not docs:
+            return []
+        scores = self.scores(query, docs)
+        # Stable sort keeps first-stage order among equal scores.
+        order = np.argsort(-scores, kind="stable")[: self.top_k]
+        return [docs[i] for i in order]
+
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Microseconds of NumPy work; not worth a thread hop.
+        return self.rerank(query, docs)
+
+
+class TopKReranker(BaseReranker):
+    """
+    First stage used with Weaviate hybrid retrieval: results already carry corpus-level BM25 + vector
+    fusion ordering, so only the top_k are kept (no per-request BM25 index).
+    """
+
+    def __init__(self, top_k: int = 5):
+        self.top_k = top_k
+
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return docs[: self.top_k]
+
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.rerank(query, docs)
+
+
 class CohereReranker(BaseReranker):
-    """Cohere API-based reranker."""
+    """
+    Cohere API-based reranker.
+
+    With a score_cache, cached (query, chunk) scores are reused and only the uncached documents are
+    sent to Cohere (all of their scores are requested so they can be cached); cached and fresh
+    scores are merged before top_k is applied. If every candidate is cached, no API call is made.
+    """
 
-    def __init__(self, model: str = settings.COHERE_RERANKER_MODEL, top_k: int = 3):
+    def __init__(
+        self,
+        model: str = settings.COHERE_RERANKER_MODEL,
+        top_k: int = 3,
+        timeout_seconds: Optional[float] = None,
+        score_cache: Optional[RerankScoreCache] = None,
+    ):
         self.api_key = settings.COHERE_API_KEY
         if not self.api_key:
             raise ValueError("Cohere API Key not found. Set COHERE_API_KEY env var.")
 
-        self.client = cohere.ClientV2(self.api_key)
+        # With a deadline, fail fast instead of letting the SDK retry past it.
+        self._client_options: Dict[str, Any] = (
+            {"timeout": timeout_seconds, "max_retries": 0} if timeout_seconds is not None else {}
+        )
+        self.client = cohere.ClientV2(self.api_key, **self._client_options)
+        self._async_client: Optional[cohere.AsyncClientV2] = None
         self.model = model
         self.top_k = top_k
+        self.score_cache = score_cache if score_cache is not None and score_cache.enabled else None
+
+    def _async_client_or_create(self) -> "cohere.AsyncClientV2":
+        if self._async_client is None:
+            self._async_client = cohere.AsyncClientV2(self.api_key, **self._client_options)
+        return self._async_client
 
     def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         if not docs:
             return []
 
         doc_texts = [d.get("text", "") for d in docs]
+        if self.score_cache is None:
+            response = self.client.rerank(
+                model=self.model,
+                query=query,
+                documents=doc_texts,
+                top_n=self.top_k,
+            )
+            return self._apply_results(docs, response.results)
+
+        keys = self.score_cache.keys(self.model, query, doc_texts)
+        scores = self.score_cache.get_many(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        record_rerank_score_cache(hits=len(docs) - len(missing), misses=len(missing))
+        if missing:
+            response = self.client.rerank(
+                model=self.model,
+                query=query,
+                documents=[doc_texts[i] for i in missing],
+                top_n=len(missing),
+            )
+            self.score_cache.set_many(self._merge_fresh(scores, keys, missing, response.results))
+        return self._top_by_score(docs, scores)
 
-        response = self.client.rerank(
-            model=self.model,
-            query=query,
-            documents=doc_texts,
-            top_n=self.top_k,
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not docs:
+            return []
+
+        doc_texts = [d.get("text", "") for d in docs]
+        if self.score_cache is None:
+            response = await self._async_client_or_create().rerank(
+                model=self.model,
+                query=query,
+                documents=doc_texts,
+                top_n=self.top_k,
+            )
+            return self._apply_results(docs, response.results)
+
+        keys = self.score_cache.keys(self.model, query, doc_texts)
+        scores = await asyncio.to_thread(self.score_cache.get_many, keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        record_rerank_score_cache(hits=len(docs) - len(missing), misses=len(missing))
+        if missing:
+            response = await self._async_client_or_create().rerank(
+                model=self.model,
+                query=query,
+                documents=[doc_texts[i] for i in missing],
+                top_n=len(missing),
+            )
+            fresh = self._merge_fresh(scores, keys, missing, response.results)
+            await asyncio.to_thread(self.score_cache.set_many, fresh)
+        return self._top_by_score(docs, scores)
+
+    @staticmethod
+    def _merge_fresh(
+        scores: List[Optional[float]], keys: List[str], missing: List[int], results
+    ) -> Dict[str, float]:
+        """Write fresh scores into `scores` (results index into `missing`); return them by cache key."""
+        fresh: Dict[str, float] = {}
+        for result in results:
+            position = missing[result.index]
+            scores[position] = result.relevance_score
+            fresh[keys[position]] = result.relevance_score
+        return fresh
+
+    def _top_by_score(self, docs: List[Dict[str, Any]], scores: List[Optional[float]]) -> List[Dict[str, Any]]:
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score is not None),
+            key=lambda i: scores[i],
+            reverse=True,
         )
+        final_docs = []
+        for i in ranked[: self.top_k]:
+            docs[i]["rerank_score"] = scores[i]
+            final_docs.append(docs[i])
+        return final_docs
 
+    @staticmethod
+    def _apply_results(docs: List[Dict[str, Any]], results) -> List[Dict[str, Any]]:
         final_docs = []
-        for result in response.results:
+        for result in results:
             original_doc = docs[result.index]
             original_doc["rerank_score"] = result.relevance_score
             final_docs.append(original_doc)
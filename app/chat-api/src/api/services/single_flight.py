@@ -0,0 +1,254 @@
+"""
+Single-flight coalescing of identical concurrent chat queries.
+
+Requests whose normalized query text matches an in-flight request share that execution instead of
+running their own retrieval + rerank + generation: run() callers await the same result, stream()
+subscribers fan out from one token stream (late joiners replay the tokens produced so far).
+
+Across pods, an optional Redis lock (RedisFlightLock) lets one pod compute while the others wait for
+the lock to be released and then run normally. Answers are stored write-behind, so the owning pod
+awaits the store its own flight scheduled (see track_answer_store) before releasing: the waiting pods
+then find the answer in the semantic cache.
+"""
+import asyncio
+import hashlib
+import logging
+import uuid
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import redis
+
+from src.metrics import record_single_flight
+
+logger = logging.getLogger(__name__)
+
+FLIGHT_LOCK_PREFIX = "rag_flight:"
+
+ROLE_LEADER = "leader"
+ROLE_FOLLOWER = "follower"
+ROLE_REMOTE_WAIT = "remote_wait"
+
+# Delete the lock only if it still holds our token (it may have expired and been re-acquired).
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+# Answer stores scheduled by the flight running in the current task (None outside a flight).
+_flight_stores: ContextVar[Optional[List["asyncio.Future"]]] = ContextVar("flight_stores", default=None)
+
+
+def track_answer_store(store: "asyncio.Future") -> None:
+    """Register a write-behind answer store; the flight that scheduled it awaits it before lock release."""
+    stores = _flight_stores.get()
+    if stores is not None:
+        stores.append(store)
+
+
+def flight_key(query: str) -> str:
+    """Hash of the whitespace-collapsed, casefolded query."""
+    normalized = " ".join(query.split()).casefold()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RedisFlightLock:
+    """
+    Cross-pod flight lock: SET NX PX per query key, released with a compare-and-delete.
+    Soft-fails: if Redis is unreachable, every pod just computes its own answer.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: float = 120.0,
+        wait_seconds: float = 30.0,
+        poll_interval_seconds: float = 0.05,
+    ) -> None:
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._client: Optional[redis.Redis] = None
+
+    def _client_or_create(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.from_url(self.redis_url, decode_responses=False)
+        return self._client
+
+    def _acquire(self, key: str, token: str) -> bool:
+        ttl_ms = int(self.ttl_seconds * 1000)
+        return bool(self._client_or_create().set(FLIGHT_LOCK_PREFIX + key, token, nx=True, px=ttl_ms))
+
+    def _held(self, key: str) -> bool:
+        return bool(self._client_or_create().exists(FLIGHT_LOCK_PREFIX + key))
+
+    def _release(self, key: str, token: str) -> None:
+        self._client_or_create().eval(_RELEASE_SCRIPT, 1, FLIGHT_LOCK_PREFIX + key, token)
+
+    async def acquire(self, key: str) -> Optional[str]:
+        """Lock token if this pod now owns the key, None if another pod does (or Redis failed)."""
+        token = uuid.uuid4().hex
+        try:
+            return token if await asyncio.to_thread(self._acquire, key, token) else None
+        except Exception as e:
+            logger.warning("Flight lock acquire failed: %s", e)
+            return None
+
+    async def wait_released(self, key: str) -> None:
+        """Wait (up to wait_seconds) for another pod to release the key."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_seconds
+        try:
+            while loop.time() < deadline and await asyncio.to_thread(self._held, key):
+                await asyncio.sleep(self.poll_interval_seconds)
+        except Exception as e:
+            logger.warning("Flight lock wait failed: %s", e)
+
+    async def release(self, key: str, token: str) -> None:
+        try:
+            await asyncio.to_thread(self._release, key, token)
+        except Exception as e:
+            logger.warning("Flight lock release failed: %s", e)
+
+    def close(self) -> None:
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+            self._client = None
+
+
+class _StreamFlight:
+    """One shared token stream: tokens so far, completion state and live subscriber count."""
+
+    def __init__(self) -> None:
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        updated, self.updated = self.updated, asyncio.Event()
+        updated.set()
+
+
+class SingleFlight:
+    """In-process single-flight groups for answers (run) and token streams (stream)."""
+
+    def __init__(
+        self,
+        lock: Optional[RedisFlightLock] = None,
+        settle_timeout_seconds: float = 5.0,
+    ) -> None:
+        self.lock = lock
+        self.settle_timeout_seconds = settle_timeout_seconds
+        self._calls: Dict[str, "asyncio.Task[str]"] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+
+    async def run(self, query: str, fn: Callable[[], Awaitable[str]]) -> str:
+        """Result of fn(), shared with every concurrent run() for the same query."""
+        key = flight_key(query)
+        task = self._calls.get(key)
+        if task is None:
+            record_single_flight(ROLE_LEADER)
+            task = asyncio.create_task(self._locked_call(key, fn))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            record_single_flight(ROLE_FOLLOWER)
+        # A caller going away must not cancel the shared execution.
+        return await asyncio.shield(task)
+
+    async def stream(self, query: str, make_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Tokens of make_stream(), fanned out to every concurrent stream() for the same query."""
+        key = flight_key(query)
+        flight = self._streams.get(key)
+        if flight is None:
+            record_single_flight(ROLE_LEADER)
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.task = asyncio.create_task(self._pump(key, flight, make_stream))
+        else:
+            record_single_flight(ROLE_FOLLOWER)
+
+        flight.subscribers += 1
+        try:
+            position = 0
+            while True:
+                while position < len(flight.tokens):
+                    yield flight.tokens[position]
+                    position += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.updated.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                # Everyone left: stop generating, as a single request's disconnect would.
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+                flight.task.cancel()
+
+    async def _locked_call(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        stores: List[asyncio.Future] = []
+        _flight_stores.set(stores)
+        token = await self._acquire_remote(key)
+        try:
+            return await fn()
+        finally:
+            if token is not None:
+                await self._release_remote(key, token, stores)
+
+    async def _pump(self, key: str, flight: _StreamFlight, make_stream: Callable[[], AsyncIterator[str]]) -> None:
+        token = None
+        stores: List[asyncio.Future] = []
+        _flight_stores.set(stores)
+        try:
+            token = await self._acquire_remote(key)
+            async for chunk in make_stream():
+                flight.tokens.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.notify()
+            if token is not None:
+                await self._release_remote(key, token, stores)
+
+    async def _acquire_remote(self, key: str) -> Optional[str]:
+        """Own the cross-pod lock, or wait for the owning pod to finish (then compute from cache)."""
+        if self.lock is None:
+            return None
+        token = await self.lock.acquire(key)
+        if token is None:
+            record_single_flight(ROLE_REMOTE_WAIT)
+            await self.lock.wait_released(key)
+        return token
+
+    async def _release_remote(self, key: str, token: str, stores: List["asyncio.Future"]) -> None:
+        """Release the cross-pod lock once this flight's answer is stored, so waiting pods hit the cache."""
+        if stores:
+            # Bounded wait, no cancel: a slow store still lands, the waiting pods just may miss it.
+            _, still_pending = await asyncio.wait(stores, timeout=self.settle_timeout_seconds)
+            if still_pending:
+                logger.warning("Answer store still pending at lock release")
+        await self.lock.release(key, token)
+
+    def close(self) -> None:
+        if self.lock is not None:
+            self.lock.close()
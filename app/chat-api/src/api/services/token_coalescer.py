@@ -0,0 +1,103 @@
+"""
+Coalesce streamed LLM deltas into fewer WebSocket frames.
+
+The first delta of a stream is sent immediately. After that, deltas are sent at most once per
+max_latency window (leading edge: a delta arriving after a quiet window goes out at once) or as soon
+as the pending text reaches max_bytes. Concatenating the batched deltas keeps the "chunk" frame
+protocol unchanged; clients just see fewer, larger chunks.
+"""
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[str],
+    max_latency_seconds: float,
+    max_bytes: int,
+) -> AsyncIterator[str]:
+    """
+    Yield batches of tokens, each delayed at most max_latency_seconds after its first delta.
+
+    Args:
+        tokens: Source token stream.
+        max_latency_seconds: Coalescing window; 0 or less passes tokens through unchanged.
+        max_bytes: Flush as soon as the pending UTF-8 text reaches this size (0 = no size limit).
+    """
+    if max_latency_seconds <= 0:
+        async for token in tokens:
+            yield token
+        return
+
+    loop = asyncio.get_running_loop()
+    # The source is pumped by its own task so a flush deadline can interrupt the wait for the next
+    # token without cancelling the source generator itself.
+    queue: "asyncio.Queue[object]" = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for token in tokens:
+                queue.put_nowait(token)
+        except Exception as e:
+            queue.put_nowait(_Failure(e))
+        finally:
+            queue.put_nowait(_DONE)
+
+    pump_task = asyncio.create_task(pump())
+    pending: List[str] = []
+    pending_bytes = 0
+    last_flush: Optional[float] = None
+
+    def take() -> str:
+        nonlocal pending_bytes, last_flush
+        batch = "".join(pending)
+        pending.clear()
+        pending_bytes = 0
+        last_flush = loop.time()
+        return batch
+
+    try:
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(last_flush + max_latency_seconds - loop.time(), 0.0)
+            try:
+                async with asyncio.timeout(timeout):
+                    item = await queue.get()
+            except TimeoutError:
+                yield take()
+                continue
+
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                if pending:
+                    yield take()
+                raise item.error
+
+            token = item
+            if not token:
+                continue
+            pending.append(token)
+            pending_bytes += len(token.encode("utf-8"))
+            window_elapsed = last_flush is None or loop.time() - last_flush >= max_latency_seconds
+            if window_elapsed or (max_bytes > 0 and pending_bytes >= max_bytes):
+                yield take()
+
+        if pending:
+            yield take()
+    finally:
+        if not pump_task.done():
+            pump_task.cancel()
+            try:
+                await pump_task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,96 @@
+"""
+Per-pod cache of active sessions' recent messages (chat-api).
+
+ChatMemoryService reads a session's tail from here before going to the store. An entry is created
+from a store read and kept coherent by appending every message this pod persists for the session,
+so each later turn of an active conversation is served without a database round trip. Entries are
+LRU-bounded per pod and expire after ttl_seconds, which bounds staleness when another pod appends
+to the same session.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, List, Optional, Set
+
+from .models import ChatMessageRecord
+
+
+@dataclass
+class _Entry:
+    messages: Deque[ChatMessageRecord]
+    # True while messages hold the session's whole history (nothing older was trimmed or unread).
+    complete: bool
+    # Expiry is set by the store read only, so appends never extend how stale an entry can get.
+    expires_at: float
+    timestamps: Set[datetime]
+
+
+class RecentMessagesCache:
+    """LRU map of session_id -> the session's last max_messages messages, oldest first."""
+
+    def __init__(self, max_sessions: int = 1024, max_messages: int = 50, ttl_seconds: float = 300.0) -> None:
+        if max_sessions <= 0 or max_messages <= 0:
+            raise ValueError("max_sessions and max_messages must be > 0")
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, limit: int) -> Optional[List[ChatMessageRecord]]:
+        """The last `limit` messages, or None when the entry is missing, expired or too short."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                del self._entries[session_id]
+                return None
+            if len(entry.messages) < limit and not entry.complete:
+                return None
+            self._entries.move_to_end(session_id)
+            messages = list(entry.messages)
+            return messages[-limit:] if limit < len(messages) else messages
+
+    def put(self, session_id: str, messages: List[ChatMessageRecord], complete: bool) -> None:
+        """Cache a tail read from the store; complete means it holds the whole session."""
+        tail = messages[-self.max_messages :]
+        entry = _Entry(
+            messages=deque(tail, maxlen=self.max_messages),
+            complete=complete and len(tail) == len(messages),
+            expires_at=time.monotonic() + self.ttl_seconds,
+            timestamps={m.timestamp for m in tail},
+        )
+        with self._lock:
+            self._entries[session_id] = entry
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def append(self, messages: List[ChatMessageRecord]) -> None:
+        """Add newly persisted messages to the entries of sessions already cached."""
+        with self._lock:
+            for msg in messages:
+                entry = self._entries.get(msg.session_id)
+                if entry is None or msg.timestamp in entry.timestamps:
+                    continue
+                if entry.messages and msg.timestamp < entry.messages[-1].timestamp:
+                    # Out of order (e.g. a replayed write): the tail can no longer be trusted.
+                    del self._entries[msg.session_id]
+                    continue
+                if len(entry.messages) == self.max_messages:
+                    evicted = entry.messages[0]
+                    entry.timestamps.discard(evicted.timestamp)
+                    entry.complete = False
+                entry.messages.append(msg)
+                entry.timestamps.add(msg.timestamp)
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,5 +1,7 @@
+"""Chat memory storage and service interfaces."""
+
 from datetime import datetime
-from typing import Literal
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -11,5 +13,30 @@ class ChatMessageRecord(BaseModel):
     role: Literal["user", "assistant"]
     content: str
     timestamp: datetime
+    # Owner of the session; set when the session should appear in that user's session list.
+    user_id: Optional[str] = None
+
+
+class ChatSessionSummary(BaseModel):
+    """One entry of a user's session list."""
+
+    session_id: str
+    updated_at: datetime
+    title: str = ""
+    preview: str = ""
 
 
+class ChatSessionPage(BaseModel):
+    """A page of a user's sessions, most recently updated first."""
+
+    sessions: List[ChatSessionSummary]
+    next_page_token: Optional[str] = None
+
+
+class SessionSummary(BaseModel):
+    """Rolling summary of a session's older turns, used when compacting history for prompts."""
+
+    session_id: str
+    text: str
+    # Timestamp of the newest message folded into text; later messages are not summarized yet.
+    covered_until: datetime
@@ -1,43 +1,209 @@
 """Chat memory service helpers."""
-from datetime import datetime
-from typing import List
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
-from .models import ChatMessageRecord
+from src.metrics import record_chat_memory_cache_result
+
+from .cache import RecentMessagesCache
+from .models import ChatMessageRecord, ChatSessionPage, SessionSummary
 from .store import ChatMemoryStore
+from .write_behind import ChatMemoryWriteBehind
+
+# messages is keyed by (session_id, timestamp) at millisecond precision, so message timestamps
+# are whole milliseconds and strictly increasing within the process: no two rows of a session
+# written here overwrite each other, and history order matches append order.
+_TICK = timedelta(milliseconds=1)
+_clock_lock = threading.Lock()
+_last_timestamp = datetime.min
 
 
 class ChatMemoryService:
-    """High-level operations for chat memory."""
+    """High-level operations for chat memory.
 
-    def __init__(self, store: ChatMemoryStore) -> None:
+    With a write_behind queue, aappend_exchange() only enqueues the exchange; aget_context()
+    still sees it because unwritten messages of the session are merged into the result.
+    With a recent_cache, context reads of sessions active on this pod are answered from memory;
+    every exchange appended here is added to the session's cached tail, and the TTL bounds how long
+    an append made on another pod can go unseen. With validate_cache, a cached tail is also checked
+    against the session's latest timestamp in the store before use (one single-row read per hit).
+    """
+
+    def __init__(
+        self,
+        store: ChatMemoryStore,
+        write_behind: Optional[ChatMemoryWriteBehind] = None,
+        recent_cache: Optional[RecentMessagesCache] = None,
+        validate_cache: bool = False,
+    ) -> None:
         self._store = store
+        self._write_behind = write_behind
+        self._recent_cache = recent_cache
+        self.validate_cache = validate_cache
 
     def list_sessions(self, limit: int = 50) -> List[str]:
         return self._store.list_sessions(limit=limit)
 
+    def list_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        return self._store.list_user_sessions(user_id, limit=limit, page_token=page_token)
+
     def get_context(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
-        return self._store.get_recent_messages(session_id, limit=limit)
+        if self._recent_cache is not None:
+            cached = self._recent_cache.get(session_id, limit)
+            if cached is not None and self.validate_cache:
+                cached = self._current(session_id, cached, self._store.get_latest_timestamp(session_id))
+            record_chat_memory_cache_result(cached is not None)
+            if cached is not None:
+                return cached
+        records = self._store.get_recent_messages(session_id, limit=limit)
+        return self._remember(session_id, records, limit)
 
     def append_exchange(
         self,
         session_id: str,
         user_message: str,
         assistant_message: str,
+        user_id: Optional[str] = None,
     ) -> None:
-        now = datetime.now()
-        records = [
-            ChatMessageRecord(
-                session_id=session_id,
-                role="user",
-                content=user_message,
-                timestamp=now,
-            ),
-            ChatMessageRecord(
-                session_id=session_id,
-                role="assistant",
-                content=assistant_message,
-                timestamp=now,
-            ),
-        ]
+        records = _exchange(session_id, user_message, assistant_message, user_id)
         self._store.append_messages(records)
+        if self._recent_cache is not None:
+            self._recent_cache.append(records)
+
+    async def alist_sessions(self, limit: int = 50) -> List[str]:
+        return await self._store.alist_sessions(limit=limit)
+
+    async def alist_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        return await self._store.alist_user_sessions(user_id, limit=limit, page_token=page_token)
+
+    async def aget_context(
+        self,
+        session_id: str,
+        limit: int = 20,
+        read_through: bool = False,
+    ) -> List[ChatMessageRecord]:
+        """Recent messages, oldest first; read_through skips the cache (and refills it)."""
+        if self._recent_cache is not None and not read_through:
+            cached = self._recent_cache.get(session_id, limit)
+            if cached is not None and self.validate_cache:
+                cached = self._current(session_id, cached, await self._store.aget_latest_timestamp(session_id))
+            record_chat_memory_cache_result(cached is not None)
+            if cached is not None:
+                return cached
+        records = await self._store.aget_recent_messages(session_id, limit=limit)
+        return self._remember(session_id, records, limit)
+
+    async def aappend_exchange(
+        self,
+        session_id: str,
+        user_message: str,
+        assistant_message: str,
+        user_id: Optional[str] = None,
+    ) -> None:
+        records = _exchange(session_id, user_message, assistant_message, user_id)
+        if self._write_behind is not None:
+            self._write_behind.submit(records)
+        else:
+            await self._store.aappend_messages(records)
+        if self._recent_cache is not None:
+            self._recent_cache.append(records)
+
+    async def aget_summary(self, session_id: str) -> Optional[SessionSummary]:
+        return await self._store.aget_summary(session_id)
+
+    async def aput_summary(self, summary: SessionSummary) -> bool:
+        """Store summary; False if the stored one already covers later turns (it is kept)."""
+        return await self._store.aput_summary(summary)
+
+    def _current(
+        self,
+        session_id: str,
+        cached: List[ChatMessageRecord],
+        latest: Optional[datetime],
+    ) -> Optional[List[ChatMessageRecord]]:
+        """cached, or None (and the entry dropped) if the store has messages newer than its tail."""
+        if latest is not None and (not cached or latest > cached[-1].timestamp):
+            self._recent_cache.invalidate(session_id)
+            return None
+        return cached
+
+    def _remember(
+        self,
+        session_id: str,
+        records: List[ChatMessageRecord],
+        limit: int,
+    ) -> List[ChatMessageRecord]:
+        """Merge unwritten messages into a store read and cache the resulting tail."""
+        # Fewer rows than asked for means the read returned the whole session.
+        complete = len(records) < limit
+        if self._write_behind is not None:
+            pending = self._write_behind.pending_messages(session_id)
+            if pending:
+                stored = {m.timestamp for m in records}
+                merged = sorted(
+                    records + [m for m in pending if m.timestamp not in stored],
+                    key=lambda m: m.timestamp,
+                )
+                complete = complete and len(merged) <= limit
+                records = merged[-limit:]
+        if self._recent_cache is not None:
+            self._recent_cache.put(session_id, records, complete=complete)
+        return records
+
+    def start(self) -> None:
+        """Start the write-behind flusher (call from a running event loop)."""
+        if self._write_behind is not None:
+            self._write_behind.start()
+
+    async def aclose(self, timeout_seconds: float = 5.0) -> None:
+        """Drain queued writes; close the store if it has a close() method."""
+        if self._write_behind is not None:
+            await self._write_behind.aclose(timeout_seconds)
+        close_fn = getattr(self._store, "close", None)
+        if callable(close_fn):
+            close_fn()
+
+
+def _exchange_timestamps() -> Tuple[datetime, datetime]:
+    global _last_timestamp
+    now = datetime.now()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    with _clock_lock:
+        user_at = max(now, _last_timestamp + _TICK)
+        _last_timestamp = user_at + _TICK
+        return user_at, _last_timestamp
+
 
+def _exchange(
+    session_id: str,
+    user_message: str,
+    assistant_message: str,
+    user_id: Optional[str],
+) -> List[ChatMessageRecord]:
+    user_at, assistant_at = _exchange_timestamps()
+    return [
+        ChatMessageRecord(
+            session_id=session_id,
+            role="user",
+            content=user_message,
+            timestamp=user_at,
+            user_id=user_id,
+        ),
+        ChatMessageRecord(
+            session_id=session_id,
+            role="assistant",
+            content=assistant_message,
+            timestamp=assistant_at,
+            user_id=user_id,
+        ),
+    ]
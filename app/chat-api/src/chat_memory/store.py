@@ -1,11 +1,115 @@
 """Chat memory store implementations."""
 from __future__ import annotations
 
-from collections import defaultdict
+import asyncio
+import base64
+import binascii
+import bisect
+import calendar
+import json
+import logging
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Dict, List
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
 
-from .models import ChatMessageRecord
+from .models import ChatMessageRecord, ChatSessionPage, ChatSessionSummary, SessionSummary
+
+logger = logging.getLogger(__name__)
+
+# Session list entries carry a title (first user message) and a preview (latest message).
+_TITLE_CHARS = 80
+_PREVIEW_CHARS = 160
+
+
+def encode_page_token(updated_at: datetime, session_id: str) -> str:
+    """Opaque cursor: the (updated_at, session_id) of the last session on the previous page."""
+    payload = json.dumps({"u": updated_at.isoformat(), "s": session_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_token(token: str) -> Tuple[datetime, str]:
+    """Inverse of encode_page_token; raises ValueError for a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        return datetime.fromisoformat(payload["u"]), str(payload["s"])
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError("invalid page token") from None
+
+
+def _snippet(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[: max_chars - 1].rstrip() + "…"
+
+
+def _by_session(messages: List[ChatMessageRecord]) -> Dict[str, List[ChatMessageRecord]]:
+    grouped: Dict[str, List[ChatMessageRecord]] = defaultdict(list)
+    for msg in messages:
+        grouped[msg.session_id].append(msg)
+    return grouped
+
+
+def _owner(messages: List[ChatMessageRecord]) -> Optional[str]:
+    return next((msg.user_id for msg in messages if msg.user_id), None)
+
+
+def _summarize(
+    session_id: str,
+    messages: List[ChatMessageRecord],
+    previous_title: Optional[str],
+) -> ChatSessionSummary:
+    latest = max(messages, key=lambda m: m.timestamp)
+    first_user = next((m for m in messages if m.role == "user"), messages[0])
+    return ChatSessionSummary(
+        session_id=session_id,
+        updated_at=latest.timestamp,
+        title=previous_title or _snippet(first_user.content, _TITLE_CHARS),
+        preview=_snippet(latest.content, _PREVIEW_CHARS),
+    )
+
+
+def _stale_rows(rows: Iterable[Any]) -> List[Any]:
+    """Index rows (in updated_at DESC order) of sessions already listed under a newer row."""
+    seen = set()
+    stale = []
+    for row in rows:
+        if row.session_id in seen:
+            stale.append(row)
+        seen.add(row.session_id)
+    return stale
+
+
+def _page(rows: Iterable[Any], limit: int) -> ChatSessionPage:
+    """Build a page from up to limit + 1 rows in (updated_at, session_id) DESC order.
+
+    A session has two index rows when two appends raced from the same previous row (each deletes
+    that row and inserts its own). Only the newest row is listed; the Cassandra store deletes the
+    older one when it sees both. The extra row tells whether another page exists.
+    """
+    rows = list(rows)
+    sessions: List[ChatSessionSummary] = []
+    seen = set()
+    last = None
+    for row in rows:
+        if len(sessions) >= limit:
+            break
+        last = row
+        if row.session_id in seen:
+            continue
+        seen.add(row.session_id)
+        sessions.append(
+            ChatSessionSummary(
+                session_id=row.session_id,
+                updated_at=row.updated_at,
+                title=row.title or "",
+                preview=row.preview or "",
+            )
+        )
+    next_page_token = None
+    if len(rows) > limit and last is not None:
+        next_page_token = encode_page_token(last.updated_at, last.session_id)
+    return ChatSessionPage(sessions=sessions, next_page_token=next_page_token)
 
 
 class ChatMemoryStore:
@@ -15,36 +119,226 @@ class ChatMemoryStore:
         """Return session ids, most recently updated first."""
         raise NotImplementedError
 
+    def list_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        """Return one page of user_id's sessions, most recently updated first."""
+        raise NotImplementedError
+
     def get_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
         raise NotImplementedError
 
     def append_messages(self, messages: List[ChatMessageRecord]) -> None:
         raise NotImplementedError
 
+    def get_latest_timestamp(self, session_id: str) -> Optional[datetime]:
+        """Return the timestamp of the session's newest stored message (None if it has none)."""
+        raise NotImplementedError
+
+    def get_summary(self, session_id: str) -> Optional[SessionSummary]:
+        """Return the session's rolling history summary, if one was stored."""
+        raise NotImplementedError
+
+    def put_summary(self, summary: SessionSummary) -> bool:
+        """Store summary unless the stored one already covers later turns; return whether it was stored."""
+        raise NotImplementedError
+
+    # Async variants used from request handlers. The defaults run the sync call in a worker
+    # thread; stores with a native async client override them.
+
+    async def alist_sessions(self, limit: int = 50) -> List[str]:
+        return await asyncio.to_thread(self.list_sessions, limit)
+
+    async def alist_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        return await asyncio.to_thread(self.list_user_sessions, user_id, limit, page_token)
+
+    async def aget_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
+        return await asyncio.to_thread(self.get_recent_messages, session_id, limit)
+
+    async def aappend_messages(self, messages: List[ChatMessageRecord]) -> None:
+        await asyncio.to_thread(self.append_messages, messages)
+
+    async def aget_latest_timestamp(self, session_id: str) -> Optional[datetime]:
+        return await asyncio.to_thread(self.get_latest_timestamp, session_id)
+
+    async def aget_summary(self, session_id: str) -> Optional[SessionSummary]:
+        return await asyncio.to_thread(self.get_summary, session_id)
+
+    async def aput_summary(self, summary: SessionSummary) -> bool:
+        return await asyncio.to_thread(self.put_summary, summary)
+
 
 class InMemoryChatMemoryStore(ChatMemoryStore):
-    """Simple in-memory implementation for tests and local dev."""
+    """Simple in-memory implementation for tests and local dev.
+
+    Each session is a ring buffer of its last max_messages_per_session messages in timestamp
+    order, so a recent-history read walks only the tail.
+    """
 
-    def __init__(self) -> None:
-        self._data: Dict[str, List[ChatMessageRecord]] = defaultdict(list)
+    def __init__(self, max_messages_per_session: int = 1000) -> None:
+        self.max_messages_per_session = max_messages_per_session
+        self._data: Dict[str, Deque[ChatMessageRecord]] = defaultdict(
+            lambda: deque(maxlen=max_messages_per_session)
+        )
+        self._user_sessions: Dict[str, Dict[str, ChatSessionSummary]] = defaultdict(dict)
+        self._summaries: Dict[str, SessionSummary] = {}
 
     def list_sessions(self, limit: int = 50) -> List[str]:
         # No ordering by updated_at; return keys
         return list(self._data.keys())[-limit:]
 
+    def list_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        entries = sorted(
+            self._user_sessions.get(user_id, {}).values(),
+            key=lambda s: (s.updated_at, s.session_id),
+            reverse=True,
+        )
+        if page_token is not None:
+            cursor = decode_page_token(page_token)
+            entries = [s for s in entries if (s.updated_at, s.session_id) < cursor]
+        return _page(entries[: limit + 1], limit)
+
     def get_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
-        items = self._data.get(session_id, [])
-        return sorted(items, key=lambda m: m.timestamp)[-limit:]
+        ring = self._data.get(session_id)
+        if not ring:
+            return []
+        tail = list(islice(reversed(ring), limit))
+        tail.reverse()
+        return tail
 
     def append_messages(self, messages: List[ChatMessageRecord]) -> None:
         for msg in messages:
-            self._data[msg.session_id].append(msg)
+            ring = self._data[msg.session_id]
+            if not ring or ring[-1].timestamp <= msg.timestamp:
+                ring.append(msg)
+                continue
+            # Late arrival (e.g. a replayed write): keep the ring in timestamp order.
+            ordered = list(ring)
+            ordered.insert(bisect.bisect_right([m.timestamp for m in ordered], msg.timestamp), msg)
+            ring.clear()
+            ring.extend(ordered)
+        for session_id, session_messages in _by_session(messages).items():
+            user_id = _owner(session_messages)
+            if user_id is None:
+                continue
+            previous = self._user_sessions[user_id].get(session_id)
+            summary = _summarize(session_id, session_messages, previous.title if previous else None)
+            # A replayed older write must not move the session back in the listing.
+            if previous is not None and previous.updated_at > summary.updated_at:
+                continue
+            self._user_sessions[user_id][session_id] = summary
+
+    def get_latest_timestamp(self, session_id: str) -> Optional[datetime]:
+        ring = self._data.get(session_id)
+        return ring[-1].timestamp if ring else None
+
+    def get_summary(self, session_id: str) -> Optional[SessionSummary]:
+        return self._summaries.get(session_id)
+
+    def put_summary(self, summary: SessionSummary) -> bool:
+        previous = self._summaries.get(summary.session_id)
+        if previous is not None and previous.covered_until > summary.covered_until:
+            return False
+        self._summaries[summary.session_id] = summary
+        return True
+
+    # Dict operations never block, so the async variants skip the thread hop.
+
+    async def alist_sessions(self, limit: int = 50) -> List[str]:
+        return self.list_sessions(limit)
+
+    async def alist_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        return self.list_user_sessions(user_id, limit, page_token)
+
+    async def aget_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
+        return self.get_recent_messages(session_id, limit)
+
+    async def aappend_messages(self, messages: List[ChatMessageRecord]) -> None:
+        self.append_messages(messages)
+
+    async def aget_latest_timestamp(self, session_id: str) -> Optional[datetime]:
+        return self.get_latest_timestamp(session_id)
+
+    async def aget_summary(self, session_id: str) -> Optional[SessionSummary]:
+        return self.get_summary(session_id)
+
+    async def aput_summary(self, summary: SessionSummary) -> bool:
+        return self.put_summary(summary)
 
 
 try:
     from cassandra.cluster import Cluster  # type: ignore[import]
+    from cassandra.query import BatchStatement, BatchType  # type: ignore[import]
 except ImportError:  # pragma: no cover - driver not installed in some environments
     Cluster = None  # type: ignore[assignment]
+    BatchStatement = BatchType = None  # type: ignore[assignment]
+
+
+def _to_asyncio(response_future: Any) -> "asyncio.Future[Any]":
+    """Wrap a driver ResponseFuture; its callbacks fire on the driver's event thread."""
+    loop = asyncio.get_running_loop()
+    future: "asyncio.Future[Any]" = loop.create_future()
+
+    def _set_result(rows: Any) -> None:
+        if not future.done():
+            future.set_result(rows)
+
+    def _set_exception(exc: BaseException) -> None:
+        if not future.done():
+            future.set_exception(exc)
+
+    def _on_rows(rows: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(_set_result, rows)
+        except RuntimeError:  # pragma: no cover - loop closed during shutdown
+            pass
+
+    def _on_error(exc: BaseException) -> None:
+        try:
+            loop.call_soon_threadsafe(_set_exception, exc)
+        except RuntimeError:  # pragma: no cover - loop closed during shutdown
+            pass
+
+    response_future.add_callbacks(_on_rows, _on_error)
+    return future
+
+
+def _applied(rows: Any) -> bool:
+    """Whether a conditional (IF ...) statement applied; its result row carries [applied]."""
+    row = next(iter(rows), None)
+    return bool(getattr(row, "applied", False))
+
+
+def _write_time(updated_at: datetime) -> int:
+    """Cell timestamp (microseconds since the epoch) for updated_at; naive values are UTC, as in the driver."""
+    return calendar.timegm(updated_at.utctimetuple()) * 1_000_000 + updated_at.microsecond
+
+
+def _record(row: Any) -> ChatMessageRecord:
+    return ChatMessageRecord(
+        session_id=row.session_id,
+        timestamp=row.timestamp,
+        role=row.role,
+        content=row.content,
+    )
 
 
 class CassandraChatMemoryStore(ChatMemoryStore):
@@ -59,6 +353,27 @@ class CassandraChatMemoryStore(ChatMemoryStore):
             content text,
             PRIMARY KEY (session_id, timestamp)
         ) WITH CLUSTERING ORDER BY (timestamp ASC);
+
+        CREATE TABLE IF NOT EXISTS chat_memory.sessions_by_user (
+            user_id text,
+            updated_at timestamp,
+            session_id text,
+            title text,
+            preview text,
+            PRIMARY KEY (user_id, updated_at, session_id)
+        ) WITH CLUSTERING ORDER BY (updated_at DESC, session_id DESC);
+
+    Statements are prepared once at startup. An append writes one UNLOGGED batch per
+    session (its messages, plus the sessions upsert for a session without an owner), and
+    the async methods await execute_async() futures instead of blocking the event loop.
+    Sessions with an owner also move their sessions_by_user row (delete old updated_at,
+    insert new) in a second single-partition batch, sent concurrently, so listing a user's
+    sessions is one partition slice. Session and index writes carry updated_at as their cell
+    timestamp (USING TIMESTAMP): a replayed older write loses to newer data and cannot bring a
+    deleted index row back. Two appends racing from the same previous row leave two index rows;
+    listing keeps the newest and deletes the other. Summaries are
+    written conditionally too (IF covered_until <= <the new value>), so a fold computed from an
+    older view of the session never replaces a summary that covers later turns.
     """
 
     def __init__(self, contact_points: str = "cassandra:9042", keyspace: str = "chat_memory") -> None:
@@ -69,6 +384,7 @@ class CassandraChatMemoryStore(ChatMemoryStore):
         self._session = self._cluster.connect()
         self._ensure_schema(keyspace)
         self._session.set_keyspace(keyspace)
+        self._prepare_statements()
 
     def _ensure_schema(self, keyspace: str) -> None:
         self._session.execute(
@@ -92,44 +408,273 @@ class CassandraChatMemoryStore(ChatMemoryStore):
             """
             CREATE TABLE IF NOT EXISTS chat_memory.sessions (
                 session_id text PRIMARY KEY,
-                updated_at timestamp
+                updated_at timestamp,
+                title text
+            )
+            """
+        )
+        self._session.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_memory.sessions_by_user (
+                user_id text,
+                updated_at timestamp,
+                session_id text,
+                title text,
+                preview text,
+                PRIMARY KEY (user_id, updated_at, session_id)
+            ) WITH CLUSTERING ORDER BY (updated_at DESC, session_id DESC)
+            """
+        )
+        self._session.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_memory.session_summaries (
+                session_id text PRIMARY KEY,
+                summary text,
+                covered_until timestamp
             )
             """
         )
+        # sessions tables created before titles existed lack the column.
+        sessions = self._cluster.metadata.keyspaces["chat_memory"].tables["sessions"]
+        if "title" not in sessions.columns:
+            self._session.execute("ALTER TABLE chat_memory.sessions ADD title text")
 
-    def list_sessions(self, limit: int = 50) -> List[str]:
-        rows = self._session.execute(
-            "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT %s",
-            (limit,),
+    def _prepare_statements(self) -> None:
+        self._insert_message = self._session.prepare(
+            "INSERT INTO messages (session_id, timestamp, role, content) VALUES (?, ?, ?, ?)"
+        )
+        # Written with updated_at as the cell timestamp: an older (replayed) write loses to a newer one.
+        self._upsert_session = self._session.prepare(
+            "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) USING TIMESTAMP ?"
+        )
+        self._upsert_titled_session = self._session.prepare(
+            "INSERT INTO sessions (session_id, updated_at, title) VALUES (?, ?, ?) USING TIMESTAMP ?"
+        )
+        self._select_session = self._session.prepare(
+            "SELECT updated_at, title FROM sessions WHERE session_id=?"
+        )
+        # Reversed clustering order: the partition is read from its newest row, so LIMIT n is the
+        # tail; rows are flipped back to chronological order after the read.
+        self._select_messages = self._session.prepare(
+            "SELECT session_id, timestamp, role, content FROM messages WHERE session_id=? "
+            "ORDER BY timestamp DESC LIMIT ?"
+        )
+        # sessions has no clustering column to ORDER BY; rows are sorted after the read.
+        self._select_sessions = self._session.prepare(
+            "SELECT session_id, updated_at FROM sessions LIMIT ?"
+        )
+        self._select_summary = self._session.prepare(
+            "SELECT summary, covered_until FROM session_summaries WHERE session_id=?"
+        )
+        # Conditional, so a fold computed from an older view never moves covered_until backwards.
+        self._insert_summary = self._session.prepare(
+            "INSERT INTO session_summaries (session_id, summary, covered_until) VALUES (?, ?, ?) IF NOT EXISTS"
+        )
+        self._advance_summary = self._session.prepare(
+            "UPDATE session_summaries SET summary=?, covered_until=? WHERE session_id=? IF covered_until <= ?"
+        )
+        self._insert_user_session = self._session.prepare(
+            "INSERT INTO sessions_by_user (user_id, updated_at, session_id, title, preview) "
+            "VALUES (?, ?, ?, ?, ?) USING TIMESTAMP ?"
+        )
+        self._move_user_session = self._session.prepare(
+            "DELETE FROM sessions_by_user USING TIMESTAMP ? WHERE user_id=? AND updated_at=? AND session_id=?"
+        )
+        self._delete_user_session = self._session.prepare(
+            "DELETE FROM sessions_by_user WHERE user_id=? AND updated_at=? AND session_id=?"
+        )
+        self._select_user_sessions = self._session.prepare(
+            "SELECT session_id, updated_at, title, preview FROM sessions_by_user "
+            "WHERE user_id=? LIMIT ?"
+        )
+        self._select_user_sessions_after = self._session.prepare(
+            "SELECT session_id, updated_at, title, preview FROM sessions_by_user "
+            "WHERE user_id=? AND (updated_at, session_id) < (?, ?) LIMIT ?"
         )
-        return [row.session_id for row in rows]
 
-    def get_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
-        rows = self._session.execute(
-            "SELECT session_id, timestamp, role, content FROM messages WHERE session_id=%s ORDER BY timestamp ASC LIMIT %s",
-            (session_id, limit),
+    def _session_batches(
+        self,
+        session_id: str,
+        messages: List[ChatMessageRecord],
+        previous: Any = None,
+    ) -> List[Any]:
+        """UNLOGGED batches for one session, each confined to a single partition.
+
+        The first holds the message inserts and the sessions upsert (partition session_id).
+        For a session with an owner, the second moves its sessions_by_user row (partition
+        user_id); previous is the sessions row read before the write, if any. Every session and
+        index write is timestamped with the batch's updated_at, so an older write never wins.
+        """
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for msg in messages:
+            batch.add(self._insert_message, (msg.session_id, msg.timestamp, msg.role, msg.content))
+        user_id = _owner(messages)
+        if user_id is None:
+            updated_at = max(msg.timestamp for msg in messages)
+            batch.add(self._upsert_session, (session_id, updated_at, _write_time(updated_at)))
+            return [batch]
+
+        summary = _summarize(session_id, messages, getattr(previous, "title", None))
+        write_time = _write_time(summary.updated_at)
+        batch.add(self._upsert_titled_session, (session_id, summary.updated_at, summary.title, write_time))
+        previous_at = getattr(previous, "updated_at", None)
+        if previous_at is not None and previous_at > summary.updated_at:
+            # Replayed older write: the session already moved past it.
+            return [batch]
+        index = BatchStatement(batch_type=BatchType.UNLOGGED)
+        # Same clustering key means the insert overwrites it; deleting it too would win the tie.
+        if previous_at is not None and previous_at != summary.updated_at:
+            index.add(self._move_user_session, (write_time, user_id, previous_at, session_id))
+        index.add(
+            self._insert_user_session,
+            (user_id, summary.updated_at, session_id, summary.title, summary.preview, write_time),
         )
+        return [batch, index]
+
+    def _user_sessions_query(
+        self,
+        user_id: str,
+        limit: int,
+        page_token: Optional[str],
+    ) -> Tuple[Any, Tuple[Any, ...]]:
+        if page_token is None:
+            return self._select_user_sessions, (user_id, limit + 1)
+        updated_at, session_id = decode_page_token(page_token)
+        return self._select_user_sessions_after, (user_id, updated_at, session_id, limit + 1)
+
+    @staticmethod
+    def _session_ids(rows: Any, limit: int) -> List[str]:
+        ordered = sorted(rows, key=lambda row: row.updated_at, reverse=True)
+        return [row.session_id for row in ordered[:limit]]
+
+    def list_sessions(self, limit: int = 50) -> List[str]:
+        rows = self._session.execute(self._select_sessions, (limit,))
+        return self._session_ids(rows, limit)
+
+    def list_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        statement, params = self._user_sessions_query(user_id, limit, page_token)
+        rows = list(self._session.execute(statement, params))
+        for row in _stale_rows(rows):
+            try:
+                self._session.execute(self._delete_user_session, (user_id, row.updated_at, row.session_id))
+            except Exception as e:
+                logger.warning("Could not delete stale session index row for %s: %s", row.session_id, e)
+        return _page(rows, limit)
+
+    def get_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
+        rows = self._session.execute(self._select_messages, (session_id, limit))
+        return [_record(row) for row in rows][::-1]
+
+    @staticmethod
+    def _summary(session_id: str, rows: Any) -> Optional[SessionSummary]:
+        row = next(iter(rows), None)
+        if row is None or row.summary is None:
+            return None
+        return SessionSummary(session_id=session_id, text=row.summary, covered_until=row.covered_until)
+
+    def get_latest_timestamp(self, session_id: str) -> Optional[datetime]:
+        row = next(iter(self._session.execute(self._select_session, (session_id,))), None)
+        return getattr(row, "updated_at", None)
+
+    def get_summary(self, session_id: str) -> Optional[SessionSummary]:
+        return self._summary(session_id, self._session.execute(self._select_summary, (session_id,)))
+
+    def _summary_writes(self, summary: SessionSummary) -> List[Tuple[Any, Tuple[Any, ...]]]:
+        """Insert for a session's first summary, then the update that only moves covered_until forward."""
         return [
-            ChatMessageRecord(
-                session_id=row.session_id,
-                timestamp=row.timestamp,
-                role=row.role,
-                content=row.content,
-            )
-            for row in rows
+            (self._insert_summary, (summary.session_id, summary.text, summary.covered_until)),
+            (
+                self._advance_summary,
+                (summary.text, summary.covered_until, summary.session_id, summary.covered_until),
+            ),
         ]
 
+    def put_summary(self, summary: SessionSummary) -> bool:
+        insert, advance = self._summary_writes(summary)
+        return _applied(self._session.execute(*insert)) or _applied(self._session.execute(*advance))
+
     def append_messages(self, messages: List[ChatMessageRecord]) -> None:
-        for msg in messages:
-            self._session.execute(
-                "INSERT INTO messages (session_id, timestamp, role, content) VALUES (%s, %s, %s, %s)",
-                (msg.session_id, msg.timestamp, msg.role, msg.content),
+        for session_id, session_messages in _by_session(messages).items():
+            previous = None
+            if _owner(session_messages) is not None:
+                previous = next(iter(self._session.execute(self._select_session, (session_id,))), None)
+            for batch in self._session_batches(session_id, session_messages, previous):
+                self._session.execute(batch)
+
+    async def alist_sessions(self, limit: int = 50) -> List[str]:
+        rows = await _to_asyncio(self._session.execute_async(self._select_sessions, (limit,)))
+        return self._session_ids(rows, limit)
+
+    async def alist_user_sessions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        page_token: Optional[str] = None,
+    ) -> ChatSessionPage:
+        statement, params = self._user_sessions_query(user_id, limit, page_token)
+        rows = list(await _to_asyncio(self._session.execute_async(statement, params)))
+        stale = _stale_rows(rows)
+        if stale:
+            results = await asyncio.gather(
+                *(
+                    _to_asyncio(
+                        self._session.execute_async(
+                            self._delete_user_session, (user_id, row.updated_at, row.session_id)
+                        )
+                    )
+                    for row in stale
+                ),
+                return_exceptions=True,
             )
-            self._session.execute(
-                "INSERT INTO sessions (session_id, updated_at) VALUES (%s, %s)",
-                (msg.session_id, msg.timestamp),
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning("Could not delete stale session index row: %s", result)
+        return _page(rows, limit)
+
+    async def aget_recent_messages(self, session_id: str, limit: int = 20) -> List[ChatMessageRecord]:
+        rows = await _to_asyncio(self._session.execute_async(self._select_messages, (session_id, limit)))
+        return [_record(row) for row in rows][::-1]
+
+    async def aget_latest_timestamp(self, session_id: str) -> Optional[datetime]:
+        rows = await _to_asyncio(self._session.execute_async(self._select_session, (session_id,)))
+        return getattr(next(iter(rows), None), "updated_at", None)
+
+    async def aget_summary(self, session_id: str) -> Optional[SessionSummary]:
+        rows = await _to_asyncio(self._session.execute_async(self._select_summary, (session_id,)))
+        return self._summary(session_id, rows)
+
+    async def aput_summary(self, summary: SessionSummary) -> bool:
+        for statement, params in self._summary_writes(summary):
+            if _applied(await _to_asyncio(self._session.execute_async(statement, params))):
+                return True
+        return False
+
+    async def _aappend_session(self, session_id: str, messages: List[ChatMessageRecord]) -> None:
+        previous = None
+        if _owner(messages) is not None:
+            rows = await _to_asyncio(self._session.execute_async(self._select_session, (session_id,)))
+            previous = next(iter(rows), None)
+        # The batches target different partitions: send them concurrently.
+        await asyncio.gather(
+            *(
+                _to_asyncio(self._session.execute_async(batch))
+                for batch in self._session_batches(session_id, messages, previous)
             )
+        )
+
+    async def aappend_messages(self, messages: List[ChatMessageRecord]) -> None:
+        # Different sessions are independent partitions: write them concurrently.
+        await asyncio.gather(
+            *(
+                self._aappend_session(session_id, session_messages)
+                for session_id, session_messages in _by_session(messages).items()
+            )
+        )
 
     def close(self) -> None:
         self._cluster.shutdown()
-
@@ -0,0 +1,237 @@
+"""
+Write-behind persistence for chat memory (chat-api).
+
+ChatMemoryService hands each exchange to ChatMemoryWriteBehind and returns at once; a single
+background task flushes queued messages to the store in micro-batches (up to batch_size messages,
+waiting at most flush_interval_seconds for more to arrive). A failed flush is retried with
+exponential backoff. Messages that still cannot be written, or that arrive while the queue is full,
+are appended to a local JSONL spill file (in a worker thread, never on the event loop) and replayed
+after the next successful flush (and when the worker starts). Store writes are upserts keyed by
+(session_id, timestamp), so a retried or replayed message never duplicates a row.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Deque, List, Optional, Set
+
+from src.metrics import record_chat_memory_writes, set_chat_memory_queue_depth
+
+from .models import ChatMessageRecord
+from .store import ChatMemoryStore
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_WRITTEN = "written"
+OUTCOME_RETRIED = "retried"
+OUTCOME_SPILLED = "spilled"
+OUTCOME_REPLAYED = "replayed"
+OUTCOME_DROPPED = "dropped"
+
+
+class ChatMemoryWriteBehind:
+    """Bounded in-memory queue in front of a ChatMemoryStore, flushed by one asyncio task."""
+
+    def __init__(
+        self,
+        store: ChatMemoryStore,
+        max_pending: int = 10000,
+        batch_size: int = 64,
+        flush_interval_seconds: float = 0.02,
+        max_retries: int = 5,
+        retry_base_seconds: float = 0.2,
+        retry_max_seconds: float = 5.0,
+        spill_path: str = "",
+    ) -> None:
+        if max_pending <= 0 or batch_size <= 0:
+            raise ValueError("max_pending and batch_size must be > 0")
+        self._store = store
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.spill_path = spill_path
+        self._queue: Deque[ChatMessageRecord] = deque()
+        self._in_flight: List[ChatMessageRecord] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Overflow spills run in worker threads; the lock keeps their appends whole and ordered
+        # against the replay's rename of the spill file.
+        self._spills: Set[asyncio.Task] = set()
+        self._spill_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Messages accepted but not yet written (queued or in the batch being flushed)."""
+        return len(self._queue) + len(self._in_flight)
+
+    def pending_messages(self, session_id: str) -> List[ChatMessageRecord]:
+        """Unwritten messages of one session, so reads can include them."""
+        return [m for m in (*self._in_flight, *self._queue) if m.session_id == session_id]
+
+    def start(self) -> None:
+        """Start the flush task now (replays a spill file left by a previous run)."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, messages: List[ChatMessageRecord]) -> None:
+        """Queue messages for writing; never blocks on the store."""
+        if self._closing or len(self._queue) + len(messages) > self.max_pending:
+            logger.warning("Chat memory write-behind queue full; spilling %d messages", len(messages))
+            task = asyncio.create_task(asyncio.to_thread(self._spill, messages))
+            self._spills.add(task)
+            task.add_done_callback(self._spills.discard)
+            return
+        self._queue.extend(messages)
+        set_chat_memory_queue_depth(self.pending)
+        self.start()
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        await self._replay_spill()
+        while True:
+            if not self._queue:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if len(self._queue) < self.batch_size and not self._closing:
+                # Linger briefly so exchanges finishing together share one flush.
+                await asyncio.sleep(self.flush_interval_seconds)
+            count = min(self.batch_size, len(self._queue))
+            self._in_flight = [self._queue.popleft() for _ in range(count)]
+            try:
+                written = await self._flush(self._in_flight)
+            except asyncio.CancelledError:
+                self._spill(self._in_flight)
+                raise
+            finally:
+                batch, self._in_flight = self._in_flight, []
+                set_chat_memory_queue_depth(self.pending)
+            if written:
+                record_chat_memory_writes(OUTCOME_WRITTEN, len(batch))
+                await self._replay_spill()
+            else:
+                await asyncio.to_thread(self._spill, batch)
+
+    async def _flush(self, batch: List[ChatMessageRecord]) -> bool:
+        """Write batch, retrying with exponential backoff; False once retries are exhausted."""
+        attempt = 0
+        while True:
+            try:
+                await self._store.aappend_messages(batch)
+                return True
+            except Exception as e:
+                # On shutdown, spill instead of sleeping through the drain timeout.
+                if attempt >= self.max_retries or self._closing:
+                    logger.warning("Chat memory flush of %d messages failed: %s", len(batch), e)
+                    return False
+                record_chat_memory_writes(OUTCOME_RETRIED, len(batch))
+                await asyncio.sleep(min(self.retry_max_seconds, self.retry_base_seconds * 2**attempt))
+                attempt += 1
+
+    def _spill(self, messages: List[ChatMessageRecord]) -> None:
+        if not messages:
+            return
+        if not self.spill_path:
+            logger.warning("No chat memory spill path; dropping %d messages", len(messages))
+            record_chat_memory_writes(OUTCOME_DROPPED, len(messages))
+            return
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for msg in messages:
+                    f.write(msg.model_dump_json() + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            record_chat_memory_writes(OUTCOME_SPILLED, len(messages))
+        except OSError as e:
+            logger.warning("Chat memory spill failed; dropping %d messages: %s", len(messages), e)
+            record_chat_memory_writes(OUTCOME_DROPPED, len(messages))
+
+    @staticmethod
+    def _load(path: str) -> List[ChatMessageRecord]:
+        records = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(ChatMessageRecord.model_validate(json.loads(line)))
+                except ValueError:
+                    # A torn last line from a crash mid-write; the rest is still good.
+                    logger.warning("Skipping unreadable chat memory spill line")
+        return records
+
+    async def _replay_spill(self) -> None:
+        """Write spilled messages back to the store; whatever fails stays spilled."""
+        if not self.spill_path:
+            return
+        try:
+            await self._replay(self.spill_path + ".replay")
+        except OSError as e:
+            logger.warning("Chat memory spill replay failed: %s", e)
+
+    def _take_spill(self, replay_path: str) -> bool:
+        """Move spill_path aside for replay (unless a previous replay is unfinished); False if nothing to replay."""
+        with self._spill_lock:
+            if os.path.exists(replay_path):
+                return True
+            if not os.path.exists(self.spill_path):
+                return False
+            os.replace(self.spill_path, replay_path)
+            return True
+
+    async def _replay(self, replay_path: str) -> None:
+        # Replay from a renamed copy so new spills can keep appending to spill_path meanwhile.
+        if not await asyncio.to_thread(self._take_spill, replay_path):
+            return
+        records = await asyncio.to_thread(self._load, replay_path)
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start : start + self.batch_size]
+            try:
+                await self._store.aappend_messages(batch)
+            except Exception as e:
+                logger.warning("Chat memory spill replay failed: %s", e)
+                await asyncio.to_thread(self._respill, records[start:], replay_path)
+                return
+            record_chat_memory_writes(OUTCOME_REPLAYED, len(batch))
+        os.remove(replay_path)
+
+    def _respill(self, records: List[ChatMessageRecord], replay_path: str) -> None:
+        with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+            for msg in records:
+                f.write(msg.model_dump_json() + "\n")
+        os.remove(replay_path)
+
+    async def aclose(self, timeout_seconds: float = 5.0) -> None:
+        """Flush what is queued (up to timeout_seconds); anything left over is spilled."""
+        self._closing = True
+        task = self._task
+        if task is not None and not task.done():
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout_seconds)
+            except asyncio.TimeoutError:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            except Exception as e:
+                logger.warning("Chat memory write-behind stopped with an error: %s", e)
+        if self._spills:
+            await asyncio.gather(*self._spills, return_exceptions=True)
+        if self._queue:
+            self._spill(list(self._queue))
+            self._queue.clear()
+        set_chat_memory_queue_depth(0)
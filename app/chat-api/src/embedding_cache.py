@@ -0,0 +1,116 @@
+"""
+In-process LRU/TTL cache for query embeddings (chat-api).
+
+Wraps the embed model used by WeaviateClient and the chat router so repeated questions are not
+re-embedded. Vectors are stored as contiguous float32 arrays and the cache is bounded by bytes,
+not entry count, so it can be sized per pod.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Approximate per-entry overhead (key digest, OrderedDict slot, tuple, ndarray header).
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace and casefold so trivially different spellings share an entry."""
+    return " ".join(text.split()).casefold()
+
+
+def _cache_key(text: str) -> bytes:
+    return hashlib.blake2b(_normalize(text).encode("utf-8"), digest_size=16).digest()
+
+
+class CachedEmbedding:
+    """
+    Embed model wrapper with a bounded, memory-accounted LRU/TTL cache.
+
+    Exposes get_text_embedding / aget_text_embedding like the wrapped model; any other attribute
+    is delegated to it.
+    """
+
+    def __init__(self, embed_model: Any, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: int = 3600) -> None:
+        self._embed_model = embed_model
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._bytes_used = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._embed_model, name)
+
+    @staticmethod
+    def _entry_size(vector: np.ndarray) -> int:
+        return vector.nbytes + _ENTRY_OVERHEAD_BYTES
+
+    def _lookup(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return vector
+                del self._entries[key]
+                self._bytes_used -= self._entry_size(vector)
+            self._misses += 1
+            return None
+
+    def _store(self, key: bytes, embedding: List[float]) -> None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        size = self._entry_size(vector)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes_used -= self._entry_size(previous[1])
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._bytes_used += size
+            while self._bytes_used > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes_used -= self._entry_size(evicted)
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        key = _cache_key(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached.tolist()
+        embedding = self._embed_model.get_text_embedding(text)
+        self._store(key, embedding)
+        return embedding
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        key = _cache_key(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached.tolist()
+        embedding = await self._embed_model.aget_text_embedding(text)
+        self._store(key, embedding)
+        return embedding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes_used = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes_used": self._bytes_used,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
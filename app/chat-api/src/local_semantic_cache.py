@@ -0,0 +1,116 @@
+"""
+In-process L1 tier of the semantic cache (chat-api).
+
+A bounded matrix of recent query embeddings (unit-normalized, contiguous float32) and the responses
+they map to. A lookup is one matrix-vector product plus an argmax, so a hot question is answered
+without a Redis round trip. Entries come from Redis (L2) hits and from stores; they expire after a
+short TTL because the tier is per worker and not reached by ingestion-worker's Redis flush.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Entries whose embeddings are this similar are treated as the same query (slot is overwritten).
+_DUPLICATE_SIMILARITY = 0.9999
+
+
+class LocalSemanticCache:
+    """
+    Fixed-capacity nearest-neighbour cache: exact cosine over up to max_entries vectors.
+    When full, the least recently used (or an expired) slot is replaced.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        similarity_threshold: float = 0.95,
+        embed_dim: int = 3072,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_dim = embed_dim
+        self._vectors = np.zeros((max_entries, embed_dim), dtype=np.float32)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._responses: List[Optional[str]] = [None] * max_entries
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def _unit(self, embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.embed_dim,):
+            return None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _nearest(self, vector: np.ndarray, now: float) -> Tuple[int, float]:
+        """(slot, similarity) of the nearest live entry; (-1, -inf) when there is none."""
+        if self._size == 0:
+            return -1, float("-inf")
+        similarities = self._vectors[: self._size] @ vector
+        similarities[self._expires_at[: self._size] <= now] = -np.inf
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def get(self, query_embedding: List[float]) -> Optional[str]:
+        vector = self._unit(query_embedding)
+        if vector is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            slot, similarity = self._nearest(vector, now)
+            if slot < 0 or similarity < self.similarity_threshold:
+                self._misses += 1
+                return None
+            self._last_used[slot] = now
+            self._hits += 1
+            return self._responses[slot]
+
+    def set(self, query_embedding: List[float], response: str) -> None:
+        vector = self._unit(query_embedding)
+        if vector is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            slot, similarity = self._nearest(vector, now)
+            if slot < 0 or similarity < _DUPLICATE_SIMILARITY:
+                if self._size < self.max_entries:
+                    slot = self._size
+                    self._size += 1
+                else:
+                    # Expired slots go first, then the least recently used.
+                    stale = np.where(self._expires_at <= now, -np.inf, self._last_used)
+                    slot = int(np.argmin(stale))
+            self._vectors[slot] = vector
+            self._responses[slot] = response
+            self._expires_at[slot] = now + self.ttl_seconds
+            self._last_used[slot] = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._size = 0
+            self._responses = [None] * self.max_entries
+            self._expires_at[:] = 0.0
+            self._last_used[:] = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "bytes_used": int(self._vectors.nbytes),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
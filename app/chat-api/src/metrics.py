@@ -0,0 +1,221 @@
+"""
+Prometheus metrics for the chat-api RAG pipeline.
+
+Stage latencies are histograms labelled by stage; cache results, streamed tokens and stage errors
+are counters; admission in-flight / queue depth are gauges (autoscaling signals). Exposed on GET /metrics (scraped by monitoring/service-monitors.yaml).
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Stage label values (keep in sync with dashboards).
+STAGE_EMBED = "embed"
+STAGE_CACHE_GET = "cache_get"
+STAGE_CACHE_SET = "cache_set"
+STAGE_RETRIEVAL_CACHE_GET = "retrieval_cache_get"
+STAGE_RETRIEVAL_CACHE_SET = "retrieval_cache_set"
+STAGE_RETRIEVE = "retrieve"
+STAGE_FIRST_RERANK = "first_rerank"
+STAGE_SECOND_RERANK = "second_rerank"
+STAGE_CONTEXT_BUILD = "context_build"
+STAGE_LLM_FIRST_TOKEN = "llm_first_token"
+STAGE_LLM_TOTAL = "llm_total"
+STAGE_HISTORY = "history"
+STAGE_HISTORY_FOLD = "history_fold"
+
+_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_latency_seconds",
+    "Latency of each RAG pipeline stage.",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+SEMANTIC_CACHE_REQUESTS = Counter(
+    "rag_semantic_cache_requests_total",
+    "Semantic cache lookups by result.",
+    ["result"],
+)
+LOCAL_SEMANTIC_CACHE_REQUESTS = Counter(
+    "rag_semantic_cache_local_requests_total",
+    "In-process (L1) semantic cache lookups by result; misses fall through to Redis.",
+    ["result"],
+)
+RETRIEVAL_CACHE_REQUESTS = Counter(
+    "rag_retrieval_cache_requests_total",
+    "Retrieval-result cache lookups by result.",
+    ["result"],
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total",
+    "LLM tokens by kind (prompt: query + context + history, completion: the answer), model tokenizer.",
+    ["kind"],
+)
+CONTEXT_TOKENS = Counter(
+    "rag_context_tokens_total",
+    "Prompt context tokens after budgeted packing (used) and tokens trimmed by packing (saved).",
+    ["kind"],
+)
+RERANK_SCORE_CACHE_DOCS = Counter(
+    "rag_rerank_score_cache_docs_total",
+    "Documents whose Cohere score was served from the rerank score cache (hit) or requested (miss).",
+    ["result"],
+)
+RERANK_FALLBACKS = Counter(
+    "rag_rerank_fallbacks_total",
+    "Second-stage reranks answered with first-stage order, by reason (timeout / error / circuit_open).",
+    ["reason"],
+)
+RERANK_HEDGES = Counter(
+    "rag_rerank_hedged_requests_total",
+    "Hedged duplicate rerank requests sent after the hedge delay.",
+)
+SPECULATIVE_RETRIEVALS = Counter(
+    "rag_speculative_retrieval_total",
+    "Speculative retrievals started alongside the cache lookup, by outcome (used / cancelled).",
+    ["outcome"],
+)
+SINGLE_FLIGHT = Counter(
+    "rag_single_flight_total",
+    "Chat requests by single-flight role (leader computes, follower shares, remote_wait waits on another pod).",
+    ["role"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "rag_admission_in_flight",
+    "RAG generations currently holding an admission slot.",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "rag_admission_queue_depth",
+    "RAG requests waiting for an admission slot.",
+)
+ADMISSION_WAIT = Histogram(
+    "rag_admission_wait_seconds",
+    "Time admitted requests waited for a generation slot.",
+    buckets=_LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "rag_admission_rejected_total",
+    "Requests rejected by admission control, by reason (queue_full / queue_timeout).",
+    ["reason"],
+)
+CHAT_MEMORY_WRITES = Counter(
+    "rag_chat_memory_writes_total",
+    "Chat memory messages handled by the write-behind queue, by outcome "
+    "(written / retried / spilled / replayed / dropped).",
+    ["outcome"],
+)
+CHAT_MEMORY_CACHE_REQUESTS = Counter(
+    "rag_chat_memory_cache_requests_total",
+    "Chat history reads answered by the per-pod recent-messages cache (hit) or the store (miss).",
+    ["result"],
+)
+CHAT_MEMORY_QUEUE_DEPTH = Gauge(
+    "rag_chat_memory_write_queue_depth",
+    "Chat memory messages accepted but not yet written to the store.",
+)
+HISTORY_TOKENS = Counter(
+    "rag_history_tokens_total",
+    "Conversation history tokens put into prompts, by kind (verbatim turns / rolling summary).",
+    ["kind"],
+)
+HISTORY_FOLDS = Counter(
+    "rag_history_folds_total",
+    "Rolling-summary updates of older conversation turns, by outcome (folded / failed).",
+    ["outcome"],
+)
+PIPELINE_ERRORS = Counter(
+    "rag_pipeline_errors_total",
+    "Exceptions raised inside a RAG pipeline stage.",
+    ["stage"],
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Time the wrapped block into STAGE_LATENCY and count exceptions in PIPELINE_ERRORS."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        PIPELINE_ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def observe_latency(stage: str, seconds: float) -> None:
+    STAGE_LATENCY.labels(stage=stage).observe(seconds)
+
+
+def record_cache_result(hit: bool) -> None:
+    SEMANTIC_CACHE_REQUESTS.labels(result="hit" if hit else "miss").inc()
+
+
+def record_local_cache_result(hit: bool) -> None:
+    LOCAL_SEMANTIC_CACHE_REQUESTS.labels(result="hit" if hit else "miss").inc()
+
+
+def record_retrieval_cache_result(hit: bool) -> None:
+    RETRIEVAL_CACHE_REQUESTS.labels(result="hit" if hit else "miss").inc()
+
+
+def record_speculative_retrieval(used: bool) -> None:
+    SPECULATIVE_RETRIEVALS.labels(outcome="used" if used else "cancelled").inc()
+
+
+def record_context_tokens(used: int, saved: int) -> None:
+    CONTEXT_TOKENS.labels(kind="used").inc(used)
+    CONTEXT_TOKENS.labels(kind="saved").inc(saved)
+
+
+def record_rerank_score_cache(hits: int, misses: int) -> None:
+    RERANK_SCORE_CACHE_DOCS.labels(result="hit").inc(hits)
+    RERANK_SCORE_CACHE_DOCS.labels(result="miss").inc(misses)
+
+
+def record_rerank_fallback(reason: str) -> None:
+    RERANK_FALLBACKS.labels(reason=reason).inc()
+
+
+def record_rerank_hedge() -> None:
+    RERANK_HEDGES.inc()
+
+
+def record_single_flight(role: str) -> None:
+    SINGLE_FLIGHT.labels(role=role).inc()
+
+
+def set_admission_gauges(in_flight: int, queue_depth: int) -> None:
+    ADMISSION_IN_FLIGHT.set(in_flight)
+    ADMISSION_QUEUE_DEPTH.set(queue_depth)
+
+
+def record_admission_wait(seconds: float) -> None:
+    ADMISSION_WAIT.observe(seconds)
+
+
+def record_admission_rejected(reason: str) -> None:
+    ADMISSION_REJECTIONS.labels(reason=reason).inc()
+
+
+def record_chat_memory_writes(outcome: str, messages: int) -> None:
+    CHAT_MEMORY_WRITES.labels(outcome=outcome).inc(messages)
+
+
+def record_chat_memory_cache_result(hit: bool) -> None:
+    CHAT_MEMORY_CACHE_REQUESTS.labels(result="hit" if hit else "miss").inc()
+
+
+def set_chat_memory_queue_depth(depth: int) -> None:
+    CHAT_MEMORY_QUEUE_DEPTH.set(depth)
+
+
+def record_history_tokens(verbatim: int, summary: int) -> None:
+    HISTORY_TOKENS.labels(kind="verbatim").inc(verbatim)
+    HISTORY_TOKENS.labels(kind="summary").inc(summary)
+
+
+def record_history_fold(folded: bool) -> None:
+    HISTORY_FOLDS.labels(outcome="folded" if folded else "failed").inc()
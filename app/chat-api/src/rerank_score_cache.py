@@ -0,0 +1,84 @@
+"""
+Rerank score cache (chat-api): Redis key/value cache of cross-encoder scores.
+
+Keyed on (rerank model, normalized query hash, chunk content hash), so a (query, chunk) pair seen
+again — from another user or a retry — is not re-sent to Cohere. Keying on content rather than
+chunk id keeps entries valid across reindexing; a changed chunk simply hashes to a new key.
+"""
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+RERANK_SCORE_PREFIX = "rag_rerank:"
+
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace and casefold so trivially different spellings share entries."""
+    return " ".join(query.split()).casefold()
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RerankScoreCache:
+    """
+    Redis cache of rerank relevance scores with its own TTL.
+    Soft-fails: any Redis error is logged and treated as a miss.
+    """
+
+    def __init__(self, redis_url: str = "", ttl_seconds: int = 86400) -> None:
+        self.redis_url = redis_url or ""
+        self.ttl_seconds = ttl_seconds
+        self._client: Optional[redis.Redis] = None
+        self._enabled = bool(self.redis_url.strip())
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def _client_or_raise(self) -> redis.Redis:
+        if not self._enabled:
+            raise RuntimeError("Rerank score cache is disabled (no REDIS_URL).")
+        if self._client is None:
+            self._client = redis.from_url(self.redis_url, decode_responses=False)
+        return self._client
+
+    def keys(self, model: str, query: str, texts: List[str]) -> List[str]:
+        query_hash = _digest(_normalize_query(query))
+        return [f"{RERANK_SCORE_PREFIX}{model}:{query_hash}:{_digest(text)}" for text in texts]
+
+    def get_many(self, keys: List[str]) -> List[Optional[float]]:
+        """Cached score per key (None on miss); all None when disabled or on error."""
+        if not self._enabled or not keys:
+            return [None] * len(keys)
+        try:
+            values = self._client_or_raise().mget(keys)
+            return [float(v) if v is not None else None for v in values]
+        except Exception as e:
+            logger.warning("Rerank score cache get failed: %s", e)
+            return [None] * len(keys)
+
+    def set_many(self, scores: Dict[str, float]) -> None:
+        """Store scores in one pipelined round trip."""
+        if not self._enabled or not scores:
+            return
+        try:
+            pipe = self._client_or_raise().pipeline(transaction=False)
+            for key, score in scores.items():
+                pipe.set(key, repr(float(score)), ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Rerank score cache set failed: %s", e)
+
+    def close(self) -> None:
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+            self._client = None
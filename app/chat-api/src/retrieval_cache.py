@@ -0,0 +1,71 @@
+"""
+Retrieval-result cache (chat-api): second Redis tier below the answer cache.
+
+Stores the final reranked document list as chunk ids + rerank scores, keyed on the query embedding,
+with a looser similarity threshold than SemanticCache. A paraphrase that misses the answer cache can
+skip retrieval and both rerank stages and go straight to generation. ingestion-worker invalidates this
+tier together with the answer cache (shared cache generation) when it reindexes.
+"""
+import json
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.semantic_cache import SemanticCache, VectorEncoding
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_CACHE_PREFIX = "rag_retrieval:"
+RETRIEVAL_INDEX_NAME = "rag_retrieval_idx"
+CHUNK_ID_FIELD = "chunk_id"
+
+
+class RetrievalHit(NamedTuple):
+    chunk_id: str
+    score: Optional[float]
+
+
+class RetrievalCache(SemanticCache):
+    """
+    Redis vector cache of reranked chunk ids and scores.
+    Shares the SemanticCache index layout; the payload is a JSON list instead of an LLM answer.
+    """
+
+    key_prefix = RETRIEVAL_CACHE_PREFIX
+    index_name = RETRIEVAL_INDEX_NAME
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        ttl_seconds: int = 3600,
+        similarity_threshold: float = 0.90,
+        embed_dim: int = 3072,
+        vector_encoding: Optional[VectorEncoding] = None,
+        generation_refresh_seconds: float = 1.0,
+    ) -> None:
+        super().__init__(
+            redis_url=redis_url,
+            ttl_seconds=ttl_seconds,
+            similarity_threshold=similarity_threshold,
+            embed_dim=embed_dim,
+            vector_encoding=vector_encoding,
+            generation_refresh_seconds=generation_refresh_seconds,
+        )
+
+    def get_hits(self, query_embedding: List[float]) -> Optional[List[RetrievalHit]]:
+        """Cached (chunk_id, score) list for a similar query, or None on miss."""
+        payload = self.get(query_embedding)
+        if payload is None:
+            return None
+        try:
+            return [RetrievalHit(str(item["id"]), item.get("score")) for item in json.loads(payload)]
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning("Retrieval cache entry unreadable: %s", e)
+            return None
+
+    def set_docs(self, query_embedding: List[float], docs: List[Dict[str, Any]]) -> None:
+        """Cache the reranked docs by chunk id; skipped unless every doc carries one."""
+        if not docs or any(not doc.get(CHUNK_ID_FIELD) for doc in docs):
+            return
+        payload = json.dumps([{"id": doc[CHUNK_ID_FIELD], "score": doc.get("rerank_score")} for doc in docs])
+        sources = sorted({str(doc["source"]) for doc in docs if doc.get("source")})
+        self.set(query_embedding, payload, sources=sources)
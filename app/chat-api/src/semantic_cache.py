@@ -1,27 +1,161 @@
 """
 Semantic cache for RAG (chat-api): Redis Stack vector similarity lookup.
 Store (query_embedding, LLM_response) and match by embedding similarity.
+
+SemanticCache uses a synchronous client (sync pipeline, ingestion tools); AsyncSemanticCache is the
+redis.asyncio variant used by the async chat path: pooled connections, a memoized index check, one
+round trip per lookup and pipelined write-behind stores.
+
+AsyncSemanticCache can front Redis with a LocalSemanticCache (L1): lookups check it first, and Redis
+hits and stores populate it.
+
+Entries belong to a cache generation. ingestion-worker invalidates every tier at once by incrementing
+GENERATION_KEY (one INCR); caches re-read it at most every generation_refresh_seconds and switch to
+the new generation's keys and index, which start empty. Old generations' keys simply expire.
+
+Entries may record the source documents their answer was built from: the hash keeps them in a
+"sources" field and each source has a reverse-index set (SOURCE_INDEX_PREFIX + source) of the cache
+keys that depend on it, so ingestion-worker can delete just the entries of re-ingested sources. It
+then bumps INVALIDATION_EPOCH_KEY, which makes AsyncSemanticCache drop its L1 tier.
+
+Vectors can be stored compactly (VectorEncoding): a Matryoshka prefix of the embedding, renormalized,
+stored as FLOAT16 or INT8 instead of FLOAT32. Each non-default layout gets its own key prefix and
+index name, so changing the encoding never mixes vector sizes in one index.
 """
+import asyncio
+import json
 import logging
+import time
 import uuid
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
 import redis
+import redis.asyncio as aioredis
 from redis.commands.search.field import TextField, VectorField
 from redis.commands.search.index_definition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 
+from src.local_semantic_cache import LocalSemanticCache
+from src.metrics import record_local_cache_result
+
 logger = logging.getLogger(__name__)
 
 CACHE_PREFIX = "rag_cache:"
 INDEX_NAME = "rag_cache_idx"
+# Shared by every cache tier; bumped by ingestion-worker to invalidate them all.
+GENERATION_KEY = "rag_cache_generation"
+# Reverse index source -> cache keys (a Redis set per source), shared by every cache tier.
+SOURCE_INDEX_PREFIX = "rag_cache_source:"
+# Bumped by ingestion-worker after a source-scoped invalidation; in-process tiers clear on change.
+INVALIDATION_EPOCH_KEY = "rag_cache_invalidation_epoch"
+
+
+VECTOR_TYPES = ("FLOAT32", "FLOAT16", "INT8")
+_NUMPY_TYPES = {"FLOAT32": np.float32, "FLOAT16": np.float16, "INT8": np.int8}
 
 
 def _embedding_to_bytes(embedding: List[float]) -> bytes:
     return np.array(embedding, dtype=np.float32).tobytes()
 
 
+@dataclass(frozen=True)
+class VectorEncoding:
+    """
+    Storage encoding of cache vectors and the HNSW parameters of their index.
+
+    dim truncates the embedding to its first dim components (text-embedding-3 models are trained
+    so that prefixes remain usable embeddings) and renormalizes; 0 keeps the full embedding.
+    INT8 scales each unit vector so its largest component maps to 127; cosine similarity is
+    scale-invariant, so only rounding error is introduced. FLOAT16 needs RediSearch 2.10+, INT8
+    Redis 8.0+.
+    """
+
+    dim: int = 0
+    vector_type: str = "FLOAT32"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef_runtime: int = 10
+
+    def __post_init__(self) -> None:
+        if self.vector_type not in VECTOR_TYPES:
+            raise ValueError(f"vector_type must be one of {VECTOR_TYPES}, got {self.vector_type!r}")
+        if self.dim < 0:
+            raise ValueError("dim must be >= 0")
+
+    def index_dim(self, embed_dim: int) -> int:
+        return self.dim if 0 < self.dim < embed_dim else embed_dim
+
+    def layout_suffix(self, embed_dim: int) -> str:
+        """Key prefix / index name suffix; empty for the original full-size FLOAT32 layout."""
+        dim = self.index_dim(embed_dim)
+        if dim == embed_dim and self.vector_type == "FLOAT32":
+            return ""
+        return f"_{dim}{self.vector_type.lower()}"
+
+    def encode(self, embedding: Sequence[float]) -> bytes:
+        vec = np.asarray(embedding, dtype=np.float32)
+        if 0 < self.dim < vec.shape[0]:
+            vec = vec[: self.dim]
+            norm = float(np.linalg.norm(vec))
+            if norm > 0:
+                vec = vec / norm
+        if self.vector_type == "INT8":
+            peak = float(np.max(np.abs(vec))) if vec.size else 0.0
+            if peak > 0:
+                vec = np.rint(vec * (127.0 / peak))
+        return vec.astype(_NUMPY_TYPES[self.vector_type]).tobytes()
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """Stored vector as float32 (INT8 stays scaled; only its direction matters for cosine)."""
+        return np.frombuffer(data, dtype=_NUMPY_TYPES[self.vector_type]).astype(np.float32)
+
+
+def _layout_names(key_prefix: str, index_name: str, suffix: str) -> Tuple[str, str]:
+    """(key prefix, index name) of a cache tier for the given layout suffix."""
+    if not suffix:
+        return key_prefix, index_name
+    return f"{key_prefix.rstrip(':')}{suffix}:", f"{index_name}{suffix}"
+
+
+def _generation_names(key_prefix: str, index_name: str, generation: int) -> Tuple[str, str]:
+    """(key prefix, index name) of a generation; generation 0 keeps the unsuffixed names."""
+    if generation <= 0:
+        return key_prefix, index_name
+    return f"{key_prefix.rstrip(':')}_g{generation}:", f"{index_name}_g{generation}"
+
+
+def _parse_generation(value) -> int:
+    if value is None:
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _entry_mapping(vec_bytes: bytes, response: str, sources: Optional[Sequence[str]]) -> dict:
+    mapping = {"vector": vec_bytes, "response": response}
+    if sources:
+        mapping["sources"] = json.dumps(list(sources))
+    return mapping
+
+
+def _index_sources(r, key: str, sources: Optional[Iterable[str]], ttl_seconds: int) -> None:
+    """
+    Add key to each source's reverse-index set (r may be a client or a pipeline).
+
+    Tiers with different TTLs share a set (answers outlive retrieval results), so its expiry is
+    only ever extended: NX sets it on a new set, GT raises it (Redis 7+).
+    """
+    for source in sources or ():
+        source_key = f"{SOURCE_INDEX_PREFIX}{source}"
+        r.sadd(source_key, key)
+        r.expire(source_key, ttl_seconds, nx=True)
+        r.expire(source_key, ttl_seconds, gt=True)
+
+
 def _cosine_distance_to_similarity(score_str: str) -> float:
     """RediSearch COSINE returns distance; similarity = 1 - distance."""
     try:
@@ -31,25 +165,95 @@ def _cosine_distance_to_similarity(score_str: str) -> float:
         return 0.0
 
 
+def _index_schema(embed_dim: int, encoding: VectorEncoding) -> tuple:
+    return (
+        VectorField(
+            "vector",
+            "HNSW",
+            {
+                "TYPE": encoding.vector_type,
+                "DIM": encoding.index_dim(embed_dim),
+                "DISTANCE_METRIC": "COSINE",
+                "M": encoding.hnsw_m,
+                "EF_CONSTRUCTION": encoding.hnsw_ef_construction,
+                "EF_RUNTIME": encoding.hnsw_ef_runtime,
+            },
+        ),
+        TextField("response"),
+    )
+
+
+def _knn_query(ef_runtime: int) -> Query:
+    # EF_RUNTIME per query so tuning it does not require re-creating the index.
+    return (
+        Query(f"*=>[KNN 1 @vector $vec EF_RUNTIME {int(ef_runtime)} AS score]")
+        .return_fields("response", "score")
+        .sort_by("score")
+        .paging(0, 1)
+        .dialect(2)
+    )
+
+
+def _hit_response(results, similarity_threshold: float) -> Optional[str]:
+    """Cached response from a KNN 1 search result if it clears the similarity threshold."""
+    if not results.docs:
+        return None
+    doc = results.docs[0]
+    score_str = getattr(doc, "score", None) or getattr(doc, "payload", {}).get("score")
+    if score_str is None:
+        return None
+    similarity = _cosine_distance_to_similarity(str(score_str))
+    if similarity < similarity_threshold:
+        return None
+    response = getattr(doc, "response", None)
+    if response is None:
+        return None
+    if isinstance(response, bytes):
+        response = response.decode("utf-8", errors="replace")
+    return response
+
+
+def _is_missing_index(error: Exception) -> bool:
+    message = str(error).lower()
+    return "unknown index" in message or "no such index" in message
+
+
 class SemanticCache:
     """
     Semantic cache using Redis Stack vector search.
     Embeddings must match the Weaviate embed model (same dimension and model).
+
+    As in AsyncSemanticCache, the index check runs once per generation; a missing index first
+    re-reads the generation, so an index dropped with an old generation is never re-created.
     """
 
+    key_prefix = CACHE_PREFIX
+    index_name = INDEX_NAME
+
     def __init__(
         self,
         redis_url: str = "",
         ttl_seconds: int = 86400,
         similarity_threshold: float = 0.95,
         embed_dim: int = 3072,
+        vector_encoding: Optional[VectorEncoding] = None,
+        generation_refresh_seconds: float = 1.0,
     ) -> None:
         self.redis_url = redis_url or ""
         self.ttl_seconds = ttl_seconds
         self.similarity_threshold = similarity_threshold
         self.embed_dim = embed_dim
+        self.vector_encoding = vector_encoding or VectorEncoding()
+        self.generation_refresh_seconds = generation_refresh_seconds
+        self._layout_prefix, self._layout_index = _layout_names(
+            self.key_prefix, self.index_name, self.vector_encoding.layout_suffix(embed_dim)
+        )
+        self.generation = 0
+        self.key_prefix, self.index_name = self._layout_prefix, self._layout_index
+        self._generation_checked_at: Optional[float] = None
         self._client: Optional[redis.Redis] = None
         self._enabled = bool(self.redis_url.strip())
+        self._index_ready = False
 
     @property
     def enabled(self) -> bool:
@@ -62,72 +266,82 @@ class SemanticCache:
             self._client = redis.from_url(self.redis_url, decode_responses=False)
         return self._client
 
+    def _use_generation(self, generation: int) -> None:
+        self.generation = generation
+        self.key_prefix, self.index_name = _generation_names(self._layout_prefix, self._layout_index, generation)
+        self._index_ready = False
+
+    def _refresh_generation(self, r: redis.Redis, force: bool = False) -> None:
+        now = time.monotonic()
+        checked_at = self._generation_checked_at
+        if not force and checked_at is not None and now - checked_at < self.generation_refresh_seconds:
+            return
+        self._generation_checked_at = now
+        generation = _parse_generation(r.get(GENERATION_KEY))
+        if generation != self.generation:
+            self._use_generation(generation)
+
     def _ensure_index(self, r: redis.Redis) -> None:
-        try:
-            r.ft(INDEX_NAME).info()
+        if self._index_ready:
             return
+        try:
+            r.ft(self.index_name).info()
         except redis.exceptions.ResponseError:
-            pass
-        schema = (
-            VectorField(
-                "vector",
-                "HNSW",
-                {
-                    "TYPE": "FLOAT32",
-                    "DIM": self.embed_dim,
-                    "DISTANCE_METRIC": "COSINE",
-                },
-            ),
-            TextField("response"),
-        )
-        definition = IndexDefinition(prefix=[CACHE_PREFIX], index_type=IndexType.HASH)
-        r.ft(INDEX_NAME).create_index(fields=schema, definition=definition)
-        logger.info("Created Redis semantic cache index %s", INDEX_NAME)
+            # Missing: ingestion-worker may have bumped the generation and dropped this index.
+            # Re-read it first so the old generation's index is not re-created.
+            generation = self.generation
+            self._refresh_generation(r, force=True)
+            if self.generation != generation:
+                self._ensure_index(r)
+                return
+            definition = IndexDefinition(prefix=[self.key_prefix], index_type=IndexType.HASH)
+            try:
+                r.ft(self.index_name).create_index(
+                    fields=_index_schema(self.embed_dim, self.vector_encoding), definition=definition
+                )
+                logger.info("Created Redis semantic cache index %s", self.index_name)
+            except redis.exceptions.ResponseError as e:
+                # Another pod created it between our FT.INFO and FT.CREATE.
+                if "already exists" not in str(e).lower():
+                    raise
+        self._index_ready = True
 
     def get(self, query_embedding: List[float]) -> Optional[str]:
         if not self._enabled:
             return None
         try:
             r = self._client_or_raise()
+            self._refresh_generation(r)
             self._ensure_index(r)
-            vec_bytes = _embedding_to_bytes(query_embedding)
-            q = (
-                Query("*=>[KNN 1 @vector $vec AS score]")
-                .return_fields("response", "score")
-                .sort_by("score")
-                .paging(0, 1)
-                .dialect(2)
-            )
-            results = r.ft(INDEX_NAME).search(q, query_params={"vec": vec_bytes})
-            if not results.docs:
-                return None
-            doc = results.docs[0]
-            score_str = getattr(doc, "score", None) or getattr(doc, "payload", {}).get("score")
-            if score_str is None:
-                return None
-            similarity = _cosine_distance_to_similarity(str(score_str))
-            if similarity < self.similarity_threshold:
-                return None
-            response = getattr(doc, "response", None)
-            if response is None:
-                return None
-            if isinstance(response, bytes):
-                response = response.decode("utf-8", errors="replace")
-            return response
+            params = {"vec": self.vector_encoding.encode(query_embedding)}
+            query = _knn_query(self.vector_encoding.hnsw_ef_runtime)
+            try:
+                results = r.ft(self.index_name).search(query, query_params=params)
+            except redis.exceptions.ResponseError as e:
+                if not _is_missing_index(e):
+                    raise
+                # Dropped by ingestion-worker: usually because a new generation started.
+                self._index_ready = False
+                self._ensure_index(r)
+                results = r.ft(self.index_name).search(query, query_params=params)
+            return _hit_response(results, self.similarity_threshold)
         except Exception as e:
             logger.warning("Semantic cache get failed: %s", e)
             return None
 
-    def set(self, query_embedding: List[float], response: str) -> None:
+    def set(self, query_embedding: List[float], response: str, sources: Optional[Sequence[str]] = None) -> None:
+        """Store a response; sources (document names) make it invalidatable per source."""
         if not self._enabled:
             return
         try:
             r = self._client_or_raise()
+            self._refresh_generation(r)
             self._ensure_index(r)
-            key = f"{CACHE_PREFIX}{uuid.uuid4().hex}"
-            vec_bytes = _embedding_to_bytes(query_embedding)
-            r.hset(key, mapping={"vector": vec_bytes, "response": response})
+            key = f"{self.key_prefix}{uuid.uuid4().hex}"
+            vec_bytes = self.vector_encoding.encode(query_embedding)
+            r.hset(key, mapping=_entry_mapping(vec_bytes, response, sources))
             r.expire(key, self.ttl_seconds)
+            _index_sources(r, key, sources, self.ttl_seconds)
         except Exception as e:
             logger.warning("Semantic cache set failed: %s", e)
 
@@ -137,13 +351,14 @@ class SemanticCache:
         try:
             r = self._client_or_raise()
             count = 0
-            for key in r.scan_iter(match=f"{CACHE_PREFIX}*", count=100):
+            for key in r.scan_iter(match=f"{self.key_prefix}*", count=100):
                 r.delete(key)
                 count += 1
             try:
-                r.ft(INDEX_NAME).dropindex(delete_documents=False)
+                r.ft(self.index_name).dropindex(delete_documents=False)
             except redis.exceptions.ResponseError:
                 pass
+            self._index_ready = False
             logger.info("Semantic cache flushed (%s keys removed).", count)
         except Exception as e:
             logger.warning("Semantic cache flush failed: %s", e)
@@ -155,3 +370,214 @@ class SemanticCache:
             except Exception:
                 pass
             self._client = None
+
+
+class AsyncSemanticCache:
+    """
+    redis.asyncio semantic cache with the same index layout as SemanticCache.
+
+    The index check (FT.INFO) runs once per generation and is memoized; if a search reports an
+    unknown index (e.g. ingestion-worker started a new generation and dropped the old index) the
+    generation is re-read, the index re-created and the search retried.
+    set_behind() stores off the response path: HSET + EXPIRE go out in one pipelined round trip
+    from a background task, and pending writes are drained by aclose(). With a local (L1) tier,
+    an L1 hit returns without touching Redis.
+    """
+
+    key_prefix = CACHE_PREFIX
+    index_name = INDEX_NAME
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        ttl_seconds: int = 86400,
+        similarity_threshold: float = 0.95,
+        embed_dim: int = 3072,
+        max_connections: int = 32,
+        max_pending_writes: int = 1000,
+        vector_encoding: Optional[VectorEncoding] = None,
+        local: Optional[LocalSemanticCache] = None,
+        generation_refresh_seconds: float = 1.0,
+    ) -> None:
+        self.redis_url = redis_url or ""
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_dim = embed_dim
+        self.vector_encoding = vector_encoding or VectorEncoding()
+        self.generation_refresh_seconds = generation_refresh_seconds
+        self._layout_prefix, self._layout_index = _layout_names(
+            self.key_prefix, self.index_name, self.vector_encoding.layout_suffix(embed_dim)
+        )
+        self.generation = 0
+        self.key_prefix, self.index_name = self._layout_prefix, self._layout_index
+        self._generation_checked_at: Optional[float] = None
+        self.max_connections = max_connections
+        self.max_pending_writes = max_pending_writes
+        self.local = local
+        self._invalidation_epoch: Optional[int] = None
+        self._client: Optional[aioredis.Redis] = None
+        self._enabled = bool(self.redis_url.strip())
+        self._index_ready = False
+        self._index_lock: Optional[asyncio.Lock] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def _client_or_raise(self) -> aioredis.Redis:
+        if not self._enabled:
+            raise RuntimeError("Semantic cache is disabled (no REDIS_URL).")
+        if self._client is None:
+            pool = aioredis.BlockingConnectionPool.from_url(
+                self.redis_url, max_connections=self.max_connections, decode_responses=False
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+        return self._client
+
+    async def _refresh_generation(self, r: aioredis.Redis, force: bool = False) -> None:
+        now = time.monotonic()
+        checked_at = self._generation_checked_at
+        if not force and checked_at is not None and now - checked_at < self.generation_refresh_seconds:
+            return
+        # Mark first so concurrent lookups do not all issue the MGET.
+        self._generation_checked_at = now
+        raw_generation, raw_epoch = await r.mget([GENERATION_KEY, INVALIDATION_EPOCH_KEY])
+        epoch = _parse_generation(raw_epoch)
+        if epoch != self._invalidation_epoch:
+            # Some sources were re-ingested; L1 cannot tell which entries depend on them.
+            if self._invalidation_epoch is not None and self.local is not None:
+                self.local.clear()
+            self._invalidation_epoch = epoch
+        generation = _parse_generation(raw_generation)
+        if generation != self.generation:
+            self.generation = generation
+            self.key_prefix, self.index_name = _generation_names(
+                self._layout_prefix, self._layout_index, generation
+            )
+            self._index_ready = False
+            if self.local is not None:
+                self.local.clear()
+            logger.info("Semantic cache switched to generation %s", generation)
+
+    async def _ensure_index(self, r: aioredis.Redis, recreate: bool = False) -> None:
+        if self._index_ready and not recreate:
+            return
+        if self._index_lock is None:
+            self._index_lock = asyncio.Lock()
+        async with self._index_lock:
+            if self._index_ready and not recreate:
+                return
+            try:
+                await r.ft(self.index_name).info()
+            except redis.exceptions.ResponseError:
+                definition = IndexDefinition(prefix=[self.key_prefix], index_type=IndexType.HASH)
+                try:
+                    await r.ft(self.index_name).create_index(
+                        fields=_index_schema(self.embed_dim, self.vector_encoding), definition=definition
+                    )
+                    logger.info("Created Redis semantic cache index %s", self.index_name)
+                except redis.exceptions.ResponseError as e:
+                    # Another pod created it between our FT.INFO and FT.CREATE.
+                    if "already exists" not in str(e).lower():
+                        raise
+            self._index_ready = True
+
+    async def aget(self, query_embedding: List[float]) -> Optional[str]:
+        if not self._enabled:
+            return None
+        try:
+            # Before the L1 check too, so a new generation also retires local entries.
+            await self._refresh_generation(self._client_or_raise())
+        except Exception as e:
+            logger.warning("Semantic cache generation check failed: %s", e)
+        if self.local is not None:
+            cached = self.local.get(query_embedding)
+            record_local_cache_result(cached is not None)
+            if cached is not None:
+                return cached
+        try:
+            r = self._client_or_raise()
+            await self._ensure_index(r)
+            params = {"vec": self.vector_encoding.encode(query_embedding)}
+            query = _knn_query(self.vector_encoding.hnsw_ef_runtime)
+            try:
+                results = await r.ft(self.index_name).search(query, query_params=params)
+            except redis.exceptions.ResponseError as e:
+                if not _is_missing_index(e):
+                    raise
+                # Dropped by ingestion-worker: usually because a new generation started.
+                self._index_ready = False
+                await self._refresh_generation(r, force=True)
+                await self._ensure_index(r, recreate=True)
+                results = await r.ft(self.index_name).search(query, query_params=params)
+            cached = _hit_response(results, self.similarity_threshold)
+        except Exception as e:
+            logger.warning("Semantic cache get failed: %s", e)
+            return None
+        if cached is not None and self.local is not None:
+            self.local.set(query_embedding, cached)
+        return cached
+
+    async def aset(
+        self, query_embedding: List[float], response: str, sources: Optional[Sequence[str]] = None
+    ) -> None:
+        if not self._enabled:
+            return
+        if self.local is not None:
+            self.local.set(query_embedding, response)
+        await self._astore(query_embedding, response, sources)
+
+    async def _astore(
+        self, query_embedding: List[float], response: str, sources: Optional[Sequence[str]] = None
+    ) -> None:
+        try:
+            r = self._client_or_raise()
+            await self._refresh_generation(r)
+            await self._ensure_index(r)
+            key = f"{self.key_prefix}{uuid.uuid4().hex}"
+            pipe = r.pipeline(transaction=False)
+            vec_bytes = self.vector_encoding.encode(query_embedding)
+            pipe.hset(key, mapping=_entry_mapping(vec_bytes, response, sources))
+            pipe.expire(key, self.ttl_seconds)
+            _index_sources(pipe, key, sources, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Semantic cache set failed: %s", e)
+
+    def set_behind(
+        self, query_embedding: List[float], response: str, sources: Optional[Sequence[str]] = None
+    ) -> Optional[asyncio.Task]:
+        """
+        Store in L1 now and in Redis from a background task (dropped if too many are pending).
+        Returns the store task, or None if nothing was scheduled.
+        """
+        if not self._enabled:
+            return None
+        if self.local is not None:
+            self.local.set(query_embedding, response)
+        if len(self._pending) >= self.max_pending_writes:
+            logger.warning("Semantic cache write-behind queue full; dropping write")
+            return None
+        task = asyncio.create_task(self._astore(query_embedding, response, sources))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def aflush_pending(self, timeout_seconds: float = 5.0) -> None:
+        """Wait for scheduled write-behind stores to finish."""
+        if not self._pending:
+            return
+        _, still_pending = await asyncio.wait(set(self._pending), timeout=timeout_seconds)
+        for task in still_pending:
+            task.cancel()
+
+    async def aclose(self) -> None:
+        await self.aflush_pending()
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+                await self._client.connection_pool.disconnect()
+            except Exception:
+                pass
+            self._client = None
@@ -0,0 +1,224 @@
+"""
+Offline evaluation of semantic cache vector encodings.
+
+Replays labeled query pairs against every (Matryoshka dim, vector type) setting and reports how
+hit precision and recall move relative to full-size FLOAT32. The cache is simulated exactly as
+AsyncSemanticCache queries it: every distinct cached query is stored with VectorEncoding.encode(),
+each lookup takes the single nearest entry by cosine similarity (KNN 1) and counts as a hit when
+it clears the threshold. Search is brute force, so the numbers isolate the encoding; HNSW recall
+(CACHE_HNSW_*) is not part of the measurement.
+
+Input is JSONL, one labeled pair per line:
+
+    {"query": "...", "cached_query": "...", "match": true}
+
+Optional "query_embedding" / "cached_embedding" fields skip the OpenAI call for that text.
+
+    python -m src.semantic_cache_eval pairs.jsonl --dims 0,1024,512,256 --types FLOAT32,FLOAT16,INT8
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.semantic_cache import VECTOR_TYPES, VectorEncoding
+
+Embedder = Callable[[List[str]], List[List[float]]]
+
+
+@dataclass
+class LabeledPairs:
+    """Distinct lookup queries, distinct cached queries and the matching (query, cached) pairs."""
+
+    queries: List[str]
+    cached: List[str]
+    matches: Dict[str, Set[str]]
+    embeddings: Dict[str, List[float]]
+
+
+@dataclass
+class EvalResult:
+    dim: int
+    vector_type: str
+    threshold: float
+    bytes_per_vector: int
+    hits: int
+    correct_hits: int
+    answerable: int
+    precision: float
+    recall: float
+    flipped: int
+
+
+def load_pairs(lines: Sequence[str]) -> LabeledPairs:
+    queries: List[str] = []
+    cached: List[str] = []
+    matches: Dict[str, Set[str]] = {}
+    embeddings: Dict[str, List[float]] = {}
+    seen_cached: Set[str] = set()
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            query, cached_query = str(row["query"]), str(row["cached_query"])
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"line {line_no}: expected query, cached_query and match ({e})") from None
+        if query not in matches:
+            queries.append(query)
+            matches[query] = set()
+        if cached_query not in seen_cached:
+            seen_cached.add(cached_query)
+            cached.append(cached_query)
+        if row.get("match"):
+            matches[query].add(cached_query)
+        for text, field in ((query, "query_embedding"), (cached_query, "cached_embedding")):
+            if row.get(field) is not None:
+                embeddings[text] = list(row[field])
+    return LabeledPairs(queries=queries, cached=cached, matches=matches, embeddings=embeddings)
+
+
+def _embed_missing(pairs: LabeledPairs, embed: Optional[Embedder], batch_size: int = 256) -> None:
+    missing = [text for text in dict.fromkeys(pairs.queries + pairs.cached) if text not in pairs.embeddings]
+    if not missing:
+        return
+    if embed is None:
+        raise ValueError(f"{len(missing)} texts have no embedding and no embedder is configured")
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start : start + batch_size]
+        for text, vector in zip(batch, embed(batch)):
+            pairs.embeddings[text] = list(vector)
+
+
+def _unit_rows(encoding: VectorEncoding, vectors: List[List[float]]) -> np.ndarray:
+    """Stored (encoded, then decoded) vectors as unit rows, i.e. what Redis compares."""
+    rows = np.stack([encoding.decode(encoding.encode(v)) for v in vectors])
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.where(norms > 0, norms, 1.0)
+
+
+def _nearest(encoding: VectorEncoding, pairs: LabeledPairs) -> Tuple[np.ndarray, np.ndarray]:
+    """(index of the nearest cached query, its similarity) for every lookup query."""
+    cached = _unit_rows(encoding, [pairs.embeddings[t] for t in pairs.cached])
+    queries = _unit_rows(encoding, [pairs.embeddings[t] for t in pairs.queries])
+    similarity = queries @ cached.T
+    best = np.argmax(similarity, axis=1)
+    return best, similarity[np.arange(len(best)), best]
+
+
+def evaluate(
+    pairs: LabeledPairs,
+    dims: Sequence[int],
+    vector_types: Sequence[str],
+    thresholds: Sequence[float],
+    embed: Optional[Embedder] = None,
+) -> List[EvalResult]:
+    """Hit precision / recall for every setting; flipped counts hit decisions that differ from FLOAT32 full-dim."""
+    _embed_missing(pairs, embed)
+    if not pairs.queries or not pairs.cached:
+        return []
+    embed_dim = len(pairs.embeddings[pairs.cached[0]])
+    answerable = sum(1 for q in pairs.queries if pairs.matches[q])
+    baseline_best, baseline_sim = _nearest(VectorEncoding(), pairs)
+
+    results: List[EvalResult] = []
+    for dim in dims:
+        for vector_type in vector_types:
+            encoding = VectorEncoding(dim=dim, vector_type=vector_type)
+            best, sim = _nearest(encoding, pairs)
+            bytes_per_vector = len(encoding.encode(pairs.embeddings[pairs.cached[0]]))
+            for threshold in thresholds:
+                hit = sim >= threshold
+                baseline_hit = baseline_sim >= threshold
+                correct = sum(
+                    1
+                    for i, query in enumerate(pairs.queries)
+                    if hit[i] and pairs.cached[best[i]] in pairs.matches[query]
+                )
+                hits = int(hit.sum())
+                flipped = int(np.sum((hit != baseline_hit) | (hit & baseline_hit & (best != baseline_best))))
+                results.append(
+                    EvalResult(
+                        dim=encoding.index_dim(embed_dim),
+                        vector_type=vector_type,
+                        threshold=threshold,
+                        bytes_per_vector=bytes_per_vector,
+                        hits=hits,
+                        correct_hits=correct,
+                        answerable=answerable,
+                        precision=correct / hits if hits else 1.0,
+                        recall=correct / answerable if answerable else 1.0,
+                        flipped=flipped,
+                    )
+                )
+    return results
+
+
+def format_table(results: Sequence[EvalResult]) -> str:
+    header = f"{'dim':>5} {'type':<8} {'thresh':>6} {'bytes':>6} {'hits':>5} {'prec':>6} {'recall':>6} {'flipped':>7}"
+    rows = [header, "-" * len(header)]
+    for r in results:
+        rows.append(
+            f"{r.dim:>5} {r.vector_type:<8} {r.threshold:>6.3f} {r.bytes_per_vector:>6} {r.hits:>5} "
+            f"{r.precision:>6.3f} {r.recall:>6.3f} {r.flipped:>7}"
+        )
+    return "\n".join(rows)
+
+
+def _openai_embedder() -> Embedder:
+    from llama_index.embeddings.openai import OpenAIEmbedding
+
+    from src.api.core.config import settings
+
+    if not settings.OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is required to embed pairs without precomputed embeddings")
+    model = OpenAIEmbedding(api_key=settings.OPENAI_API_KEY, model=settings.OPENAI_EMBEDDING_MODEL)
+    return model.get_text_embedding_batch
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from src.api.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Measure semantic cache hit precision/recall per vector encoding.")
+    parser.add_argument("pairs", help="JSONL file of labeled query pairs.")
+    parser.add_argument("--dims", type=_int_list, default=[0, 1024, 512, 256], help="Matryoshka dims (0 = full).")
+    parser.add_argument("--types", default=",".join(VECTOR_TYPES), help="Comma-separated vector types.")
+    parser.add_argument(
+        "--thresholds",
+        type=_float_list,
+        default=[settings.CACHE_SIMILARITY_THRESHOLD],
+        help="Comma-separated similarity thresholds (default: CACHE_SIMILARITY_THRESHOLD).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines instead of a table.")
+    args = parser.parse_args(argv)
+
+    with open(args.pairs, encoding="utf-8") as f:
+        pairs = load_pairs(f.readlines())
+    needs_embedder = any(t not in pairs.embeddings for t in pairs.queries + pairs.cached)
+    results = evaluate(
+        pairs,
+        dims=args.dims,
+        vector_types=[t.strip().upper() for t in args.types.split(",") if t.strip()],
+        thresholds=args.thresholds,
+        embed=_openai_embedder() if needs_embedder else None,
+    )
+    if args.json:
+        for r in results:
+            print(json.dumps(asdict(r)))
+    else:
+        print(format_table(results))
+
+
+if __name__ == "__main__":  # pragma: no cover - manual entrypoint
+    main(sys.argv[1:])
@@ -1,6 +1,7 @@
 """Abstract base class for vector store implementations."""
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 class BaseVectorStore(ABC):
@@ -16,6 +17,47 @@ class BaseVectorStore(ABC):
         """Retrieve top-k documents by similarity to query."""
         pass  # pragma: no cover
 
+    @abstractmethod
+    def retrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        """Retrieve top-k documents by similarity to an already computed query embedding."""
+        pass  # pragma: no cover
+
+    async def aretrieve(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Async variant of retrieve(). Default runs retrieve() in a worker thread."""
+        return await asyncio.to_thread(self.retrieve, query, top_k)
+
+    async def aretrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        """Async variant of retrieve_by_vector(). Default runs it in a worker thread."""
+        return await asyncio.to_thread(self.retrieve_by_vector, query_vector, top_k)
+
+    def retrieve_hybrid(
+        self, query: str, query_vector: Optional[List[float]] = None, top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve top-k documents by keyword + vector scoring. Stores without a keyword index
+        fall back to vector search (reusing query_vector when given).
+        """
+        if query_vector is not None:
+            return self.retrieve_by_vector(query_vector, top_k=top_k)
+        return self.retrieve(query, top_k=top_k)
+
+    async def aretrieve_hybrid(
+        self, query: str, query_vector: Optional[List[float]] = None, top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Async variant of retrieve_hybrid()."""
+        if query_vector is not None:
+            return await self.aretrieve_by_vector(query_vector, top_k=top_k)
+        return await self.aretrieve(query, top_k=top_k)
+
+    @abstractmethod
+    def fetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch documents by chunk id, in the order given; ids no longer stored are skipped."""
+        pass  # pragma: no cover
+
+    async def afetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Async variant of fetch_by_ids(). Default runs it in a worker thread."""
+        return await asyncio.to_thread(self.fetch_by_ids, ids)
+
     @abstractmethod
     def batch_load(self, items: List[Dict[str, Any]]) -> None:
         """Load a batch of items into the vector store."""
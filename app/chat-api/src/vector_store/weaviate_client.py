@@ -4,8 +4,9 @@ from urllib.parse import urlparse
 
 import weaviate
 from llama_index.embeddings.openai import OpenAIEmbedding
-from weaviate.classes.query import MetadataQuery
+from weaviate.classes.query import Filter, HybridFusion, MetadataQuery
 
+from src.embedding_cache import CachedEmbedding
 from src.vector_store.base import BaseVectorStore
 from src.vector_store.schema import init_schema
 
@@ -17,6 +18,28 @@ def _host_port_from_url(url: str) -> tuple[str, int]:
     return host, port
 
 
+HYBRID_FUSION_TYPES = {
+    "relative_score": HybridFusion.RELATIVE_SCORE,
+    "ranked": HybridFusion.RANKED,
+}
+# Only the chunk text is BM25-indexed for hybrid search (see schema.init_schema).
+HYBRID_QUERY_PROPERTIES = ["text"]
+
+
+def _object_to_doc(obj: Any) -> Dict[str, Any]:
+    """Object properties plus its uuid as chunk_id (used by the retrieval cache)."""
+    doc = dict(obj.properties)
+    uuid = getattr(obj, "uuid", None)
+    if uuid is not None:
+        doc["chunk_id"] = str(uuid)
+    return doc
+
+
+def _order_by_ids(objects: List[Any], ids: List[str]) -> List[Dict[str, Any]]:
+    by_id = {str(obj.uuid): obj for obj in objects}
+    return [_object_to_doc(by_id[i]) for i in ids if i in by_id]
+
+
 class WeaviateClient(BaseVectorStore):
     """Weaviate-backed vector store with OpenAI embeddings."""
 
@@ -26,20 +49,45 @@ class WeaviateClient(BaseVectorStore):
         weaviate_class_name: str,
         openai_api_key: str,
         openai_embedding_model: str = "text-embedding-3-large",
+        embedding_cache_max_bytes: int = 0,
+        embedding_cache_ttl_seconds: int = 3600,
+        hybrid_alpha: Optional[float] = None,
+        hybrid_fusion_type: str = "relative_score",
     ) -> None:
+        if hybrid_fusion_type not in HYBRID_FUSION_TYPES:
+            raise ValueError(
+                f"Unknown hybrid fusion type {hybrid_fusion_type!r}; expected one of {list(HYBRID_FUSION_TYPES)}"
+            )
         self.weaviate_url = weaviate_url
         self.class_name = weaviate_class_name
+        # None disables hybrid search: retrieve_hybrid falls back to near_vector.
+        self.hybrid_alpha = hybrid_alpha
+        self.hybrid_fusion_type = HYBRID_FUSION_TYPES[hybrid_fusion_type]
         self.embed_model = OpenAIEmbedding(
             api_key=openai_api_key,
             model=openai_embedding_model,
         )
+        if embedding_cache_max_bytes > 0:
+            self.embed_model = CachedEmbedding(
+                self.embed_model,
+                max_bytes=embedding_cache_max_bytes,
+                ttl_seconds=embedding_cache_ttl_seconds,
+            )
         self.client: Optional[weaviate.WeaviateClient] = None
+        self.async_client: Optional[weaviate.WeaviateAsyncClient] = None
 
     def connect(self) -> weaviate.WeaviateClient:
         host, port = _host_port_from_url(self.weaviate_url)
         self.client = weaviate.connect_to_local(host=host, port=port)
         return self.client
 
+    async def aconnect(self) -> weaviate.WeaviateAsyncClient:
+        """Open the async client used by aretrieve (must run inside the event loop)."""
+        host, port = _host_port_from_url(self.weaviate_url)
+        self.async_client = weaviate.use_async_with_local(host=host, port=port)
+        await self.async_client.connect()
+        return self.async_client
+
     def initialize_schema(self, recreate: bool = False) -> None:
         if self.client is None:
             raise RuntimeError("Connect before calling initialize_schema")
@@ -54,14 +102,94 @@ class WeaviateClient(BaseVectorStore):
 
     def retrieve(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
         query_vector = self.embed_model.get_text_embedding(query)
+        return self.retrieve_by_vector(query_vector, top_k=top_k)
+
+    def retrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
         collection = self.client.collections.use(self.class_name)
         response = collection.query.near_vector(
             near_vector=query_vector,
             limit=top_k,
             return_metadata=MetadataQuery(distance=True),
         )
-        return [obj.properties for obj in response.objects]
+        return [_object_to_doc(obj) for obj in response.objects]
+
+    def retrieve_hybrid(
+        self, query: str, query_vector: Optional[List[float]] = None, top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Server-side BM25 + vector fusion in one call (alpha=1 is pure vector, 0 pure keyword)."""
+        if self.hybrid_alpha is None:
+            return super().retrieve_hybrid(query, query_vector, top_k=top_k)
+        if query_vector is None:
+            query_vector = self.embed_model.get_text_embedding(query)
+        collection = self.client.collections.use(self.class_name)
+        response = collection.query.hybrid(
+            query=query,
+            vector=query_vector,
+            alpha=self.hybrid_alpha,
+            fusion_type=self.hybrid_fusion_type,
+            query_properties=HYBRID_QUERY_PROPERTIES,
+            limit=top_k,
+            return_metadata=MetadataQuery(score=True),
+        )
+        return [_object_to_doc(obj) for obj in response.objects]
+
+    def fetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        collection = self.client.collections.use(self.class_name)
+        response = collection.query.fetch_objects(filters=Filter.by_id().contains_any(ids), limit=len(ids))
+        return _order_by_ids(response.objects, ids)
+
+    async def aretrieve(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        if self.async_client is None:
+            return await super().aretrieve(query, top_k=top_k)
+        query_vector = await self.embed_model.aget_text_embedding(query)
+        return await self.aretrieve_by_vector(query_vector, top_k=top_k)
+
+    async def aretrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        if self.async_client is None:
+            return await super().aretrieve_by_vector(query_vector, top_k=top_k)
+        collection = self.async_client.collections.use(self.class_name)
+        response = await collection.query.near_vector(
+            near_vector=query_vector,
+            limit=top_k,
+            return_metadata=MetadataQuery(distance=True),
+        )
+        return [_object_to_doc(obj) for obj in response.objects]
+
+    async def aretrieve_hybrid(
+        self, query: str, query_vector: Optional[List[float]] = None, top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        if self.hybrid_alpha is None or self.async_client is None:
+            return await super().aretrieve_hybrid(query, query_vector, top_k=top_k)
+        if query_vector is None:
+            query_vector = await self.embed_model.aget_text_embedding(query)
+        collection = self.async_client.collections.use(self.class_name)
+        response = await collection.query.hybrid(
+            query=query,
+            vector=query_vector,
+            alpha=self.hybrid_alpha,
+            fusion_type=self.hybrid_fusion_type,
+            query_properties=HYBRID_QUERY_PROPERTIES,
+            limit=top_k,
+            return_metadata=MetadataQuery(score=True),
+        )
+        return [_object_to_doc(obj) for obj in response.objects]
+
+    async def afetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        if self.async_client is None:
+            return await super().afetch_by_ids(ids)
+        if not ids:
+            return []
+        collection = self.async_client.collections.use(self.class_name)
+        response = await collection.query.fetch_objects(filters=Filter.by_id().contains_any(ids), limit=len(ids))
+        return _order_by_ids(response.objects, ids)
 
     def close(self) -> None:
         if self.client:
             self.client.close()
+
+    async def aclose(self) -> None:
+        if self.async_client:
+            await self.async_client.close()
+            self.async_client = None
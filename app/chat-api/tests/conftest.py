@@ -30,6 +30,13 @@ class InMemoryVectorStore(BaseVectorStore):
         # Ignore similarity, just truncate
         return self._docs[:top_k]
 
+    def retrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        return self._docs[:top_k]
+
+    def fetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        by_id = {d["chunk_id"]: d for d in self._docs if d.get("chunk_id")}
+        return [dict(by_id[i]) for i in ids if i in by_id]
+
     def batch_load(self, items: List[Dict[str, Any]]) -> None:
         self._docs.extend(items)
 
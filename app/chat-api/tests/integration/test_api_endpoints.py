@@ -16,6 +16,15 @@ def test_health_endpoint_reports_online(test_client: TestClient):
     assert "database" in data
 
 
+def test_metrics_endpoint_exposes_pipeline_metrics(test_client: TestClient):
+    resp = test_client.get("/metrics")
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "rag_stage_latency_seconds" in resp.text
+    assert "rag_semantic_cache_requests_total" in resp.text
+
+
 def test_chat_endpoint_websocket(test_client: TestClient):
     dto = ChatDto(
         history=[ChatMessageDto(role=Role.user, content="Hi")],
@@ -0,0 +1,117 @@
+"""Unit tests for chat-api admission control."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from src.api.routers.chat_router import chat_post
+from src.api.services.admission import (
+    REJECT_QUEUE_FULL,
+    REJECT_QUEUE_TIMEOUT,
+    AdmissionController,
+    AdmissionRejected,
+)
+from src.dtos.chat_dto import ChatDto
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_admission_runs_up_to_max_concurrent_then_queues_fifo():
+    admission = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout_seconds=1.0)
+    order = []
+    release = asyncio.Event()
+
+    async def job(name: str) -> None:
+        async with admission.admit():
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(job("a"))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(job("b")), asyncio.create_task(job("c"))]
+    await asyncio.sleep(0)
+
+    assert admission.active == 1
+    assert admission.queue_depth == 2
+    assert _sample("rag_admission_queue_depth") == 2
+
+    release.set()
+    await asyncio.gather(first, *waiters)
+
+    assert order == ["a", "b", "c"]
+    assert admission.active == 0
+    assert admission.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_when_queue_is_full():
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout_seconds=1.0, retry_after_seconds=3)
+    rejected = _sample("rag_admission_rejected_total", reason=REJECT_QUEUE_FULL)
+
+    async with admission.admit():
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with admission.admit():
+                pass
+
+    assert exc_info.value.reason == REJECT_QUEUE_FULL
+    assert exc_info.value.retry_after_seconds == 3
+    assert _sample("rag_admission_rejected_total", reason=REJECT_QUEUE_FULL) == rejected + 1
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_after_queue_time_budget_and_frees_queue_slot():
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_seconds=0.02)
+
+    async with admission.admit():
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with admission.admit():
+                pass
+        assert admission.queue_depth == 0
+
+    assert exc_info.value.reason == REJECT_QUEUE_TIMEOUT
+    assert admission.active == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_cancelled_waiter_does_not_leak_slot():
+    admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_seconds=1.0)
+
+    async def wait_for_slot() -> None:
+        async with admission.admit():
+            pass
+
+    async with admission.admit():
+        waiter = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    assert admission.active == 0
+    async with admission.admit():
+        assert admission.active == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_post_returns_503_with_retry_after_when_busy():
+    admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout_seconds=1.0, retry_after_seconds=5)
+    state = SimpleNamespace(
+        db=None,
+        llm=None,
+        first_reranker=None,
+        second_reranker=None,
+        admission=admission,
+    )
+    request = SimpleNamespace(app=SimpleNamespace(state=state))
+
+    async with admission.admit():
+        with pytest.raises(HTTPException) as exc_info:
+            await chat_post(request, ChatDto(history=[], role="user", content="q"))
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "5"}
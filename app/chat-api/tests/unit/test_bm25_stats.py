@@ -0,0 +1,104 @@
+"""Unit tests for the shared legal tokenizer and BM25 corpus statistics artifact."""
+import numpy as np
+import pytest
+
+from code_shared.text import BM25Stats, BM25StatsBuilder, legal_tokenize
+
+
+def test_legal_tokenize_keeps_statute_citations():
+    tokens = legal_tokenize("Violates 18 U.S.C. § 1341(a)(1); see §§ 1343.")
+
+    assert tokens == ["violates", "18", "usc", "§1341", "1341(a)(1)", "1341", "see", "§1343", "1343"]
+
+
+def test_legal_tokenize_subsection_markers_and_casefold():
+    assert legal_tokenize("Subsection (b)(2) APPLIES") == ["subsection", "(b)", "(2)", "applies"]
+
+
+def test_bm25_stats_builder_counts_document_frequency_once_per_doc():
+    builder = BM25StatsBuilder()
+    builder.add(["fraud", "fraud", "mail"])
+    builder.add(["fraud"])
+
+    stats = builder.build()
+
+    assert stats.n_docs == 2
+    assert stats.avgdl == 2.0
+    assert stats.df[stats.vocab["fraud"]] == 2
+    assert stats.df[stats.vocab["mail"]] == 1
+    assert np.all(stats.idf() > 0)
+
+
+def test_bm25_stats_round_trip_is_memory_mapped(tmp_path):
+    builder = BM25StatsBuilder()
+    builder.add(["a", "b"])
+    builder.add(["b", "c", "c"])
+    builder.build().save(tmp_path)
+
+    loaded = BM25Stats.load(tmp_path)
+
+    assert isinstance(loaded.df, np.memmap)
+    assert loaded.n_docs == 2 and loaded.total_tokens == 5
+    assert {t: int(loaded.df[i]) for t, i in loaded.vocab.items()} == {"a": 1, "b": 2, "c": 1}
+
+
+def test_bm25_stats_builder_extends_existing_stats(tmp_path):
+    first = BM25StatsBuilder()
+    first.add(["a"])
+    first.build().save(tmp_path)
+
+    builder = BM25StatsBuilder(base=BM25Stats.load(tmp_path))
+    builder.add(["a", "b"])
+    stats = builder.build()
+
+    assert stats.n_docs == 2
+    assert stats.df[stats.vocab["a"]] == 2
+
+
+def test_bm25_stats_builder_remove_undoes_add():
+    builder = BM25StatsBuilder()
+    builder.add(["a", "b"])
+    builder.add(["b", "c", "c"])
+    builder.remove(["b", "c", "c"])
+
+    stats = builder.build()
+
+    assert stats.n_docs == 1 and stats.total_tokens == 2
+    assert {t: int(stats.df[i]) for t, i in stats.vocab.items()} == {"a": 1, "b": 1}
+
+
+def test_bm25_stats_save_switches_versions_with_one_pointer(tmp_path):
+    for n_docs in (1, 2, 3):
+        builder = BM25StatsBuilder()
+        for _ in range(n_docs):
+            builder.add(["a"])
+        builder.build().save(tmp_path)
+
+    current = (tmp_path / "CURRENT").read_text()
+    assert BM25Stats.load(tmp_path).n_docs == 3
+    assert (tmp_path / current / "meta.json").exists()
+    # The previous version stays for readers that resolved CURRENT just before the switch.
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+
+def test_bm25_stats_loads_an_unversioned_artifact(tmp_path):
+    builder = BM25StatsBuilder()
+    builder.add(["a"])
+    builder.build().save(tmp_path)
+    version = tmp_path / (tmp_path / "CURRENT").read_text()
+    for path in version.iterdir():
+        path.rename(tmp_path / path.name)
+    (tmp_path / "CURRENT").unlink()
+
+    assert BM25Stats.exists(tmp_path)
+    assert BM25Stats.load(tmp_path).n_docs == 1
+    assert not BM25Stats.exists(tmp_path / "missing")
+
+
+def test_bm25_stats_load_rejects_unknown_version(tmp_path):
+    BM25StatsBuilder().build().save(tmp_path)
+    version = tmp_path / (tmp_path / "CURRENT").read_text()
+    (version / "meta.json").write_text('{"version": 99, "n_docs": 0, "total_tokens": 0}')
+
+    with pytest.raises(ValueError, match="version"):
+        BM25Stats.load(tmp_path)
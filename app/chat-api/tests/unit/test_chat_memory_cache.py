@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.chat_memory.cache import RecentMessagesCache
+from src.chat_memory.models import ChatMessageRecord
+from src.chat_memory.service import ChatMemoryService
+from src.chat_memory.store import InMemoryChatMemoryStore
+
+_T0 = datetime(2025, 3, 1, 12, 0, 0)
+
+
+def _msg(session_id, i):
+    return ChatMessageRecord(
+        session_id=session_id,
+        role="user" if i % 2 == 0 else "assistant",
+        content=f"m{i}",
+        timestamp=_T0 + timedelta(seconds=i),
+    )
+
+
+def test_short_incomplete_entry_is_a_miss_but_complete_one_hits():
+    cache = RecentMessagesCache(max_messages=10)
+    cache.put("a", [_msg("a", 0), _msg("a", 1)], complete=False)
+    cache.put("b", [_msg("b", 0), _msg("b", 1)], complete=True)
+
+    assert cache.get("a", limit=5) is None
+    assert [m.content for m in cache.get("a", limit=2)] == ["m0", "m1"]
+    assert [m.content for m in cache.get("b", limit=5)] == ["m0", "m1"]
+
+
+def test_append_keeps_cached_tail_coherent_and_bounded():
+    cache = RecentMessagesCache(max_messages=3)
+    cache.put("s", [_msg("s", 0), _msg("s", 1)], complete=True)
+    cache.append([_msg("s", 2), _msg("s", 3), _msg("other", 4)])
+
+    assert [m.content for m in cache.get("s", limit=3)] == ["m1", "m2", "m3"]
+    # m0 was trimmed, so a longer read must go to the store.
+    assert cache.get("s", limit=4) is None
+    assert cache.get("other", limit=1) is None
+
+
+def test_duplicate_append_is_ignored_and_out_of_order_append_invalidates():
+    cache = RecentMessagesCache()
+    cache.put("s", [_msg("s", 0), _msg("s", 2)], complete=True)
+    cache.append([_msg("s", 2)])
+    assert len(cache.get("s", limit=10)) == 2
+
+    cache.append([_msg("s", 1)])
+    assert cache.get("s", limit=10) is None
+
+
+def test_least_recently_used_session_is_evicted():
+    cache = RecentMessagesCache(max_sessions=2)
+    cache.put("a", [_msg("a", 0)], complete=True)
+    cache.put("b", [_msg("b", 0)], complete=True)
+    cache.get("a", limit=1)
+    cache.put("c", [_msg("c", 0)], complete=True)
+
+    assert cache.get("b", limit=1) is None
+    assert cache.get("a", limit=1) is not None
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    import src.chat_memory.cache as cache_module
+
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = RecentMessagesCache(ttl_seconds=10)
+    cache.put("s", [_msg("s", 0)], complete=True)
+    now[0] = 111.0
+    assert cache.get("s", limit=1) is None
+
+
+class _CountingStore(InMemoryChatMemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self.freshness_reads = 0
+
+    async def aget_recent_messages(self, session_id, limit=20):
+        self.reads += 1
+        return await super().aget_recent_messages(session_id, limit)
+
+    async def aget_latest_timestamp(self, session_id):
+        self.freshness_reads += 1
+        return await super().aget_latest_timestamp(session_id)
+
+
+@pytest.mark.asyncio
+async def test_active_conversation_reads_history_without_store_round_trips():
+    store = _CountingStore()
+    service = ChatMemoryService(store, recent_cache=RecentMessagesCache())
+
+    assert await service.aget_context("s", limit=20) == []
+    for turn in range(3):
+        await service.aappend_exchange("s", f"q{turn}", f"a{turn}")
+        history = await service.aget_context("s", limit=20)
+        assert [m.content for m in history][-2:] == [f"q{turn}", f"a{turn}"]
+
+    assert store.reads == 1
+    assert store.freshness_reads == 0
+    assert len(history) == 6
+
+
+@pytest.mark.asyncio
+async def test_validated_cache_picks_up_a_turn_appended_on_another_pod():
+    store = _CountingStore()
+    this_pod = ChatMemoryService(store, recent_cache=RecentMessagesCache(), validate_cache=True)
+    other_pod = ChatMemoryService(store, recent_cache=RecentMessagesCache())
+
+    await this_pod.aappend_exchange("s", "q0", "a0")
+    assert [m.content for m in await this_pod.aget_context("s")] == ["q0", "a0"]
+
+    await other_pod.aappend_exchange("s", "q1", "a1")
+    history = await this_pod.aget_context("s")
+
+    assert [m.content for m in history] == ["q0", "a0", "q1", "a1"]
+    assert store.reads == 2
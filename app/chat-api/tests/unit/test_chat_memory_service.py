@@ -1,8 +1,19 @@
+import asyncio
+import threading
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 
-from src.chat_memory.models import ChatMessageRecord
+import pytest
+
+import src.chat_memory.store as store_module
+from src.chat_memory.models import ChatMessageRecord, SessionSummary
 from src.chat_memory.service import ChatMemoryService
-from src.chat_memory.store import InMemoryChatMemoryStore
+from src.chat_memory.store import (
+    CassandraChatMemoryStore,
+    InMemoryChatMemoryStore,
+    decode_page_token,
+    encode_page_token,
+)
 
 
 def test_chat_memory_service_appends_and_reads_back_in_order():
@@ -39,3 +50,347 @@ def test_chat_memory_service_appends_and_reads_back_in_order():
     contents = [m.content for m in messages]
     assert contents == ["old user", "old assistant", "new user", "new assistant"]
 
+
+def test_append_exchange_gives_each_message_its_own_timestamp():
+    store = InMemoryChatMemoryStore()
+    ChatMemoryService(store).append_exchange("s", "q", "a")
+
+    user, assistant = store.get_recent_messages("s")
+    assert assistant.timestamp > user.timestamp
+
+
+def test_in_memory_store_reads_the_tail_of_a_bounded_ring():
+    store = InMemoryChatMemoryStore(max_messages_per_session=4)
+    base = datetime(2025, 3, 1, 12, 0, 0)
+    store.append_messages(
+        [
+            ChatMessageRecord(session_id="s", role="user", content=f"m{i}", timestamp=base + timedelta(seconds=i))
+            for i in (0, 1, 2, 4, 5)
+        ]
+    )
+    # A late arrival is slotted into timestamp order.
+    store.append_messages(
+        [ChatMessageRecord(session_id="s", role="user", content="m3", timestamp=base + timedelta(seconds=3))]
+    )
+    assert [m.content for m in store.get_recent_messages("s", limit=3)] == ["m3", "m4", "m5"]
+    assert [m.content for m in store.get_recent_messages("s", limit=10)] == ["m2", "m3", "m4", "m5"]
+    assert store.get_recent_messages("missing") == []
+
+
+def test_user_sessions_are_listed_newest_first_with_paging():
+    store = InMemoryChatMemoryStore()
+    service = ChatMemoryService(store)
+    for i in range(5):
+        service.append_exchange(f"alice:s{i}", f"question {i}", f"answer {i}", user_id="alice")
+    service.append_exchange("bob:s0", "other", "reply", user_id="bob")
+    service.append_exchange("anonymous", "q", "a")
+
+    first = service.list_user_sessions("alice", limit=2)
+    assert [s.session_id for s in first.sessions] == ["alice:s4", "alice:s3"]
+    assert first.sessions[0].title == "question 4"
+    assert first.sessions[0].preview == "answer 4"
+
+    second = service.list_user_sessions("alice", limit=2, page_token=first.next_page_token)
+    third = service.list_user_sessions("alice", limit=2, page_token=second.next_page_token)
+    assert [s.session_id for s in second.sessions] == ["alice:s2", "alice:s1"]
+    assert [s.session_id for s in third.sessions] == ["alice:s0"]
+    assert third.next_page_token is None
+    assert [s.session_id for s in service.list_user_sessions("bob").sessions] == ["bob:s0"]
+
+
+def test_user_session_moves_to_front_and_keeps_its_title():
+    store = InMemoryChatMemoryStore()
+    service = ChatMemoryService(store)
+    service.append_exchange("alice:a", "first question", "first answer", user_id="alice")
+    service.append_exchange("alice:b", "other", "other answer", user_id="alice")
+    service.append_exchange("alice:a", "follow-up", "  second\n answer ", user_id="alice")
+
+    sessions = service.list_user_sessions("alice").sessions
+    assert [s.session_id for s in sessions] == ["alice:a", "alice:b"]
+    assert sessions[0].title == "first question"
+    assert sessions[0].preview == "second answer"
+
+
+def test_replayed_older_message_does_not_move_session_back():
+    store = InMemoryChatMemoryStore()
+    late = datetime(2025, 3, 1, 11, 0, 0)
+
+    def message(content, timestamp):
+        return ChatMessageRecord(session_id="u:s", user_id="u", role="user", content=content, timestamp=timestamp)
+
+    store.append_messages([message("new", late)])
+    store.append_messages([message("old replayed", late.replace(hour=10))])
+
+    (summary,) = store.list_user_sessions("u").sessions
+    assert (summary.updated_at, summary.preview) == (late, "new")
+    assert [m.content for m in store.get_recent_messages("u:s")] == ["old replayed", "new"]
+
+
+def test_page_token_round_trip_and_rejects_garbage():
+    ts = datetime(2025, 3, 1, 12, 0, 5, 123000)
+    assert decode_page_token(encode_page_token(ts, "u:s")) == (ts, "u:s")
+    with pytest.raises(ValueError):
+        decode_page_token("not-a-token")
+
+
+class _FakeResponseFuture:
+    """Completes from a separate thread, like the driver's event loop thread."""
+
+    def __init__(self, rows=None, error=None):
+        self._rows = rows if rows is not None else []
+        self._error = error
+
+    def add_callbacks(self, callback, errback):
+        if self._error is not None:
+            threading.Thread(target=errback, args=(self._error,)).start()
+        else:
+            threading.Thread(target=callback, args=(self._rows,)).start()
+
+
+class _FakeSession:
+    def __init__(self):
+        self.prepared = []
+        self.executed = []
+        self.rows = []
+        self.error = None
+        # Outcomes of conditional (IF ...) statements, in order; they apply once this runs out.
+        self.claims = []
+
+    def _result(self, statement):
+        if " IF " in getattr(statement, "query_string", ""):
+            return [SimpleNamespace(applied=self.claims.pop(0) if self.claims else True)]
+        return self.rows
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+        return self._result(statement)
+
+    def execute_async(self, statement, params=None):
+        self.executed.append((statement, params))
+        return _FakeResponseFuture(self._result(statement), self.error)
+
+    def prepare(self, query):
+        self.prepared.append(query)
+        return SimpleNamespace(query_string=query)
+
+    def set_keyspace(self, keyspace):
+        pass
+
+
+class _FakeBatch:
+    def __init__(self, batch_type=None):
+        self.batch_type = batch_type
+        self.statements = []
+
+    def add(self, statement, params):
+        self.statements.append((statement.query_string, params))
+
+
+@pytest.fixture
+def cassandra_store(monkeypatch):
+    session = _FakeSession()
+    sessions_table = SimpleNamespace(columns={"session_id": None, "updated_at": None, "title": None})
+    metadata = SimpleNamespace(keyspaces={"chat_memory": SimpleNamespace(tables={"sessions": sessions_table})})
+    cluster = SimpleNamespace(connect=lambda: session, shutdown=lambda: None, metadata=metadata)
+    monkeypatch.setattr(store_module, "Cluster", lambda hosts: cluster)
+    monkeypatch.setattr(store_module, "BatchStatement", _FakeBatch)
+    monkeypatch.setattr(store_module, "BatchType", SimpleNamespace(UNLOGGED="UNLOGGED"))
+    store = CassandraChatMemoryStore()
+    session.executed.clear()
+    return store, session
+
+
+@pytest.mark.asyncio
+async def test_cassandra_append_exchange_is_one_unlogged_batch(cassandra_store):
+    store, session = cassandra_store
+    await ChatMemoryService(store).aappend_exchange("u:s1", "question", "answer")
+
+    assert len(session.executed) == 1
+    batch, params = session.executed[0]
+    assert params is None
+    assert batch.batch_type == "UNLOGGED"
+    queries = [query for query, _ in batch.statements]
+    assert [q.split(" (")[0] for q in queries] == [
+        "INSERT INTO messages",
+        "INSERT INTO messages",
+        "INSERT INTO sessions",
+    ]
+    assistant_ts = batch.statements[1][1][1]
+    assert batch.statements[2][1][:2] == ("u:s1", assistant_ts)
+    # updated_at doubles as the cell timestamp, so a replayed older write cannot win.
+    assert batch.statements[2][1][2] == store_module._write_time(assistant_ts)
+
+
+@pytest.mark.asyncio
+async def test_cassandra_owned_session_moves_its_index_row(cassandra_store):
+    store, session = cassandra_store
+    earlier = datetime(2025, 3, 1, 12, 0, 0)
+    session.rows = [SimpleNamespace(updated_at=earlier, title="first question")]
+    await ChatMemoryService(store).aappend_exchange("u:s1", "follow-up", "answer", user_id="u")
+
+    lookup, (messages, _), (index, _) = session.executed
+    assert lookup[0].query_string.startswith("SELECT updated_at, title FROM sessions")
+    assert not any(" IF " in q for q, _ in messages.statements + index.statements)
+    *inserts, (upsert, upsert_params) = messages.statements
+    assert [q.split(" (")[0] for q, _ in inserts] == ["INSERT INTO messages"] * 2
+    updated_at = upsert_params[1]
+    write_time = store_module._write_time(updated_at)
+    assert upsert_params == ("u:s1", updated_at, "first question", write_time)
+    delete, insert = index.statements
+    # The old row is deleted at the new row's timestamp, so a replayed insert cannot revive it.
+    assert delete[0].startswith("DELETE FROM sessions_by_user USING TIMESTAMP")
+    assert delete[1] == (write_time, "u", earlier, "u:s1")
+    assert insert[1] == ("u", updated_at, "u:s1", "first question", "answer", write_time)
+
+
+@pytest.mark.asyncio
+async def test_cassandra_replayed_older_write_does_not_move_the_index_row_back(cassandra_store):
+    store, session = cassandra_store
+    earlier = datetime(2025, 3, 1, 12, 0, 0)
+    session.rows = [SimpleNamespace(updated_at=datetime(2025, 3, 1, 13, 0, 0), title="t")]
+    replayed = ChatMessageRecord(session_id="u:s1", user_id="u", role="user", content="old", timestamp=earlier)
+    await store.aappend_messages([replayed])
+
+    # Messages are still written; the sessions upsert loses on its older timestamp and no index row moves.
+    lookup, (messages, _) = session.executed
+    assert lookup[0].query_string.startswith("SELECT updated_at")
+    assert messages.statements[-1][1][-1] == store_module._write_time(earlier)
+
+
+@pytest.mark.asyncio
+async def test_cassandra_listing_drops_and_deletes_stale_index_rows(cassandra_store):
+    store, session = cassandra_store
+    now = datetime(2025, 3, 1, 12, 0, 0)
+    session.rows = [
+        SimpleNamespace(session_id="u:a", updated_at=now, title="t", preview="new"),
+        SimpleNamespace(session_id="u:b", updated_at=now - timedelta(minutes=1), title="t", preview="p"),
+        SimpleNamespace(session_id="u:a", updated_at=now - timedelta(minutes=2), title="t", preview="old"),
+    ]
+    page = await store.alist_user_sessions("u", limit=5)
+
+    assert [(s.session_id, s.preview) for s in page.sessions] == [("u:a", "new"), ("u:b", "p")]
+    delete, params = session.executed[-1]
+    assert delete.query_string.startswith("DELETE FROM sessions_by_user")
+    assert params == ("u", now - timedelta(minutes=2), "u:a")
+
+
+@pytest.mark.asyncio
+async def test_cassandra_user_sessions_page_from_cursor(cassandra_store):
+    store, session = cassandra_store
+    now = datetime(2025, 3, 1, 12, 0, 0)
+    session.rows = [
+        SimpleNamespace(session_id=f"u:s{i}", updated_at=now - timedelta(minutes=i), title="t", preview="p")
+        for i in range(3)
+    ]
+    page = await store.alist_user_sessions("u", limit=2)
+    assert [s.session_id for s in page.sessions] == ["u:s0", "u:s1"]
+    assert session.executed[-1][1] == ("u", 3)
+
+    await store.alist_user_sessions("u", limit=2, page_token=page.next_page_token)
+    statement, params = session.executed[-1]
+    assert "(updated_at, session_id) < (?, ?)" in statement.query_string
+    assert params == ("u", now - timedelta(minutes=1), "u:s1", 3)
+
+
+@pytest.mark.asyncio
+async def test_cassandra_append_batches_per_session(cassandra_store):
+    store, session = cassandra_store
+    now = datetime.now()
+    await store.aappend_messages(
+        [
+            ChatMessageRecord(session_id="a", role="user", content="1", timestamp=now),
+            ChatMessageRecord(session_id="b", role="user", content="2", timestamp=now),
+        ]
+    )
+    assert sorted(batch.statements[-1][1][0] for batch, _ in session.executed) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_cassandra_async_reads_use_prepared_statements(cassandra_store):
+    store, session = cassandra_store
+    now = datetime.now()
+    # The reversed query returns newest first; the store hands back chronological order.
+    session.rows = [
+        SimpleNamespace(session_id="s", timestamp=now, role="assistant", content="hello"),
+        SimpleNamespace(session_id="s", timestamp=now - timedelta(seconds=1), role="user", content="hi"),
+    ]
+    records = await store.aget_recent_messages("s", limit=5)
+    assert [r.content for r in records] == ["hi", "hello"]
+    statement, params = session.executed[-1]
+    assert statement.query_string.startswith("SELECT session_id, timestamp")
+    assert statement.query_string.endswith("ORDER BY timestamp DESC LIMIT ?")
+    assert params == ("s", 5)
+
+    session.rows = [
+        SimpleNamespace(session_id="old", updated_at=now - timedelta(hours=1)),
+        SimpleNamespace(session_id="new", updated_at=now),
+    ]
+    assert await store.alist_sessions(limit=1) == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_cassandra_async_errors_propagate(cassandra_store):
+    store, session = cassandra_store
+    session.error = RuntimeError("unavailable")
+    with pytest.raises(RuntimeError, match="unavailable"):
+        await store.aget_recent_messages("s")
+
+
+@pytest.mark.asyncio
+async def test_cassandra_reads_do_not_block_the_event_loop(cassandra_store):
+    store, session = cassandra_store
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await store.aget_recent_messages("s")
+    task.cancel()
+    assert ticks > 0
+
+
+@pytest.mark.asyncio
+async def test_cassandra_session_summary_round_trip(cassandra_store):
+    store, session = cassandra_store
+    covered_until = datetime(2025, 3, 1, 12, 0, 0)
+    summary = SessionSummary(session_id="u:s1", text="asked about 18 U.S.C. 1030", covered_until=covered_until)
+    await store.aput_summary(summary)
+
+    statement, params = session.executed[0]
+    assert statement.query_string.startswith("INSERT INTO session_summaries")
+    assert params == ("u:s1", "asked about 18 U.S.C. 1030", covered_until)
+
+    assert await store.aget_summary("u:s1") is None
+    session.rows = [SimpleNamespace(summary="asked about 18 U.S.C. 1030", covered_until=covered_until)]
+    stored = await store.aget_summary("u:s1")
+    assert stored.text == "asked about 18 U.S.C. 1030"
+    assert stored.covered_until == covered_until
+
+
+@pytest.mark.asyncio
+async def test_cassandra_summary_never_moves_covered_until_backwards(cassandra_store):
+    store, session = cassandra_store
+    covered_until = datetime(2025, 3, 1, 12, 0, 0)
+    session.claims = [False, False]
+
+    stored = await store.aput_summary(SessionSummary(session_id="s", text="older", covered_until=covered_until))
+
+    assert stored is False
+    (_, insert_params), (advance, advance_params) = session.executed
+    assert insert_params == ("s", "older", covered_until)
+    assert advance.query_string.endswith("IF covered_until <= ?")
+    assert advance_params == ("older", covered_until, "s", covered_until)
+
+
+def test_in_memory_summary_keeps_the_one_covering_later_turns():
+    store = InMemoryChatMemoryStore()
+    newer = SessionSummary(session_id="s", text="newer", covered_until=datetime(2025, 3, 1, 12, 5))
+
+    assert store.put_summary(newer)
+    assert not store.put_summary(SessionSummary(session_id="s", text="older", covered_until=datetime(2025, 3, 1, 12)))
+    assert store.get_summary("s") == newer
@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.chat_memory.models import ChatMessageRecord
+from src.chat_memory.service import ChatMemoryService
+from src.chat_memory.store import InMemoryChatMemoryStore
+from src.chat_memory.write_behind import ChatMemoryWriteBehind
+
+
+class _FlakyStore(InMemoryChatMemoryStore):
+    """Fails the first `failures` appends; records each batch size it was asked to write."""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.batches = []
+
+    async def aappend_messages(self, messages):
+        self.batches.append(len(messages))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("cassandra unavailable")
+        self.append_messages(messages)
+
+
+def _msg(session_id, content, offset=0):
+    return ChatMessageRecord(
+        session_id=session_id,
+        role="user",
+        content=content,
+        timestamp=datetime(2025, 3, 1, 12, 0, 0) + timedelta(milliseconds=offset),
+    )
+
+
+def _writer(store, **kwargs):
+    kwargs.setdefault("flush_interval_seconds", 0.001)
+    kwargs.setdefault("retry_base_seconds", 0.001)
+    return ChatMemoryWriteBehind(store, **kwargs)
+
+
+async def _wait_drained(writer, timeout=2.0):
+    async with asyncio.timeout(timeout):
+        while writer.pending:
+            await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_exchanges_return_immediately_and_flush_in_micro_batches():
+    store = _FlakyStore()
+    service = ChatMemoryService(store, write_behind=_writer(store))
+
+    for i in range(3):
+        await service.aappend_exchange(f"s{i}", "q", "a")
+    assert store.batches == []
+
+    await service.aclose()
+    assert store.batches == [6]
+    assert [m.role for m in store.get_recent_messages("s0")] == ["user", "assistant"]
+
+
+@pytest.mark.asyncio
+async def test_context_includes_unwritten_messages():
+    store = _FlakyStore()
+    service = ChatMemoryService(store, write_behind=_writer(store, flush_interval_seconds=10))
+    store.append_messages([_msg("s", "older")])
+
+    await service.aappend_exchange("s", "new question", "new answer")
+    contents = [m.content for m in await service.aget_context("s")]
+    assert contents == ["older", "new question", "new answer"]
+    await service.aclose(timeout_seconds=0)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_with_backoff():
+    store = _FlakyStore(failures=2)
+    writer = _writer(store)
+    writer.submit([_msg("s", "hello")])
+    await _wait_drained(writer)
+    await writer.aclose()
+
+    assert store.batches == [1, 1, 1]
+    assert [m.content for m in store.get_recent_messages("s")] == ["hello"]
+
+
+@pytest.mark.asyncio
+async def test_unwritable_batch_spills_to_disk_and_replays(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    store = _FlakyStore(failures=100)
+    writer = _writer(store, max_retries=1, spill_path=str(spill))
+    writer.submit([_msg("s", "one"), _msg("s", "two", offset=1)])
+    await _wait_drained(writer)
+    await writer.aclose()
+    assert len(spill.read_text().splitlines()) == 2
+    assert store.get_recent_messages("s") == []
+
+    # Next process: the spill is replayed before new writes are flushed.
+    store.failures = 0
+    writer = _writer(store, spill_path=str(spill))
+    writer.submit([_msg("s", "three", offset=2)])
+    await writer.aclose()
+    assert [m.content for m in store.get_recent_messages("s")] == ["one", "two", "three"]
+    assert not spill.exists()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_spills_instead_of_growing(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    store = _FlakyStore()
+    writer = _writer(store, max_pending=2, flush_interval_seconds=10, spill_path=str(spill))
+    writer.submit([_msg("s", "a"), _msg("s", "b", offset=1)])
+    writer.submit([_msg("s", "c", offset=2)])
+
+    assert writer.pending == 2
+    # The spill file is written in a worker thread, not inside submit() on the event loop.
+    assert not spill.exists()
+    async with asyncio.timeout(2.0):
+        while not (spill.exists() and spill.read_text().endswith("\n")):
+            await asyncio.sleep(0.001)
+    assert len(spill.read_text().splitlines()) == 1
+    await writer.aclose(timeout_seconds=0)
+    # Whatever was not written is on disk (the overflow may be mid-replay in spill.jsonl.replay).
+    lines = [
+        line
+        for path in (spill, tmp_path / "spill.jsonl.replay")
+        if path.exists()
+        for line in path.read_text().splitlines()
+    ]
+    spilled = {ChatMessageRecord.model_validate_json(line).content for line in lines}
+    written = {m.content for m in store.get_recent_messages("s")}
+    assert spilled | written == {"a", "b", "c"}
+    assert {"a", "b"} <= spilled
+
+
+@pytest.mark.asyncio
+async def test_without_spill_path_unwritable_messages_are_dropped():
+    store = _FlakyStore(failures=100)
+    writer = _writer(store, max_retries=0)
+    writer.submit([_msg("s", "lost")])
+    await _wait_drained(writer)
+    await writer.aclose()
+    assert store.batches == [1]
+    assert store.get_recent_messages("s") == []
@@ -1,19 +1,46 @@
 """Unit tests for chat router helpers."""
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 
-from src.api.routers.chat_router import _get_query_embedding_fn
+import pytest
+
+from src.api.routers.chat_router import _get_query_embedding_fn, _history, _shared_answer
 
 
 def test_get_query_embedding_fn_returns_none_when_embed_model_is_none():
     assert _get_query_embedding_fn(None) is None
 
 
-def test_get_query_embedding_fn_returns_callable_that_calls_get_text_embedding():
+@pytest.mark.asyncio
+async def test_get_query_embedding_fn_returns_async_callable_that_calls_aget_text_embedding():
     mock_embed = MagicMock()
-    mock_embed.get_text_embedding.return_value = [0.1, 0.2]
+    mock_embed.aget_text_embedding = AsyncMock(return_value=[0.1, 0.2])
     fn = _get_query_embedding_fn(mock_embed)
     assert fn is not None
     assert callable(fn)
-    result = fn("hello")
+    result = await fn("hello")
     assert result == [0.1, 0.2]
-    mock_embed.get_text_embedding.assert_called_once_with("hello")
+    mock_embed.aget_text_embedding.assert_awaited_once_with("hello")
+    mock_embed.get_text_embedding.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_history_is_empty_without_compactor_and_on_compactor_error():
+    assert await _history(SimpleNamespace(), "s") == ""
+    failing = MagicMock()
+    failing.abuild = AsyncMock(side_effect=RuntimeError("cassandra down"))
+    assert await _history(SimpleNamespace(history_compactor=failing), "s") == ""
+
+
+@pytest.mark.asyncio
+async def test_shared_answer_bypasses_single_flight_for_turns_with_history():
+    single_flight = MagicMock()
+    single_flight.run = AsyncMock(return_value="shared")
+    app_state = SimpleNamespace(single_flight=single_flight)
+
+    async def generate():
+        return "own"
+
+    assert await _shared_answer(app_state, "q", generate, history="User: earlier") == "own"
+    assert await _shared_answer(app_state, "q", generate) == "shared"
+    single_flight.run.assert_awaited_once()
@@ -0,0 +1,165 @@
+from src.api.services.context_packer import (
+    format_chunk,
+    get_token_counter,
+    pack_context,
+    split_sentences,
+)
+
+
+def _word_count(text: str) -> int:
+    return len(text.split())
+
+
+def test_split_sentences_keeps_legal_provisions_intact():
+    text = "Section 1 applies. (a) The court may order relief; (b) Costs are awarded.\n\nSee 42 U.S.C. 1983."
+
+    assert split_sentences(text) == [
+        "Section 1 applies.",
+        "(a) The court may order relief;",
+        "(b) Costs are awarded.",
+        "See 42 U.S.C. 1983.",
+    ]
+
+
+def test_pack_context_orders_chunks_by_rerank_score():
+    docs = [
+        {"text": "Low relevance.", "source": "low.pdf", "rerank_score": 0.1},
+        {"text": "High relevance.", "source": "high.pdf", "rerank_score": 0.9},
+    ]
+
+    packed = pack_context(docs, max_tokens=1000, count_tokens=_word_count)
+
+    assert packed.context == "\n\n".join(
+        [format_chunk(1, "high.pdf", "High relevance."), format_chunk(2, "low.pdf", "Low relevance.")]
+    )
+    assert packed.chunks_used == 2
+    assert packed.tokens_saved == 0
+
+
+def test_pack_context_drops_sentences_repeated_across_overlapping_chunks():
+    docs = [
+        {"text": "First rule applies. Shared overlap sentence.", "source": "a.pdf"},
+        {"text": "Shared  overlap sentence! Second rule applies.", "source": "a.pdf"},
+    ]
+
+    packed = pack_context(docs, max_tokens=1000, count_tokens=_word_count)
+
+    assert packed.context.count("overlap") == 1
+    assert "Second rule applies." in packed.context
+    assert packed.tokens_saved > 0
+
+
+def test_pack_context_truncates_at_sentence_boundary_within_budget():
+    sentences = [f"Sentence number {i} is here." for i in range(20)]
+    docs = [{"text": " ".join(sentences), "source": "long.pdf", "rerank_score": 1.0}]
+
+    packed = pack_context(docs, max_tokens=30, count_tokens=_word_count)
+
+    assert packed.tokens_used <= 30
+    assert packed.context.endswith("is here.")
+    assert "Sentence number 0 is here." in packed.context
+    assert "Sentence number 19" not in packed.context
+    assert packed.tokens_saved == packed.tokens_unpacked - packed.tokens_used
+
+
+def test_pack_context_keeps_original_separators():
+    text = "The court may order:\n(a) relief;\n(b) costs.\n\nSee 42 U.S.C. 1983. Repeated overlap."
+    docs = [
+        {"text": text, "source": "a.pdf", "rerank_score": 0.9},
+        {"text": "Repeated overlap.\nFresh rule applies;\n\nLast line.", "source": "b.pdf", "rerank_score": 0.5},
+    ]
+
+    packed = pack_context(docs, max_tokens=1000, count_tokens=_word_count)
+
+    # An untouched chunk is its original text; a deduplicated one keeps the separators it had.
+    assert packed.context == "\n\n".join(
+        [format_chunk(1, "a.pdf", text), format_chunk(2, "b.pdf", "Fresh rule applies;\n\nLast line.")]
+    )
+
+
+def test_pack_context_retries_with_one_fewer_sentence_when_the_chunk_overshoots():
+    def count_with_costly_joins(text):
+        # Every newline costs 3 tokens, more than the 1-per-join estimate.
+        return _word_count(text) + 3 * text.count("\n")
+
+    docs = [{"text": "Alpha rule.\nBeta rule.\nGamma rule.", "source": "a.pdf", "rerank_score": 0.9}]
+
+    packed = pack_context(docs, max_tokens=25, count_tokens=count_with_costly_joins)
+
+    # All three sentences pass the estimate but format to 26 tokens; two do fit.
+    assert packed.context == format_chunk(1, "a.pdf", "Alpha rule.\nBeta rule.")
+    assert packed.tokens_used <= 25
+
+
+def test_pack_context_gives_budget_left_after_a_truncated_chunk_to_the_next_one():
+    long_text = " ".join(f"Sentence number {i} is really quite long here." for i in range(5))
+    docs = [
+        {"text": long_text, "source": "a.pdf", "rerank_score": 0.9},
+        {"text": "Delta.", "source": "b.pdf", "rerank_score": 0.5},
+    ]
+
+    packed = pack_context(docs, max_tokens=30, count_tokens=_word_count)
+
+    assert packed.chunks_used == 2
+    assert "Sentence number 1 is" in packed.context and "Sentence number 2" not in packed.context
+    assert packed.context.endswith(format_chunk(2, "b.pdf", "Delta."))
+    assert packed.tokens_used <= 30
+
+
+def test_pack_context_stops_when_budget_exhausted():
+    docs = [
+        {"text": "one two three four five.", "source": "a.pdf", "rerank_score": 0.9},
+        {"text": "six seven eight nine ten.", "source": "b.pdf", "rerank_score": 0.5},
+    ]
+
+    packed = pack_context(docs, max_tokens=12, count_tokens=_word_count)
+
+    assert packed.chunks_used == 1
+    assert "a.pdf" in packed.context
+    assert "b.pdf" not in packed.context
+
+
+def test_pack_context_skips_chunk_whose_first_sentence_exceeds_budget():
+    docs = [
+        {"text": " ".join(["word"] * 50) + ".", "source": "long.pdf", "rerank_score": 0.9},
+        {"text": "Short rule applies.", "source": "short.pdf", "rerank_score": 0.5},
+    ]
+
+    packed = pack_context(docs, max_tokens=20, count_tokens=_word_count)
+
+    assert packed.context == format_chunk(1, "short.pdf", "Short rule applies.")
+    assert packed.chunks_used == 1
+
+
+def test_pack_context_cuts_oversized_top_chunk_at_word_boundary_as_last_resort():
+    docs = [{"text": " ".join(f"w{i}" for i in range(50)) + ".", "source": "long.pdf", "rerank_score": 0.9}]
+
+    packed = pack_context(docs, max_tokens=20, count_tokens=_word_count)
+
+    assert packed.context == format_chunk(1, "long.pdf", " ".join(f"w{i}" for i in range(15)))
+    assert packed.tokens_used == 20
+    assert packed.chunks_used == 1
+
+
+def test_pack_context_with_no_docs_is_empty():
+    packed = pack_context([], max_tokens=100)
+
+    assert packed.context == ""
+    assert packed.tokens_used == 0
+    assert packed.tokens_saved == 0
+
+
+def test_get_token_counter_falls_back_to_approximation(monkeypatch):
+    import tiktoken
+
+    def _unavailable(*args, **kwargs):
+        raise OSError("no network")
+
+    get_token_counter.cache_clear()
+    monkeypatch.setattr(tiktoken, "encoding_for_model", _unavailable)
+    monkeypatch.setattr(tiktoken, "get_encoding", _unavailable)
+    try:
+        count = get_token_counter("gpt-test")
+        assert count("abcdefgh") == 2
+    finally:
+        get_token_counter.cache_clear()
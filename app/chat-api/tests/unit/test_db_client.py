@@ -2,16 +2,24 @@ from typing import Any, Dict, List
 
 import pytest
 
+from weaviate.classes.query import HybridFusion
+
 from src.api.core.config import settings
 from src.vector_store.weaviate_client import WeaviateClient
 
 
+_ID_1 = "00000000-0000-0000-0000-000000000001"
+_ID_2 = "00000000-0000-0000-0000-000000000002"
+_ID_MISSING = "00000000-0000-0000-0000-0000000000ff"
+
+
 class _FakeWeaviateCollection:
     def __init__(self) -> None:
         self.deleted: List[str] = []
         self.used_class_names: List[str] = []
         self.created_class_names: List[str] = []
         self.batched_objects: List[Dict[str, Any]] = []
+        self.hybrid_calls: List[Dict[str, Any]] = []
         # In real client, `batch` and `query` are attributes that expose
         # further methods (dynamic, near_vector), so we model that by
         # pointing them at self.
@@ -31,6 +39,7 @@ class _FakeWeaviateCollection:
     def create(self, name: str, **kwargs) -> None:
         """Fake create for init_schema (name, properties, vector_config)."""
         self.created_class_names.append(name)
+        self.create_kwargs = kwargs
 
     def use(self, class_name: str):
         self.used_class_names.append(class_name)
@@ -44,6 +53,18 @@ class _FakeWeaviateCollection:
         # Echo back a single object so that retrieve can unwrap it.
         return _Resp([{"text": "dummy", "source": "test.pdf"}])
 
+    def hybrid(self, query, **kwargs):
+        self.hybrid_calls.append({"query": query, **kwargs})
+        return type("R", (), {"objects": [type("O", (), {"properties": {"text": "hybrid", "source": "h.pdf"}})]})()
+
+    def fetch_objects(self, filters=None, limit: int = 10):
+        self.fetch_filters = filters
+        objects = [
+            type("O", (), {"uuid": _ID_2, "properties": {"text": "second", "source": "b.pdf"}}),
+            type("O", (), {"uuid": _ID_1, "properties": {"text": "first", "source": "a.pdf"}}),
+        ]
+        return type("R", (), {"objects": objects})()
+
     def dynamic(self):
         return self
 
@@ -59,6 +80,36 @@ class _FakeWeaviateCollection:
         self.batched_objects.append(item)
 
 
+class _FakeAsyncQuery:
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, Any]] = []
+        self.query = self
+
+    def use(self, class_name: str):
+        return self
+
+    async def hybrid(self, query, **kwargs):
+        self.calls.append({"hybrid": query, "vector": kwargs["vector"], "limit": kwargs["limit"]})
+        return type("R", (), {"objects": [type("O", (), {"properties": {"text": "async-hybrid", "source": "h.pdf"}})]})()
+
+    async def near_vector(self, near_vector, limit: int, return_metadata=None):
+        self.calls.append({"near_vector": near_vector, "limit": limit})
+        return type("R", (), {"objects": [type("O", (), {"properties": {"text": "async", "source": "a.pdf"}})]})()
+
+
+class _FakeWeaviateAsyncClient:
+    def __init__(self) -> None:
+        self.collections = _FakeAsyncQuery()
+        self.connected = False
+        self.closed = False
+
+    async def connect(self) -> None:
+        self.connected = True
+
+    async def close(self) -> None:
+        self.closed = True
+
+
 class _FakeWeaviateClient:
     def __init__(self) -> None:
         self.collections = _FakeWeaviateCollection()
@@ -76,6 +127,10 @@ class _FakeEmbedModel:
         self.calls.append(text)
         return [0.1, 0.2, 0.3]
 
+    async def aget_text_embedding(self, text: str) -> list[float]:
+        self.calls.append(f"async:{text}")
+        return [0.4, 0.5, 0.6]
+
 
 @pytest.fixture
 def patched_weaviate(monkeypatch: pytest.MonkeyPatch):
@@ -132,6 +187,42 @@ def test_weaviate_client_batch_load_and_retrieve(patched_weaviate):
     assert results[0]["text"] == "dummy"
 
 
+def test_weaviate_client_retrieve_by_vector_skips_embedding(patched_weaviate):
+    _, fake_embed = patched_weaviate
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+    )
+    client.connect()
+
+    results = client.retrieve_by_vector([0.1, 0.2, 0.3], top_k=1)
+
+    assert results[0]["text"] == "dummy"
+    assert fake_embed.calls == []
+
+
+def test_weaviate_client_wraps_embed_model_with_cache_when_budget_set(patched_weaviate):
+    _, fake_embed = patched_weaviate
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+        embedding_cache_max_bytes=1024 * 1024,
+    )
+    client.connect()
+
+    client.retrieve("query text", top_k=1)
+    client.retrieve("query text", top_k=1)
+
+    assert fake_embed.calls == ["query text"]
+    assert client.embed_model.stats()["hits"] == 1
+
+
 def test_weaviate_client_initialize_schema_is_callable(patched_weaviate):
     fake_client, _ = patched_weaviate
 
@@ -145,6 +236,9 @@ def test_weaviate_client_initialize_schema_is_callable(patched_weaviate):
 
     client.initialize_schema(recreate=False)
     assert settings.WEAVIATE_CLASS_NAME in fake_client.collections.created_class_names
+    text_property = fake_client.collections.create_kwargs["properties"][0]
+    assert text_property.name == "text" and text_property.indexSearchable is True
+    assert fake_client.collections.create_kwargs["inverted_index_config"] is not None
 
     # Recreate=True when collection exists: delete then create (covers schema delete branch)
     client.initialize_schema(recreate=True)
@@ -166,3 +260,172 @@ def test_weaviate_client_initialize_schema_raises_without_connect(patched_weavia
     with pytest.raises(RuntimeError, match="Connect before calling initialize_schema"):
         client.initialize_schema(recreate=True)
 
+
+@pytest.mark.asyncio
+async def test_weaviate_client_aretrieve_uses_async_client(patched_weaviate, monkeypatch: pytest.MonkeyPatch):
+    _, fake_embed = patched_weaviate
+    fake_async = _FakeWeaviateAsyncClient()
+    monkeypatch.setattr(
+        "src.vector_store.weaviate_client.weaviate.use_async_with_local",
+        lambda *args, **kwargs: fake_async,
+    )
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+    )
+    await client.aconnect()
+    assert fake_async.connected is True
+
+    results = await client.aretrieve("query text", top_k=4)
+
+    assert results == [{"text": "async", "source": "a.pdf"}]
+    assert fake_embed.calls == ["async:query text"]
+    assert fake_async.collections.calls == [{"near_vector": [0.4, 0.5, 0.6], "limit": 4}]
+
+    by_vector = await client.aretrieve_by_vector([0.7], top_k=2)
+    assert by_vector == [{"text": "async", "source": "a.pdf"}]
+    assert fake_embed.calls == ["async:query text"]
+
+    await client.aclose()
+    assert fake_async.closed is True
+    assert client.async_client is None
+
+
+@pytest.mark.asyncio
+async def test_weaviate_client_aretrieve_falls_back_to_sync_without_async_client(patched_weaviate):
+    _, fake_embed = patched_weaviate
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+    )
+    client.connect()
+
+    results = await client.aretrieve("query text", top_k=1)
+
+    assert results[0]["text"] == "dummy"
+    assert fake_embed.calls == ["query text"]
+
+    by_vector = await client.aretrieve_by_vector([0.1, 0.2, 0.3], top_k=1)
+    assert by_vector[0]["text"] == "dummy"
+    assert fake_embed.calls == ["query text"]
+
+
+def test_weaviate_client_fetch_by_ids_keeps_requested_order(patched_weaviate):
+    fake_client, _ = patched_weaviate
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+    )
+    client.connect()
+
+    docs = client.fetch_by_ids([_ID_1, _ID_MISSING, _ID_2])
+
+    assert docs == [
+        {"text": "first", "source": "a.pdf", "chunk_id": _ID_1},
+        {"text": "second", "source": "b.pdf", "chunk_id": _ID_2},
+    ]
+    assert fake_client.collections.fetch_filters is not None
+    assert client.fetch_by_ids([]) == []
+
+
+@pytest.mark.asyncio
+async def test_weaviate_client_afetch_by_ids_falls_back_to_sync_without_async_client(patched_weaviate):
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+    )
+    client.connect()
+
+    docs = await client.afetch_by_ids([_ID_2])
+
+    assert docs == [{"text": "second", "source": "b.pdf", "chunk_id": _ID_2}]
+
+
+def test_weaviate_client_retrieve_hybrid_uses_server_side_fusion(patched_weaviate):
+    fake_client, fake_embed = patched_weaviate
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+        hybrid_alpha=0.3,
+        hybrid_fusion_type="ranked",
+    )
+    client.connect()
+
+    results = client.retrieve_hybrid("fraud penalty", [0.9], top_k=7)
+
+    assert results == [{"text": "hybrid", "source": "h.pdf"}]
+    call = fake_client.collections.hybrid_calls[0]
+    assert call["query"] == "fraud penalty"
+    assert call["vector"] == [0.9]
+    assert call["alpha"] == 0.3
+    assert call["fusion_type"] == HybridFusion.RANKED
+    assert call["query_properties"] == ["text"]
+    assert call["limit"] == 7
+    assert fake_embed.calls == []
+
+    client.retrieve_hybrid("no vector", top_k=1)
+    assert fake_embed.calls == ["no vector"]
+
+
+def test_weaviate_client_retrieve_hybrid_falls_back_to_vector_when_disabled(patched_weaviate):
+    fake_client, _ = patched_weaviate
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+    )
+    client.connect()
+
+    results = client.retrieve_hybrid("q", [0.1], top_k=1)
+
+    assert results[0]["text"] == "dummy"
+    assert fake_client.collections.hybrid_calls == []
+
+
+def test_weaviate_client_rejects_unknown_fusion_type(patched_weaviate):
+    with pytest.raises(ValueError, match="fusion type"):
+        WeaviateClient(
+            weaviate_url=settings.WEAVIATE_URL,
+            weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+            openai_api_key="test-key",
+            hybrid_fusion_type="borda",
+        )
+
+
+@pytest.mark.asyncio
+async def test_weaviate_client_aretrieve_hybrid_uses_async_client(patched_weaviate, monkeypatch: pytest.MonkeyPatch):
+    fake_async = _FakeWeaviateAsyncClient()
+    monkeypatch.setattr(
+        "src.vector_store.weaviate_client.weaviate.use_async_with_local",
+        lambda *args, **kwargs: fake_async,
+    )
+
+    client = WeaviateClient(
+        weaviate_url=settings.WEAVIATE_URL,
+        weaviate_class_name=settings.WEAVIATE_CLASS_NAME,
+        openai_api_key="test-key",
+        openai_embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+        hybrid_alpha=0.5,
+    )
+    await client.aconnect()
+
+    results = await client.aretrieve_hybrid("q", [0.2], top_k=3)
+
+    assert results == [{"text": "async-hybrid", "source": "h.pdf"}]
+    assert fake_async.collections.calls == [{"hybrid": "q", "vector": [0.2], "limit": 3}]
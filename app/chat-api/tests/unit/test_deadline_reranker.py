@@ -0,0 +1,198 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from src.api.services import deadline_reranker as dr_module
+from src.api.services.base_reranker import BaseReranker, is_rerank_fallback
+from src.api.services.deadline_reranker import CircuitBreaker, DeadlineReranker
+
+
+def _make_docs(n: int) -> List[Dict[str, Any]]:
+    return [{"text": f"doc {i}", "source": f"s{i}.pdf"} for i in range(n)]
+
+
+class _ScriptedReranker(BaseReranker):
+    """Async rerank calls follow `delays` (seconds, or an exception to raise) in call order."""
+
+    def __init__(self, delays: List[Any]) -> None:
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        step = self.delays.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        return list(reversed(docs))[:2]
+
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        call = self.calls
+        step = self.delays.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        try:
+            await asyncio.sleep(step)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return [dict(doc, call=call) for doc in reversed(docs)][:2]
+
+
+@pytest.fixture
+def fallbacks(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    reasons: List[str] = []
+    monkeypatch.setattr(dr_module, "record_rerank_fallback", reasons.append)
+    return reasons
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_returns_inner_result_within_budget(fallbacks):
+    inner = _ScriptedReranker([0])
+    reranker = DeadlineReranker(inner, budget_seconds=1.0, top_k=2)
+
+    result = await reranker.arerank("q", _make_docs(3))
+
+    assert [d["text"] for d in result] == ["doc 2", "doc 1"]
+    assert fallbacks == []
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_falls_back_to_first_stage_order_on_timeout(fallbacks):
+    inner = _ScriptedReranker([1.0])
+    reranker = DeadlineReranker(inner, budget_seconds=0.02, top_k=2)
+
+    result = await reranker.arerank("q", _make_docs(3))
+
+    assert [d["text"] for d in result] == ["doc 0", "doc 1"]
+    assert is_rerank_fallback(result)
+    assert fallbacks == ["timeout"]
+    assert inner.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_falls_back_on_error(fallbacks):
+    reranker = DeadlineReranker(_ScriptedReranker([RuntimeError("boom")]), budget_seconds=1.0, top_k=1)
+
+    result = await reranker.arerank("q", _make_docs(3))
+
+    assert [d["text"] for d in result] == ["doc 0"]
+    assert fallbacks == ["error"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_hedged_request_wins_and_primary_is_cancelled(monkeypatch, fallbacks):
+    hedges: List[None] = []
+    monkeypatch.setattr(dr_module, "record_rerank_hedge", lambda: hedges.append(None))
+    inner = _ScriptedReranker([1.0, 0])
+    reranker = DeadlineReranker(inner, budget_seconds=0.5, top_k=2, hedge_delay_seconds=0.01)
+
+    result = await reranker.arerank("q", _make_docs(3))
+    # The losing request is cancelled without waiting for it; let the cancellation land.
+    await asyncio.sleep(0)
+
+    assert [d["call"] for d in result] == [2, 2]
+    assert len(hedges) == 1
+    assert inner.cancelled == 1
+    assert fallbacks == []
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_no_hedge_when_primary_is_fast(monkeypatch, fallbacks):
+    hedges: List[None] = []
+    monkeypatch.setattr(dr_module, "record_rerank_hedge", lambda: hedges.append(None))
+    inner = _ScriptedReranker([0])
+    reranker = DeadlineReranker(inner, budget_seconds=0.5, top_k=2, hedge_delay_seconds=0.1)
+
+    await reranker.arerank("q", _make_docs(3))
+
+    assert inner.calls == 1
+    assert hedges == []
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_hedge_survives_primary_error(monkeypatch, fallbacks):
+    monkeypatch.setattr(dr_module, "record_rerank_hedge", lambda: None)
+
+    class _FailsLate(_ScriptedReranker):
+        async def arerank(self, query, docs):
+            if self.calls == 0:
+                self.calls += 1
+                await asyncio.sleep(0.03)
+                raise RuntimeError("primary failed")
+            return await super().arerank(query, docs)
+
+    inner = _FailsLate([0.05])
+    reranker = DeadlineReranker(inner, budget_seconds=0.5, top_k=2, hedge_delay_seconds=0.01)
+
+    result = await reranker.arerank("q", _make_docs(3))
+
+    assert [d["text"] for d in result] == ["doc 2", "doc 1"]
+    assert fallbacks == []
+
+
+@pytest.mark.asyncio
+async def test_deadline_reranker_open_circuit_skips_inner(fallbacks):
+    inner = _ScriptedReranker([RuntimeError("a"), RuntimeError("b")])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=60)
+    reranker = DeadlineReranker(inner, budget_seconds=1.0, top_k=2, breaker=breaker)
+
+    await reranker.arerank("q", _make_docs(3))
+    await reranker.arerank("q", _make_docs(3))
+    result = await reranker.arerank("q", _make_docs(3))
+
+    assert breaker.is_open
+    assert inner.calls == 2
+    assert [d["text"] for d in result] == ["doc 0", "doc 1"]
+    assert fallbacks == ["error", "error", "circuit_open"]
+
+
+def test_circuit_breaker_half_open_trial_closes_or_reopens(monkeypatch: pytest.MonkeyPatch):
+    now = [100.0]
+    monkeypatch.setattr(dr_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=10)
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()
+    # Only one trial call while half-open.
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_trial_releases_the_circuit(fallbacks):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0)
+    breaker.record_failure()
+    reranker = DeadlineReranker(_ScriptedReranker([60, 0]), budget_seconds=120, top_k=2, breaker=breaker)
+
+    trial = asyncio.create_task(reranker.arerank("q", _make_docs(3)))
+    await asyncio.sleep(0.01)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    result = await reranker.arerank("q", _make_docs(3))
+    assert [d["text"] for d in result] == ["doc 2", "doc 1"]
+    assert not is_rerank_fallback(result)
+    assert not breaker.is_open
+
+
+def test_deadline_reranker_sync_path_falls_back_on_error(fallbacks):
+    inner = _ScriptedReranker([RuntimeError("boom"), 0])
+    reranker = DeadlineReranker(inner, budget_seconds=1.0, top_k=2)
+
+    assert [d["text"] for d in reranker.rerank("q", _make_docs(3))] == ["doc 0", "doc 1"]
+    assert [d["text"] for d in reranker.rerank("q", _make_docs(3))] == ["doc 2", "doc 1"]
+    assert fallbacks == ["error"]
@@ -0,0 +1,113 @@
+"""Unit tests for the in-process query embedding cache."""
+from typing import List
+
+import numpy as np
+import pytest
+
+from src import embedding_cache as ec_module
+from src.embedding_cache import CachedEmbedding
+
+
+class _FakeEmbedModel:
+    def __init__(self, dim: int = 4) -> None:
+        self.dim = dim
+        self.calls: List[str] = []
+        self.model_name = "fake-embed"
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        self.calls.append(text)
+        return [float(len(self.calls))] * self.dim
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        return self.get_text_embedding(text)
+
+
+def test_cached_embedding_hits_on_normalized_text():
+    inner = _FakeEmbedModel()
+    cache = CachedEmbedding(inner, max_bytes=10_000, ttl_seconds=60)
+
+    first = cache.get_text_embedding("What is a person under 1 U.S.C. § 1")
+    second = cache.get_text_embedding("  what is a PERSON   under 1 u.s.c. § 1 ")
+
+    assert inner.calls == ["What is a person under 1 U.S.C. § 1"]
+    assert second == first
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["entries"] == 1
+
+
+def test_cached_embedding_stores_float32_and_accounts_bytes():
+    inner = _FakeEmbedModel(dim=8)
+    cache = CachedEmbedding(inner, max_bytes=10_000)
+
+    cache.get_text_embedding("q")
+
+    (_, vector), = cache._entries.values()
+    assert vector.dtype == np.float32
+    assert cache.stats()["bytes_used"] == 8 * 4 + ec_module._ENTRY_OVERHEAD_BYTES
+
+
+def test_cached_embedding_evicts_least_recently_used_within_budget():
+    inner = _FakeEmbedModel(dim=4)
+    entry_size = 4 * 4 + ec_module._ENTRY_OVERHEAD_BYTES
+    cache = CachedEmbedding(inner, max_bytes=2 * entry_size)
+
+    cache.get_text_embedding("a")
+    cache.get_text_embedding("b")
+    cache.get_text_embedding("a")  # refresh a
+    cache.get_text_embedding("c")  # evicts b
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes_used"] <= cache.max_bytes
+    cache.get_text_embedding("a")
+    cache.get_text_embedding("b")
+    assert inner.calls == ["a", "b", "c", "b"]
+
+
+def test_cached_embedding_expires_entries_after_ttl(monkeypatch: pytest.MonkeyPatch):
+    now = [1000.0]
+    monkeypatch.setattr(ec_module.time, "monotonic", lambda: now[0])
+    inner = _FakeEmbedModel()
+    cache = CachedEmbedding(inner, max_bytes=10_000, ttl_seconds=10)
+
+    cache.get_text_embedding("q")
+    now[0] += 11
+    cache.get_text_embedding("q")
+
+    assert inner.calls == ["q", "q"]
+    assert cache.stats()["entries"] == 1
+
+
+def test_cached_embedding_skips_vectors_larger_than_budget():
+    inner = _FakeEmbedModel(dim=1000)
+    cache = CachedEmbedding(inner, max_bytes=100)
+
+    cache.get_text_embedding("q")
+
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes_used"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_async_shares_entries_with_sync():
+    inner = _FakeEmbedModel()
+    cache = CachedEmbedding(inner, max_bytes=10_000)
+
+    sync_vec = cache.get_text_embedding("q")
+    async_vec = await cache.aget_text_embedding("q")
+
+    assert async_vec == sync_vec
+    assert inner.calls == ["q"]
+
+
+def test_cached_embedding_delegates_other_attributes_and_clears():
+    inner = _FakeEmbedModel()
+    cache = CachedEmbedding(inner, max_bytes=10_000)
+    cache.get_text_embedding("q")
+
+    assert cache.model_name == "fake-embed"
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes_used"] == 0
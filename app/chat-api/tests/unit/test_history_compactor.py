@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.api.services.history_compactor import TRUNCATION_NOTE, HistoryCompactor, compact_history
+from src.chat_memory.models import ChatMessageRecord
+from src.chat_memory.service import ChatMemoryService
+from src.chat_memory.store import InMemoryChatMemoryStore
+
+_T0 = datetime(2025, 3, 1, 12, 0, 0)
+
+
+def _turns(session_id, count, words=10):
+    messages = []
+    for turn in range(count):
+        for offset, role in enumerate(("user", "assistant")):
+            messages.append(
+                ChatMessageRecord(
+                    session_id=session_id,
+                    role=role,
+                    content=" ".join([f"{role[0]}{turn}"] * words),
+                    timestamp=_T0 + timedelta(seconds=2 * turn + offset),
+                )
+            )
+    return messages
+
+
+def _words(text):
+    return len(text.split())
+
+
+def test_keeps_newest_whole_turns_within_token_budget():
+    compacted = compact_history(_turns("s", 5), "", _words, max_tokens=70, max_turns=10)
+
+    # Each turn renders to 22 words (+1 separator); three fit in 70.
+    assert [turn[0].content.split()[0] for turn in compacted.turns] == ["u2", "u3", "u4"]
+    assert compacted.tokens <= 70
+    assert compacted.render().startswith("RECENT CONVERSATION:\nUser: u2")
+
+
+def test_summary_counts_against_budget_and_turn_cap_applies():
+    with_summary = compact_history(_turns("s", 5), "earlier questions", _words, max_tokens=70, max_turns=10)
+    assert len(with_summary.turns) == 2
+    assert with_summary.render().startswith("CONVERSATION SUMMARY:\nearlier questions\n\nRECENT CONVERSATION:")
+
+    capped = compact_history(_turns("s", 5), "", _words, max_tokens=10_000, max_turns=1)
+    assert len(capped.turns) == 1
+
+
+class _RecordingSummarizer:
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def __call__(self, previous_summary, new_turns):
+        self.calls.append((previous_summary, new_turns))
+        return f"summary#{len(self.calls)}"
+
+
+async def _service_with(messages):
+    store = InMemoryChatMemoryStore()
+    store.append_messages(messages)
+    return ChatMemoryService(store)
+
+
+@pytest.mark.asyncio
+async def test_fold_summarizes_only_turns_outside_the_verbatim_window():
+    service = await _service_with(_turns("s", 5))
+    summarizer = _RecordingSummarizer()
+    compactor = HistoryCompactor(service, summarizer, count_tokens=_words, max_tokens=70, max_turns=10)
+
+    compactor.schedule_fold("s")
+    await compactor.aclose()
+
+    previous, folded = summarizer.calls[0]
+    assert previous == ""
+    assert "u0" in folded and "a1" in folded and "u2" not in folded
+    summary = await service.aget_summary("s")
+    assert summary.text == "summary#1"
+    assert summary.covered_until == _T0 + timedelta(seconds=3)
+
+    history = await compactor.abuild("s")
+    assert history.startswith("CONVERSATION SUMMARY:\nsummary#1\n\nRECENT CONVERSATION:")
+    assert "u1" not in history
+    assert len(history.split()) <= 70 + 4
+
+
+@pytest.mark.asyncio
+async def test_prompt_history_stays_bounded_as_the_session_grows():
+    service = await _service_with([])
+    summarizer = _RecordingSummarizer()
+    compactor = HistoryCompactor(service, summarizer, count_tokens=_words, max_tokens=60, max_turns=3)
+
+    sizes = []
+    for turn in range(12):
+        sizes.append(len((await compactor.abuild("s")).split()))
+        await service.aappend_exchange("s", " ".join([f"u{turn}"] * 10), " ".join([f"a{turn}"] * 10))
+        compactor.schedule_fold("s")
+        await asyncio.sleep(0)
+    await compactor.aclose()
+
+    assert max(sizes) <= 60 + 4
+    # Each fold passes the previous summary on, so no turn is summarized twice.
+    assert [previous for previous, _ in summarizer.calls[1:]] == [
+        f"summary#{i}" for i in range(1, len(summarizer.calls))
+    ]
+    folded = " ".join(turns for _, turns in summarizer.calls)
+    # All but the two newest turns (still verbatim) were folded, each exactly once.
+    assert [folded.split().count(f"u{turn}") for turn in range(12)] == [10] * 10 + [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_fold_reads_back_past_the_window_and_summarizes_every_turn_once():
+    service = await _service_with(_turns("s", 12))
+    summarizer = _RecordingSummarizer()
+    compactor = HistoryCompactor(
+        service, summarizer, count_tokens=_words, max_tokens=50, max_turns=10, window_messages=6
+    )
+
+    compactor.schedule_fold("s")
+    await compactor.aclose()
+
+    # 20 unsummarized messages outside the two verbatim turns, folded oldest first 6 at a time.
+    assert [previous for previous, _ in summarizer.calls] == ["", "summary#1", "summary#2", "summary#3"]
+    folded = " ".join(turns for _, turns in summarizer.calls)
+    assert [folded.split().count(f"u{turn}") for turn in range(12)] == [10] * 10 + [0, 0]
+    summary = await service.aget_summary("s")
+    assert summary.text == "summary#4"
+    assert summary.covered_until == _T0 + timedelta(seconds=19)
+
+
+@pytest.mark.asyncio
+async def test_fold_backfill_is_capped_and_older_turns_are_marked_covered():
+    service = await _service_with(_turns("s", 12))
+    summarizer = _RecordingSummarizer()
+    compactor = HistoryCompactor(
+        service,
+        summarizer,
+        count_tokens=_words,
+        max_tokens=50,
+        max_turns=10,
+        window_messages=6,
+        max_fold_messages=12,
+    )
+
+    compactor.schedule_fold("s")
+    await compactor.aclose()
+
+    # Only the newest 12 messages are read; the 8 outside the verbatim turns take two calls.
+    assert [previous for previous, _ in summarizer.calls] == [TRUNCATION_NOTE, "summary#1"]
+    folded = " ".join(turns for _, turns in summarizer.calls)
+    assert [folded.split().count(f"u{turn}") for turn in range(12)] == [0] * 6 + [10] * 4 + [0, 0]
+    summary = await service.aget_summary("s")
+    assert summary.text == "summary#2"
+    assert summary.covered_until == _T0 + timedelta(seconds=19)
+
+
+def test_fold_cap_must_cover_the_window():
+    with pytest.raises(ValueError):
+        HistoryCompactor(
+            ChatMemoryService(InMemoryChatMemoryStore()),
+            _RecordingSummarizer(),
+            window_messages=40,
+            max_fold_messages=20,
+        )
+
+
+@pytest.mark.asyncio
+async def test_failed_fold_keeps_previous_summary():
+    service = await _service_with(_turns("s", 5))
+
+    async def failing(previous_summary, new_turns):
+        raise RuntimeError("llm down")
+
+    compactor = HistoryCompactor(service, failing, count_tokens=_words, max_tokens=30, max_turns=10)
+    compactor.schedule_fold("s")
+    await compactor.aclose()
+
+    assert await service.aget_summary("s") is None
+    assert "u4" in await compactor.abuild("s")
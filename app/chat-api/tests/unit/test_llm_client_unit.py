@@ -111,3 +111,42 @@ def test_openai_llm_generate_stream_skips_empty_strings(patch_openai_and_prompts
     llm = OpenAILLM(api_key="fake", model="fake")
     out = list(llm.generate_stream("q", "ctx"))
     assert out == ["x"]
+
+
+class _FakeAsyncOpenAI(_FakeOpenAI):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream_chunks = [
+            type("C", (), {"delta": "a"})(),
+            type("C", (), {"delta": ""})(),
+            type("C", (), {"delta": "b"})(),
+        ]
+
+    async def achat(self, messages):
+        self.chats.append({"messages": messages})
+        return _FakeChatResponse("async-response")
+
+    async def astream_chat(self, messages):
+        async def gen():
+            for chunk in self.stream_chunks:
+                yield chunk
+
+        return gen()
+
+
+@pytest.mark.asyncio
+async def test_openai_llm_agenerate_uses_achat(patch_openai_and_prompts, monkeypatch):
+    monkeypatch.setattr(openai_llm_module, "OpenAI", _FakeAsyncOpenAI)
+    llm = OpenAILLM(api_key="fake", model="fake")
+
+    assert await llm.agenerate("q", "ctx") == "async-response"
+
+
+@pytest.mark.asyncio
+async def test_openai_llm_agenerate_stream_skips_empty_strings(patch_openai_and_prompts, monkeypatch):
+    monkeypatch.setattr(openai_llm_module, "OpenAI", _FakeAsyncOpenAI)
+    llm = OpenAILLM(api_key="fake", model="fake")
+
+    out = [chunk async for chunk in llm.agenerate_stream("q", "ctx")]
+
+    assert out == ["a", "b"]
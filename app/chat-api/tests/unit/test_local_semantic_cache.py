@@ -0,0 +1,71 @@
+"""Unit tests for the in-process (L1) semantic cache."""
+from unittest.mock import patch
+
+import pytest
+
+from src.local_semantic_cache import LocalSemanticCache
+
+
+def _cache(**kwargs) -> LocalSemanticCache:
+    kwargs.setdefault("embed_dim", 3)
+    kwargs.setdefault("similarity_threshold", 0.95)
+    return LocalSemanticCache(**kwargs)
+
+
+def test_get_returns_response_of_similar_query():
+    cache = _cache()
+    cache.set([1.0, 0.0, 0.0], "answer")
+
+    assert cache.get([2.0, 0.05, 0.0]) == "answer"  # scale-invariant cosine
+    assert cache.get([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_near_duplicate_set_overwrites_the_same_slot():
+    cache = _cache()
+    cache.set([1.0, 0.0, 0.0], "old")
+    cache.set([1.0, 0.0, 0.0], "new")
+
+    assert cache.stats()["entries"] == 1
+    assert cache.get([1.0, 0.0, 0.0]) == "new"
+
+
+def test_full_cache_evicts_least_recently_used():
+    cache = _cache(max_entries=2)
+    with patch("src.local_semantic_cache.time.monotonic", side_effect=[1.0, 2.0, 3.0, 4.0, 5.0, 6.0]):
+        cache.set([1.0, 0.0, 0.0], "a")
+        cache.set([0.0, 1.0, 0.0], "b")
+        assert cache.get([1.0, 0.0, 0.0]) == "a"  # "b" is now least recently used
+        cache.set([0.0, 0.0, 1.0], "c")
+        assert cache.get([0.0, 1.0, 0.0]) is None
+        assert cache.get([1.0, 0.0, 0.0]) == "a"
+
+
+def test_expired_entries_miss_and_are_replaced_first():
+    cache = _cache(max_entries=2, ttl_seconds=10)
+    with patch("src.local_semantic_cache.time.monotonic", side_effect=[0.0, 8.0, 12.0, 12.0, 12.0, 12.0]):
+        cache.set([1.0, 0.0, 0.0], "expires")
+        cache.set([0.0, 1.0, 0.0], "live")
+        assert cache.get([1.0, 0.0, 0.0]) is None
+        cache.set([0.0, 0.0, 1.0], "new")
+        assert cache.get([0.0, 1.0, 0.0]) == "live"
+        assert cache.get([0.0, 0.0, 1.0]) == "new"
+
+
+def test_ignores_wrong_dimension_and_zero_vectors():
+    cache = _cache()
+    cache.set([1.0, 0.0], "x")
+    cache.set([0.0, 0.0, 0.0], "x")
+
+    assert cache.stats()["entries"] == 0
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_clear_and_invalid_capacity():
+    cache = _cache()
+    cache.set([1.0, 0.0, 0.0], "a")
+    cache.clear()
+    assert cache.get([1.0, 0.0, 0.0]) is None
+    with pytest.raises(ValueError):
+        LocalSemanticCache(max_entries=0)
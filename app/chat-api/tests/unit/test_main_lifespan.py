@@ -1,5 +1,11 @@
+from unittest.mock import AsyncMock
+
 import pytest
 
+from src.api.services.admission import AdmissionController
+from src.api.services.deadline_reranker import DeadlineReranker
+from src.api.services.single_flight import SingleFlight
+
 from src.api import main as main_module
 
 
@@ -14,6 +20,13 @@ class _FakeDB:
         self.client = True  
         return self
 
+    async def aconnect(self):
+        self.async_connected = True
+        return self
+
+    async def aclose(self):
+        self.async_closed = True
+
     def close(self):
         self.closed = True
         self.client = None
@@ -39,9 +52,15 @@ async def test_lifespan_initializes_and_cleans_up(monkeypatch: pytest.MonkeyPatc
     monkeypatch.setattr(main_module, "WeaviateClient", lambda *args, **kwargs: fake_db)
     monkeypatch.setattr(main_module, "OpenAILLM", lambda *args, **kwargs: _FakeLLM())
     monkeypatch.setattr(main_module, "BM25Reranker", lambda top_k: _FakeReranker(top_k))
-    monkeypatch.setattr(main_module, "CohereReranker", lambda top_k: _FakeReranker(top_k))
+    monkeypatch.setattr(main_module, "TopKReranker", lambda top_k: _FakeReranker(top_k))
+    monkeypatch.setattr(main_module, "CohereReranker", lambda top_k, **kwargs: _FakeReranker(top_k))
     fake_cache = type("_FakeCache", (), {"enabled": False, "close": lambda self: None})()
-    monkeypatch.setattr(main_module, "SemanticCache", lambda *args, **kwargs: fake_cache)
+    fake_async_cache = type(
+        "_FakeAsyncCache", (), {"enabled": False, "aclose": AsyncMock(), "aflush_pending": AsyncMock()}
+    )()
+    monkeypatch.setattr(main_module, "AsyncSemanticCache", lambda *args, **kwargs: fake_async_cache)
+    monkeypatch.setattr(main_module, "RetrievalCache", lambda *args, **kwargs: fake_cache)
+    monkeypatch.setattr(main_module, "get_token_counter", lambda model: len)
 
     app = main_module.app
     # Clear state so lifespan runs real init (other tests' test_client may have set app.state).
@@ -53,11 +72,38 @@ async def test_lifespan_initializes_and_cleans_up(monkeypatch: pytest.MonkeyPatc
         assert app.state.db is fake_db
         assert isinstance(app.state.llm, _FakeLLM)
         assert isinstance(app.state.first_reranker, _FakeReranker)
-        assert isinstance(app.state.second_reranker, _FakeReranker)
-        assert hasattr(app.state, "semantic_cache")
+        assert isinstance(app.state.second_reranker, DeadlineReranker)
+        assert isinstance(app.state.second_reranker.inner, _FakeReranker)
+        assert app.state.semantic_cache is fake_async_cache
+        assert app.state.retrieval_cache is fake_cache
         assert hasattr(app.state, "embed_model")
         assert fake_db.connected is True
+        assert fake_db.async_connected is True
+        assert app.state.count_tokens is len
+        assert isinstance(app.state.admission, AdmissionController)
+        assert isinstance(app.state.single_flight, SingleFlight)
 
     # After lifespan exits, db.close should have been called.
     assert fake_db.closed is True
+    assert fake_db.async_closed is True
+    fake_async_cache.aclose.assert_awaited_once()
+
+
+
+def test_first_stage_reranker_selection(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    from code_shared.text import BM25StatsBuilder
+
+    from src.api.services.reranker_client import BM25Reranker, CorpusBM25Reranker, TopKReranker
+
+    monkeypatch.setattr(main_module.settings, "WEAVIATE_HYBRID_ENABLED", True)
+    assert isinstance(main_module._first_stage_reranker(), TopKReranker)
+
+    monkeypatch.setattr(main_module.settings, "WEAVIATE_HYBRID_ENABLED", False)
+    monkeypatch.setattr(main_module.settings, "BM25_STATS_PATH", str(tmp_path / "missing"))
+    assert isinstance(main_module._first_stage_reranker(), BM25Reranker)
 
+    builder = BM25StatsBuilder()
+    builder.add(["fraud"])
+    builder.build().save(tmp_path)
+    monkeypatch.setattr(main_module.settings, "BM25_STATS_PATH", str(tmp_path))
+    assert isinstance(main_module._first_stage_reranker(), CorpusBM25Reranker)
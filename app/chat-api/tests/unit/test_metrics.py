@@ -0,0 +1,181 @@
+"""Unit tests for RAG pipeline Prometheus metrics."""
+from typing import Any, Dict, List, Optional
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.api.services.rag_pipeline import answer, answer_async, answer_stream
+from src.metrics import observe_stage
+from src.vector_store.base import BaseVectorStore
+from code_shared.llm import BaseLLM
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class _Store(BaseVectorStore):
+    def connect(self) -> None:  # pragma: no cover
+        return None
+
+    def retrieve(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        return [{"text": "t", "source": "s.pdf"}]
+
+    def retrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        return [{"text": "t", "source": "s.pdf"}]
+
+    def fetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:  # pragma: no cover
+        return []
+
+    def batch_load(self, items: List[Dict[str, Any]]) -> None:  # pragma: no cover
+        return None
+
+    def close(self) -> None:  # pragma: no cover
+        return None
+
+
+class _StreamLLM(BaseLLM):
+    def generate(self, query: str, context: str) -> str:
+        return "answer"
+
+    def generate_stream(self, query: str, context: str):
+        yield "a"
+        yield "b"
+        yield "c"
+
+
+class _Passthrough:
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return docs
+
+    async def arerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return docs
+
+
+class _Cache:
+    enabled = True
+
+    def __init__(self, hit: Optional[str]) -> None:
+        self.hit = hit
+
+    def get(self, embedding: List[float]) -> Optional[str]:
+        return self.hit
+
+    def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
+        return None
+
+
+def test_observe_stage_records_latency_and_counts_errors():
+    before_count = _sample("rag_stage_latency_seconds_count", stage="unit_test_stage")
+    before_errors = _sample("rag_pipeline_errors_total", stage="unit_test_stage")
+
+    with observe_stage("unit_test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with observe_stage("unit_test_stage"):
+            raise ValueError("boom")
+
+    assert _sample("rag_stage_latency_seconds_count", stage="unit_test_stage") == before_count + 2
+    assert _sample("rag_pipeline_errors_total", stage="unit_test_stage") == before_errors + 1
+
+
+def test_answer_records_cache_hit_and_miss_and_stage_latencies():
+    hits = _sample("rag_semantic_cache_requests_total", result="hit")
+    misses = _sample("rag_semantic_cache_requests_total", result="miss")
+    retrieves = _sample("rag_stage_latency_seconds_count", stage="retrieve")
+    llm_totals = _sample("rag_stage_latency_seconds_count", stage="llm_total")
+
+    kwargs = dict(
+        db=_Store(),
+        llm=_StreamLLM(),
+        first_reranker=_Passthrough(),
+        second_reranker=_Passthrough(),
+        query="q",
+        get_query_embedding=lambda q: [0.1],
+    )
+    answer(semantic_cache=_Cache(hit="cached"), **kwargs)
+    answer(semantic_cache=_Cache(hit=None), **kwargs)
+
+    assert _sample("rag_semantic_cache_requests_total", result="hit") == hits + 1
+    assert _sample("rag_semantic_cache_requests_total", result="miss") == misses + 1
+    assert _sample("rag_stage_latency_seconds_count", stage="retrieve") == retrieves + 1
+    assert _sample("rag_stage_latency_seconds_count", stage="llm_total") == llm_totals + 1
+
+
+def test_answer_stream_records_first_token_and_completion_tokens():
+    first_tokens = _sample("rag_stage_latency_seconds_count", stage="llm_first_token")
+    tokens = _sample("rag_llm_tokens_total", kind="completion")
+    counted = []
+
+    def count_tokens(text):
+        counted.append(text)
+        return 2
+
+    out = list(
+        answer_stream(
+            db=_Store(),
+            llm=_StreamLLM(),
+            first_reranker=_Passthrough(),
+            second_reranker=_Passthrough(),
+            query="q",
+            count_tokens=count_tokens,
+        )
+    )
+
+    assert out == ["a", "b", "c"]
+    assert _sample("rag_stage_latency_seconds_count", stage="llm_first_token") == first_tokens + 1
+    # The joined answer is counted with the model's tokenizer, not one token per streamed delta.
+    assert counted[-1] == "abc"
+    assert _sample("rag_llm_tokens_total", kind="completion") == tokens + 2
+
+
+def test_answer_records_prompt_and_completion_tokens():
+    prompt = _sample("rag_llm_tokens_total", kind="prompt")
+    completion = _sample("rag_llm_tokens_total", kind="completion")
+    counted = []
+
+    def count_tokens(text):
+        counted.append(text)
+        return 3
+
+    out = answer(
+        db=_Store(),
+        llm=_StreamLLM(),
+        first_reranker=_Passthrough(),
+        second_reranker=_Passthrough(),
+        query="q",
+        count_tokens=count_tokens,
+    )
+
+    assert out == "answer"
+    assert counted[0] == "q"
+    assert "t" in counted[1]  # the packed context
+    assert counted[-1] == "answer"
+    assert _sample("rag_llm_tokens_total", kind="prompt") == prompt + 6
+    assert _sample("rag_llm_tokens_total", kind="completion") == completion + 3
+
+
+@pytest.mark.asyncio
+async def test_answer_async_records_prompt_tokens_with_history_and_completion_tokens():
+    prompt = _sample("rag_llm_tokens_total", kind="prompt")
+    completion = _sample("rag_llm_tokens_total", kind="completion")
+    counted = []
+
+    def count_tokens(text):
+        counted.append(text)
+        return 1
+
+    out = await answer_async(
+        db=_Store(),
+        llm=_StreamLLM(),
+        first_reranker=_Passthrough(),
+        second_reranker=_Passthrough(),
+        query="q",
+        count_tokens=count_tokens,
+        history="earlier turns",
+    )
+
+    assert out == "answer"
+    assert counted[1].startswith("earlier turns")
+    assert _sample("rag_llm_tokens_total", kind="prompt") == prompt + 2
+    assert _sample("rag_llm_tokens_total", kind="completion") == completion + 1
@@ -1,9 +1,18 @@
+import asyncio
+import gc
+import threading
 from typing import Any, Dict, List, Optional
 
+import pytest
+
+from src.api.services.base_reranker import RERANK_FALLBACK_KEY, BaseReranker
+from src.retrieval_cache import RetrievalHit
 from src.api.services.rag_pipeline import (
     DEFAULT_RETRIEVAL_TOP_K,
     answer,
+    answer_async,
     answer_stream,
+    answer_stream_async,
     transform,
 )
 from code_shared.llm import BaseLLM
@@ -15,6 +24,7 @@ class _FakeVectorStore(BaseVectorStore):
     def __init__(self, docs: List[Dict[str, Any]]) -> None:
         self._docs = docs
         self.retrieve_calls: List[Dict[str, Any]] = []
+        self.retrieve_by_vector_calls: List[Dict[str, Any]] = []
 
     def connect(self) -> None:  # pragma: no cover - not used here
         return None
@@ -23,6 +33,14 @@ class _FakeVectorStore(BaseVectorStore):
         self.retrieve_calls.append({"query": query, "top_k": top_k})
         return self._docs[:top_k]
 
+    def retrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        self.retrieve_by_vector_calls.append({"query_vector": query_vector, "top_k": top_k})
+        return self._docs[:top_k]
+
+    def fetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        by_id = {d["chunk_id"]: d for d in self._docs if d.get("chunk_id")}
+        return [dict(by_id[i]) for i in ids if i in by_id]
+
     def batch_load(self, items: List[Dict[str, Any]]) -> None:  # pragma: no cover
         self._docs.extend(items)
 
@@ -121,7 +139,7 @@ def test_answer_returns_cached_response_on_semantic_cache_hit():
             self.get_calls.append(embedding)
             return "cached-answer"
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             self.set_calls.append((embedding, response))
 
     cache = _FakeCache()
@@ -164,7 +182,7 @@ def test_answer_continues_on_cache_lookup_exception():
         def get(self, embedding: List[float]) -> Optional[str]:
             raise ValueError("embedding service down")
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             self.set_calls.append((embedding, response))
 
     cache = _FakeCache()
@@ -202,7 +220,7 @@ def test_answer_stores_response_in_semantic_cache_on_miss():
         def get(self, embedding: List[float]) -> Optional[str]:
             return None
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             self.set_calls.append((embedding, response))
 
     cache = _FakeCache()
@@ -240,7 +258,7 @@ def test_answer_returns_response_when_cache_set_raises():
         def get(self, embedding: List[float]) -> Optional[str]:
             return None
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             raise RuntimeError("redis down")
 
     result = answer(
@@ -278,7 +296,7 @@ def test_answer_stream_yields_cached_response_on_hit():
         def get(self, embedding: List[float]) -> Optional[str]:
             return "stream-cached"
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             pass
 
     out = list(
@@ -320,7 +338,7 @@ def test_answer_stream_stores_in_cache_after_streaming():
         def get(self, embedding: List[float]) -> Optional[str]:
             return None
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             self.set_calls.append((embedding, response))
 
     cache = _FakeCache()
@@ -363,7 +381,7 @@ def test_answer_stream_continues_on_cache_get_exception():
         def get(self, embedding: List[float]) -> Optional[str]:
             raise ValueError("cache error")
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             pass
 
     out = list(
@@ -402,7 +420,7 @@ def test_answer_stream_yields_all_when_cache_set_raises():
         def get(self, embedding: List[float]) -> Optional[str]:
             return None
 
-        def set(self, embedding: List[float], response: str) -> None:
+        def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
             raise RuntimeError("redis down")
 
     out = list(
@@ -416,4 +434,637 @@ def test_answer_stream_yields_all_when_cache_set_raises():
             get_query_embedding=lambda q: [0.0],
         )
     )
-    assert out == ["x"]
\ No newline at end of file
+    assert out == ["x"]
+
+
+class _PassthroughReranker(BaseReranker):
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return docs
+
+
+class _AsyncStreamLLM(BaseLLM):
+    def generate(self, query: str, context: str) -> str:  # pragma: no cover - async path only
+        raise AssertionError("sync generate should not be called")
+
+    async def agenerate(self, query: str, context: str) -> str:
+        return f"async-answer-for:{query}"
+
+    async def agenerate_stream(self, query: str, context: str):
+        yield "hello"
+        yield " world"
+
+
+class _RecordingCache:
+    enabled = True
+
+    def __init__(self, hit: Optional[str] = None) -> None:
+        self.hit = hit
+        self.get_calls: List[List[float]] = []
+        self.set_calls: List[tuple] = []
+
+    def get(self, embedding: List[float]) -> Optional[str]:
+        self.get_calls.append(embedding)
+        return self.hit
+
+    def set(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
+        self.set_calls.append((embedding, response))
+
+
+async def _async_embedding(query: str) -> List[float]:
+    return [0.1, 0.2]
+
+
+@pytest.mark.asyncio
+async def test_answer_async_runs_full_pipeline_and_caches_on_miss():
+    db = _FakeVectorStore([{"text": "some law", "source": "law.pdf"}])
+    cache = _RecordingCache()
+
+    result = await answer_async(
+        db=db,
+        llm=_AsyncStreamLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=_async_embedding,
+    )
+
+    assert result == "async-answer-for:q"
+    assert db.retrieve_calls == []
+    assert db.retrieve_by_vector_calls == [{"query_vector": [0.1, 0.2], "top_k": DEFAULT_RETRIEVAL_TOP_K}]
+    assert cache.get_calls == [[0.1, 0.2]]
+    assert cache.set_calls == [([0.1, 0.2], "async-answer-for:q")]
+
+
+@pytest.mark.asyncio
+async def test_answer_async_returns_cached_response_on_hit():
+    db = _FakeVectorStore([{"text": "x", "source": "a.pdf"}])
+    cache = _RecordingCache(hit="cached-answer")
+
+    result = await answer_async(
+        db=db,
+        llm=_AsyncStreamLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=_async_embedding,
+    )
+
+    assert result == "cached-answer"
+    assert db.retrieve_calls == []
+    assert cache.set_calls == []
+
+
+class _AsyncRecordingCache:
+    """Cache with the AsyncSemanticCache interface (aget / set_behind)."""
+
+    enabled = True
+
+    def __init__(self, hit: Optional[str] = None) -> None:
+        self.hit = hit
+        self.get_calls: List[List[float]] = []
+        self.behind_calls: List[tuple] = []
+        self.sources: List[Optional[List[str]]] = []
+
+    def get(self, embedding: List[float]) -> Optional[str]:  # pragma: no cover - async path only
+        raise AssertionError("sync get should not be called")
+
+    async def aget(self, embedding: List[float]) -> Optional[str]:
+        self.get_calls.append(embedding)
+        return self.hit
+
+    def set_behind(self, embedding: List[float], response: str, sources: Optional[List[str]] = None) -> None:
+        self.behind_calls.append((embedding, response))
+        self.sources.append(sources)
+
+
+@pytest.mark.asyncio
+async def test_answer_stream_async_uses_async_cache_and_write_behind():
+    db = _FakeVectorStore([{"text": "some law", "source": "law.pdf"}])
+    cache = _AsyncRecordingCache()
+
+    out = [
+        chunk
+        async for chunk in answer_stream_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            semantic_cache=cache,
+            get_query_embedding=_async_embedding,
+        )
+    ]
+
+    assert out == ["hello", " world"]
+    assert cache.get_calls == [[0.1, 0.2]]
+    assert cache.behind_calls == [([0.1, 0.2], "hello world")]
+    assert cache.sources == [["law.pdf"]]
+
+
+@pytest.mark.asyncio
+async def test_answer_async_uses_default_agenerate_for_sync_llm():
+    db = _FakeVectorStore([{"text": "some law", "source": "law.pdf"}])
+    llm = _FakeLLM()
+
+    result = await answer_async(
+        db=db,
+        llm=llm,
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="What is the law?",
+    )
+
+    assert result == "fake-answer-for:What is the law?"
+    assert "some law" in llm.calls[0]["context"]
+
+
+@pytest.mark.asyncio
+async def test_answer_stream_async_yields_tokens_and_caches_full_response():
+    db = _FakeVectorStore([{"text": "x", "source": "a.pdf"}])
+    cache = _RecordingCache()
+
+    out = [
+        chunk
+        async for chunk in answer_stream_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            semantic_cache=cache,
+            get_query_embedding=_async_embedding,
+        )
+    ]
+
+    assert out == ["hello", " world"]
+    assert cache.set_calls == [([0.1, 0.2], "hello world")]
+
+
+@pytest.mark.asyncio
+async def test_answer_stream_async_yields_cached_response_on_hit():
+    db = _FakeVectorStore([{"text": "x", "source": "a.pdf"}])
+
+    out = [
+        chunk
+        async for chunk in answer_stream_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            semantic_cache=_RecordingCache(hit="stream-cached"),
+            get_query_embedding=_async_embedding,
+        )
+    ]
+
+    assert out == ["stream-cached"]
+    assert db.retrieve_calls == []
+    assert db.retrieve_by_vector_calls == []
+
+
+def test_answer_embeds_query_once_and_reuses_vector_for_retrieval():
+    """Cache miss: one embedding feeds cache get, vector search and cache set."""
+    db = _FakeVectorStore([{"text": "x", "source": "a.pdf"}])
+    cache = _RecordingCache()
+    embed_calls: List[str] = []
+
+    def get_embedding(q: str) -> List[float]:
+        embed_calls.append(q)
+        return [0.3, 0.4]
+
+    result = answer(
+        db=db,
+        llm=_FakeLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=get_embedding,
+    )
+
+    assert result == "fake-answer-for:q"
+    assert embed_calls == ["q"]
+    assert db.retrieve_calls == []
+    assert db.retrieve_by_vector_calls == [{"query_vector": [0.3, 0.4], "top_k": DEFAULT_RETRIEVAL_TOP_K}]
+    assert cache.get_calls == [[0.3, 0.4]]
+    assert cache.set_calls == [([0.3, 0.4], "fake-answer-for:q")]
+
+
+def test_answer_falls_back_to_text_retrieval_when_embedding_fails():
+    db = _FakeVectorStore([{"text": "x", "source": "a.pdf"}])
+    cache = _RecordingCache()
+
+    def get_embedding(q: str) -> List[float]:
+        raise RuntimeError("embedding service down")
+
+    result = answer(
+        db=db,
+        llm=_FakeLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=get_embedding,
+    )
+
+    assert result == "fake-answer-for:q"
+    assert db.retrieve_calls == [{"query": "q", "top_k": DEFAULT_RETRIEVAL_TOP_K}]
+    assert cache.get_calls == []
+    assert cache.set_calls == []
+
+
+@pytest.mark.asyncio
+async def test_answer_stream_async_embeds_query_once():
+    db = _FakeVectorStore([{"text": "x", "source": "a.pdf"}])
+    cache = _RecordingCache()
+    embed_calls: List[str] = []
+
+    async def get_embedding(q: str) -> List[float]:
+        embed_calls.append(q)
+        return [0.5]
+
+    out = [
+        chunk
+        async for chunk in answer_stream_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            semantic_cache=cache,
+            get_query_embedding=get_embedding,
+        )
+    ]
+
+    assert out == ["hello", " world"]
+    assert embed_calls == ["q"]
+    assert db.retrieve_by_vector_calls == [{"query_vector": [0.5], "top_k": DEFAULT_RETRIEVAL_TOP_K}]
+    assert cache.set_calls == [([0.5], "hello world")]
+
+
+class _SlowAsyncVectorStore(_FakeVectorStore):
+    """aretrieve_by_vector blocks until released so tests can observe cancellation."""
+
+    def __init__(self, docs: List[Dict[str, Any]]) -> None:
+        super().__init__(docs)
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def aretrieve_by_vector(self, query_vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.retrieve_by_vector(query_vector, top_k)
+
+
+class _GatedCache(_RecordingCache):
+    """get() waits until retrieval has started, proving the two run concurrently."""
+
+    def __init__(self, retrieval_started: threading.Event, hit: Optional[str] = None) -> None:
+        super().__init__(hit=hit)
+        self._retrieval_started = retrieval_started
+
+    def get(self, embedding: List[float]) -> Optional[str]:
+        assert self._retrieval_started.wait(timeout=5)
+        return super().get(embedding)
+
+
+@pytest.mark.asyncio
+async def test_answer_async_speculative_retrieval_cancelled_on_cache_hit():
+    db = _SlowAsyncVectorStore([{"text": "x", "source": "a.pdf"}])
+    started = threading.Event()
+    cache = _GatedCache(started, hit="cached-answer")
+
+    async def mark_started() -> None:
+        await db.started.wait()
+        started.set()
+
+    watcher = asyncio.create_task(mark_started())
+    result = await answer_async(
+        db=db,
+        llm=_AsyncStreamLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=_async_embedding,
+        speculative_retrieval=True,
+    )
+    await asyncio.sleep(0)
+    await watcher
+
+    assert result == "cached-answer"
+    assert db.cancelled is True
+    assert db.retrieve_by_vector_calls == []
+    assert cache.set_calls == []
+
+
+class _CancelToErrorVectorStore(_FakeVectorStore):
+    """A client that turns cancellation into its own error, as some drivers do."""
+
+    def __init__(self) -> None:
+        super().__init__([])
+        self.started = asyncio.Event()
+
+    async def aretrieve_hybrid(self, query, query_vector=None, top_k=10):
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            raise RuntimeError("connection closed") from None
+
+
+class _HitAfterRetrievalStarted(_AsyncRecordingCache):
+    def __init__(self, db: _CancelToErrorVectorStore) -> None:
+        super().__init__(hit="cached-answer")
+        self._db = db
+
+    async def aget(self, embedding: List[float]) -> Optional[str]:
+        await self._db.started.wait()
+        return await super().aget(embedding)
+
+
+@pytest.mark.asyncio
+async def test_answer_async_consumes_the_abandoned_speculative_tasks_exception():
+    loop = asyncio.get_running_loop()
+    unhandled: List[Dict[str, Any]] = []
+    previous_handler = loop.get_exception_handler()
+    loop.set_exception_handler(lambda _, context: unhandled.append(context))
+    try:
+        db = _CancelToErrorVectorStore()
+        result = await answer_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            semantic_cache=_HitAfterRetrievalStarted(db),
+            get_query_embedding=_async_embedding,
+            speculative_retrieval=True,
+        )
+        # Let the cancelled task finish with its error, then drop it.
+        for _ in range(3):
+            await asyncio.sleep(0)
+        gc.collect()
+    finally:
+        loop.set_exception_handler(previous_handler)
+
+    assert result == "cached-answer"
+    assert unhandled == []
+
+
+@pytest.mark.asyncio
+async def test_answer_stream_async_speculative_retrieval_used_on_cache_miss():
+    db = _SlowAsyncVectorStore([{"text": "x", "source": "a.pdf"}])
+    started = threading.Event()
+    cache = _GatedCache(started)
+
+    async def release_after_start() -> None:
+        await db.started.wait()
+        started.set()
+        db.release.set()
+
+    releaser = asyncio.create_task(release_after_start())
+    out = [
+        chunk
+        async for chunk in answer_stream_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            semantic_cache=cache,
+            get_query_embedding=_async_embedding,
+            speculative_retrieval=True,
+        )
+    ]
+    await releaser
+
+    assert out == ["hello", " world"]
+    assert db.cancelled is False
+    assert db.retrieve_by_vector_calls == [{"query_vector": [0.1, 0.2], "top_k": DEFAULT_RETRIEVAL_TOP_K}]
+    assert cache.set_calls == [([0.1, 0.2], "hello world")]
+
+
+@pytest.mark.asyncio
+async def test_answer_async_speculative_retrieval_skipped_without_cache():
+    db = _FakeVectorStore([{"text": "some law", "source": "law.pdf"}])
+
+    result = await answer_async(
+        db=db,
+        llm=_AsyncStreamLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        get_query_embedding=_async_embedding,
+        speculative_retrieval=True,
+    )
+
+    assert result == "async-answer-for:q"
+    assert len(db.retrieve_by_vector_calls) == 1
+
+
+def test_answer_packs_context_into_token_budget():
+    docs = [
+        {"text": "Low score text.", "source": "low.pdf", "rerank_score": 0.1},
+        {"text": "High score text.", "source": "high.pdf", "rerank_score": 0.9},
+    ]
+    db = _FakeVectorStore(docs)
+    llm = _FakeLLM()
+
+    answer(
+        db=db,
+        llm=llm,
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        context_max_tokens=12,
+        count_tokens=lambda text: len(text.split()),
+    )
+
+    context = llm.calls[0]["context"]
+    assert "high.pdf" in context
+    assert "low.pdf" not in context
+
+
+class _RecordingRetrievalCache:
+    enabled = True
+
+    def __init__(self, hits: Optional[List[RetrievalHit]] = None) -> None:
+        self.hits = hits
+        self.get_calls: List[List[float]] = []
+        self.set_calls: List[tuple] = []
+
+    def get_hits(self, embedding: List[float]) -> Optional[List[RetrievalHit]]:
+        self.get_calls.append(embedding)
+        return self.hits
+
+    def set_docs(self, embedding: List[float], docs: List[Dict[str, Any]]) -> None:
+        self.set_calls.append((embedding, docs))
+
+
+class _IdVectorStore(_FakeVectorStore):
+    def __init__(self, docs: List[Dict[str, Any]]) -> None:
+        super().__init__(docs)
+        self.fetch_calls: List[List[str]] = []
+
+    def fetch_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        self.fetch_calls.append(ids)
+        return super().fetch_by_ids(ids)
+
+
+class _FailingReranker(BaseReranker):
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise AssertionError("rerank should be skipped on a retrieval-cache hit")
+
+
+@pytest.mark.asyncio
+async def test_answer_async_uses_retrieval_cache_hit_and_skips_retrieval():
+    db = _IdVectorStore([{"chunk_id": "c1", "text": "cached law", "source": "law.pdf"}])
+    retrieval_cache = _RecordingRetrievalCache(hits=[RetrievalHit("c1", 0.8)])
+    llm = _FakeLLM()
+
+    result = await answer_async(
+        db=db,
+        llm=llm,
+        first_reranker=_FailingReranker(),
+        second_reranker=_FailingReranker(),
+        query="q",
+        semantic_cache=_RecordingCache(),
+        get_query_embedding=_async_embedding,
+        retrieval_cache=retrieval_cache,
+    )
+
+    assert result == "fake-answer-for:q"
+    assert db.fetch_calls == [["c1"]]
+    assert db.retrieve_by_vector_calls == []
+    assert "cached law" in llm.calls[0]["context"]
+    assert retrieval_cache.set_calls == []
+
+
+@pytest.mark.asyncio
+async def test_answer_async_treats_retrieval_hit_with_missing_chunks_as_miss():
+    db = _IdVectorStore([{"chunk_id": "c1", "text": "law", "source": "law.pdf"}])
+    retrieval_cache = _RecordingRetrievalCache(hits=[RetrievalHit("c1", 0.8), RetrievalHit("gone", 0.5)])
+
+    await answer_async(
+        db=db,
+        llm=_FakeLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="q",
+        get_query_embedding=_async_embedding,
+        retrieval_cache=retrieval_cache,
+    )
+
+    assert len(db.retrieve_by_vector_calls) == 1
+    assert retrieval_cache.set_calls == [([0.1, 0.2], [{"chunk_id": "c1", "text": "law", "source": "law.pdf"}])]
+
+
+@pytest.mark.asyncio
+async def test_answer_stream_async_stores_reranked_docs_in_retrieval_cache_on_miss():
+    docs = [{"chunk_id": "c1", "text": "x", "source": "a.pdf"}]
+    db = _IdVectorStore(docs)
+    retrieval_cache = _RecordingRetrievalCache()
+
+    out = [
+        chunk
+        async for chunk in answer_stream_async(
+            db=db,
+            llm=_AsyncStreamLLM(),
+            first_reranker=_PassthroughReranker(),
+            second_reranker=_PassthroughReranker(),
+            query="q",
+            get_query_embedding=_async_embedding,
+            retrieval_cache=retrieval_cache,
+        )
+    ]
+
+    assert out == ["hello", " world"]
+    assert retrieval_cache.get_calls == [[0.1, 0.2]]
+    assert retrieval_cache.set_calls == [([0.1, 0.2], docs)]
+
+
+class _FallbackReranker(BaseReranker):
+    """Second stage that answers like DeadlineReranker after a Cohere timeout."""
+
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [dict(doc, **{RERANK_FALLBACK_KEY: True}) for doc in docs]
+
+
+@pytest.mark.asyncio
+async def test_answer_async_does_not_cache_rerank_fallback_answers_or_docs():
+    db = _IdVectorStore([{"chunk_id": "c1", "text": "law", "source": "law.pdf"}])
+    cache = _RecordingCache()
+    retrieval_cache = _RecordingRetrievalCache()
+
+    result = await answer_async(
+        db=db,
+        llm=_FakeLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_FallbackReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=_async_embedding,
+        retrieval_cache=retrieval_cache,
+    )
+
+    assert result == "fake-answer-for:q"
+    assert retrieval_cache.get_calls == [[0.1, 0.2]]
+    assert retrieval_cache.set_calls == []
+    assert cache.get_calls == [[0.1, 0.2]]
+    assert cache.set_calls == []
+
+
+def test_answer_does_not_cache_rerank_fallback_answer():
+    cache = _RecordingCache()
+
+    result = answer(
+        db=_FakeVectorStore([{"text": "law", "source": "law.pdf"}]),
+        llm=_FakeLLM(),
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_FallbackReranker(),
+        query="q",
+        semantic_cache=cache,
+        get_query_embedding=lambda q: [0.1, 0.2],
+    )
+
+    assert result == "fake-answer-for:q"
+    assert cache.set_calls == []
+
+
+class _ContextRecordingLLM(_AsyncStreamLLM):
+    def __init__(self) -> None:
+        self.contexts: List[str] = []
+
+    async def agenerate(self, query: str, context: str) -> str:
+        self.contexts.append(context)
+        return "answer"
+
+
+@pytest.mark.asyncio
+async def test_answer_async_prefixes_history_and_skips_answer_cache():
+    llm = _ContextRecordingLLM()
+    cache = _RecordingCache(hit="cached-answer")
+
+    result = await answer_async(
+        db=_FakeVectorStore([{"text": "some law", "source": "law.pdf"}]),
+        llm=llm,
+        first_reranker=_PassthroughReranker(),
+        second_reranker=_PassthroughReranker(),
+        query="and the penalty?",
+        semantic_cache=cache,
+        get_query_embedding=_async_embedding,
+        history="RECENT CONVERSATION:\nUser: what is 18 U.S.C. 1030?",
+    )
+
+    assert result == "answer"
+    assert llm.contexts[0].startswith("RECENT CONVERSATION:\nUser: what is 18 U.S.C. 1030?\n\n")
+    assert "some law" in llm.contexts[0]
+    assert cache.get_calls == [] and cache.set_calls == []
@@ -0,0 +1,61 @@
+"""Unit tests for the Cohere rerank score cache (mocked Redis)."""
+from unittest.mock import MagicMock, patch
+
+from src.rerank_score_cache import RERANK_SCORE_PREFIX, RerankScoreCache
+
+
+def test_rerank_score_cache_keys_normalize_query_and_hash_content():
+    cache = RerankScoreCache(redis_url="redis://x")
+
+    a = cache.keys("m", "What is  Section 1983?", ["text one", "text two"])
+    b = cache.keys("m", "what is section 1983?", ["text one", "text two"])
+
+    assert a == b
+    assert a[0] != a[1]
+    assert all(key.startswith(f"{RERANK_SCORE_PREFIX}m:") for key in a)
+    assert cache.keys("other-model", "what is section 1983?", ["text one"])[0] != a[0]
+
+
+@patch("src.rerank_score_cache.redis.from_url")
+def test_rerank_score_cache_get_many_parses_hits_and_misses(mock_from_url):
+    mock_r = MagicMock()
+    mock_r.mget.return_value = [b"0.75", None]
+    mock_from_url.return_value = mock_r
+
+    cache = RerankScoreCache(redis_url="redis://x")
+
+    assert cache.get_many(["k1", "k2"]) == [0.75, None]
+
+
+@patch("src.rerank_score_cache.redis.from_url")
+def test_rerank_score_cache_set_many_pipelines_with_ttl(mock_from_url):
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value
+    mock_from_url.return_value = mock_r
+
+    cache = RerankScoreCache(redis_url="redis://x", ttl_seconds=60)
+    cache.set_many({"k1": 0.5, "k2": 0.25})
+
+    assert pipe.set.call_count == 2
+    pipe.set.assert_any_call("k1", "0.5", ex=60)
+    pipe.execute.assert_called_once()
+
+
+@patch("src.rerank_score_cache.redis.from_url")
+def test_rerank_score_cache_soft_fails_on_redis_error(mock_from_url):
+    mock_r = MagicMock()
+    mock_r.mget.side_effect = ConnectionError("down")
+    mock_r.pipeline.side_effect = ConnectionError("down")
+    mock_from_url.return_value = mock_r
+
+    cache = RerankScoreCache(redis_url="redis://x")
+
+    assert cache.get_many(["k1"]) == [None]
+    cache.set_many({"k1": 0.5})
+
+
+def test_rerank_score_cache_disabled_without_url():
+    cache = RerankScoreCache(redis_url="")
+
+    assert not cache.enabled
+    assert cache.get_many(["k1", "k2"]) == [None, None]
@@ -5,7 +5,9 @@ from types import SimpleNamespace
 import pytest
 
 from src.api.services import reranker_client as rc_module
-from src.api.services.reranker_client import BM25Reranker, CohereReranker
+from src.api.services.reranker_client import BM25Reranker, CohereReranker, CorpusBM25Reranker, TopKReranker
+from src.rerank_score_cache import RerankScoreCache
+from code_shared.text import BM25StatsBuilder, legal_tokenize
 
 
 def _make_docs(texts: List[str]) -> List[Dict[str, Any]]:
@@ -99,6 +101,107 @@ def test_cohere_reranker_reranks_with_fake_client(monkeypatch: pytest.MonkeyPatc
     assert "rerank_score" in ranked[0]
 
 
+@pytest.mark.asyncio
+async def test_cohere_reranker_arerank_uses_async_client(monkeypatch: pytest.MonkeyPatch):
+    class _FakeSyncClient:
+        def rerank(self, *args, **kwargs):
+            raise AssertionError("sync client should not be used by arerank")
+
+    class _FakeAsyncClient:
+        def __init__(self) -> None:
+            self.calls: List[Dict[str, Any]] = []
+
+        async def rerank(self, **kwargs):
+            self.calls.append(kwargs)
+            return SimpleNamespace(results=[SimpleNamespace(index=1, relevance_score=0.7)])
+
+    fake_async = _FakeAsyncClient()
+    monkeypatch.setattr(rc_module, "settings", SimpleNamespace(COHERE_API_KEY="key"))
+    monkeypatch.setattr(
+        rc_module,
+        "cohere",
+        SimpleNamespace(ClientV2=lambda key: _FakeSyncClient(), AsyncClientV2=lambda key: fake_async),
+    )
+
+    docs = _make_docs(["a", "b"])
+    reranker = CohereReranker(top_k=1)
+
+    assert await reranker.arerank("q", []) == []
+    ranked = await reranker.arerank("q", docs)
+
+    assert [d["text"] for d in ranked] == ["b"]
+    assert ranked[0]["rerank_score"] == 0.7
+    assert fake_async.calls[0]["documents"] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_bm25_reranker_arerank_matches_sync_rerank():
+    docs = _make_docs(["law about contracts", "criminal law statute", "civil procedure rules"])
+    reranker = BM25Reranker(top_k=2)
+
+    assert await reranker.arerank("criminal", docs) == reranker.rerank("criminal", docs)
+
+
+@pytest.mark.asyncio
+async def test_top_k_reranker_keeps_hybrid_order():
+    docs = [{"text": "a"}, {"text": "b"}, {"text": "c"}]
+    reranker = TopKReranker(top_k=2)
+
+    assert reranker.rerank("q", docs) == docs[:2]
+    assert await reranker.arerank("q", docs) == docs[:2]
+
+
+def _corpus_stats(texts):
+    builder = BM25StatsBuilder()
+    for text in texts:
+        builder.add(legal_tokenize(text))
+    return builder.build()
+
+
+def test_corpus_bm25_reranker_matches_reference_formula():
+    corpus = ["mail fraud statute", "wire fraud", "civil procedure", "contract law basics"]
+    stats = _corpus_stats(corpus)
+    reranker = CorpusBM25Reranker(stats, top_k=4, k1=1.2, b=0.75)
+    docs = [{"text": "wire fraud and mail fraud"}, {"text": "civil procedure"}]
+
+    scores = reranker.scores("mail fraud", docs)
+
+    idf = stats.idf()
+    doc_len = 5
+    expected = 0.0
+    for term, tf in (("mail", 1), ("fraud", 2)):
+        norm = 1.2 * (1 - 0.75 + 0.75 * doc_len / stats.avgdl)
+        expected += idf[stats.vocab[term]] * tf * 2.2 / (tf + norm)
+    assert scores[0] == pytest.approx(expected, rel=1e-5)
+    assert scores[1] == 0.0
+
+
+def test_corpus_bm25_reranker_ranks_by_corpus_idf_and_respects_top_k():
+    stats = _corpus_stats(["fraud"] * 50 + ["§ 1341 mail fraud"])
+    reranker = CorpusBM25Reranker(stats, top_k=2)
+    docs = _make_docs(["fraud fraud", "under § 1341", "unrelated text"])
+
+    ranked = reranker.rerank("fraud under section 1341", docs)
+
+    # "1341" is rare across the corpus, so it outweighs the common "fraud".
+    assert [d["text"] for d in ranked] == ["under § 1341", "fraud fraud"]
+
+
+@pytest.mark.asyncio
+async def test_corpus_bm25_reranker_caches_doc_and_query_tokens():
+    stats = _corpus_stats(["alpha beta", "beta gamma"])
+    reranker = CorpusBM25Reranker(stats, top_k=2)
+    docs = [{"chunk_id": "c1", "text": "alpha"}, {"chunk_id": "c2", "text": "beta"}]
+
+    first = await reranker.arerank("alpha", docs)
+    second = reranker.rerank("alpha", docs)
+
+    assert first == second == docs
+    assert reranker._query_term_ids.cache_info().hits == 1
+    assert set(reranker._doc_cache) == {"c1", "c2"}
+    assert reranker.rerank("unknown words", []) == []
+
+
 def test_cohere_reranker_live_or_mocked(monkeypatch: pytest.MonkeyPatch):
     """With real COHERE_API_KEY calls live API; otherwise uses fake client so test always passes."""
     api_key = os.getenv("COHERE_API_KEY")
@@ -126,4 +229,89 @@ def test_cohere_reranker_live_or_mocked(monkeypatch: pytest.MonkeyPatch):
     reranker = CohereReranker(top_k=1)
     ranked = reranker.rerank("foo", docs)
     assert len(ranked) == 1
-    assert "rerank_score" in ranked[0]
\ No newline at end of file
+    assert "rerank_score" in ranked[0]
+
+class _DictScoreCache(RerankScoreCache):
+    """RerankScoreCache backed by a dict instead of Redis."""
+
+    def __init__(self) -> None:
+        super().__init__(redis_url="memory://")
+        self.store: Dict[str, float] = {}
+
+    def get_many(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def set_many(self, scores):
+        self.store.update(scores)
+
+
+def _scoring_client(calls: List[Dict[str, Any]]):
+    """Fake Cohere client scoring a document by its length, returning every requested result."""
+
+    class _Client:
+        def rerank(self, **kwargs):
+            calls.append(kwargs)
+            results = [
+                SimpleNamespace(index=i, relevance_score=len(text) / 10)
+                for i, text in enumerate(kwargs["documents"])
+            ]
+            results.sort(key=lambda r: r.relevance_score, reverse=True)
+            return SimpleNamespace(results=results[: kwargs["top_n"]])
+
+    return _Client()
+
+
+def test_cohere_reranker_score_cache_sends_only_uncached_docs(monkeypatch: pytest.MonkeyPatch):
+    calls: List[Dict[str, Any]] = []
+    monkeypatch.setattr(rc_module, "settings", SimpleNamespace(COHERE_API_KEY="key"))
+    monkeypatch.setattr(rc_module, "cohere", SimpleNamespace(ClientV2=lambda key: _scoring_client(calls)))
+    cache = _DictScoreCache()
+    reranker = CohereReranker(model="m", top_k=2, score_cache=cache)
+
+    reranker.rerank("Query", _make_docs(["aa", "aaaa"]))
+    ranked = reranker.rerank("query ", _make_docs(["aa", "aaaa", "aaa"]))
+
+    # Second call only scores the new chunk, then merges cached scores before top_k.
+    assert calls[1]["documents"] == ["aaa"]
+    assert calls[1]["top_n"] == 1
+    assert [d["text"] for d in ranked] == ["aaaa", "aaa"]
+    assert [d["rerank_score"] for d in ranked] == [0.4, 0.3]
+    assert len(cache.store) == 3
+
+
+def test_cohere_reranker_score_cache_full_hit_makes_no_api_call(monkeypatch: pytest.MonkeyPatch):
+    calls: List[Dict[str, Any]] = []
+    monkeypatch.setattr(rc_module, "settings", SimpleNamespace(COHERE_API_KEY="key"))
+    monkeypatch.setattr(rc_module, "cohere", SimpleNamespace(ClientV2=lambda key: _scoring_client(calls)))
+    reranker = CohereReranker(model="m", top_k=1, score_cache=_DictScoreCache())
+
+    reranker.rerank("q", _make_docs(["a", "bbb"]))
+    ranked = reranker.rerank("q", _make_docs(["a", "bbb"]))
+
+    assert len(calls) == 1
+    assert calls[0]["top_n"] == 2
+    assert [d["text"] for d in ranked] == ["bbb"]
+
+
+@pytest.mark.asyncio
+async def test_cohere_reranker_arerank_uses_score_cache(monkeypatch: pytest.MonkeyPatch):
+    calls: List[Dict[str, Any]] = []
+    sync_client = _scoring_client(calls)
+
+    class _AsyncClient:
+        async def rerank(self, **kwargs):
+            return sync_client.rerank(**kwargs)
+
+    monkeypatch.setattr(rc_module, "settings", SimpleNamespace(COHERE_API_KEY="key"))
+    monkeypatch.setattr(
+        rc_module,
+        "cohere",
+        SimpleNamespace(ClientV2=lambda key: None, AsyncClientV2=lambda key: _AsyncClient()),
+    )
+    reranker = CohereReranker(model="m", top_k=2, score_cache=_DictScoreCache())
+
+    await reranker.arerank("q", _make_docs(["aa", "a"]))
+    ranked = await reranker.arerank("q", _make_docs(["a", "aaa", "aa"]))
+
+    assert calls[1]["documents"] == ["aaa"]
+    assert [d["text"] for d in ranked] == ["aaa", "aa"]
@@ -0,0 +1,104 @@
+"""Unit tests for the retrieval-result cache (mocked Redis)."""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src.retrieval_cache import RETRIEVAL_CACHE_PREFIX, RETRIEVAL_INDEX_NAME, RetrievalCache, RetrievalHit
+from src.semantic_cache import SemanticCache
+
+
+def _mock_redis(mock_from_url, docs=None):
+    mock_r = MagicMock()
+    mock_r.get.return_value = None  # no cache generation bumped yet
+    mock_ft = MagicMock()
+    mock_r.ft.return_value = mock_ft
+    mock_ft.info.return_value = {}
+    mock_ft.search.return_value = SimpleNamespace(docs=docs or [])
+    mock_from_url.return_value = mock_r
+    return mock_r
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_cache_get_hits_parses_chunk_ids_and_scores(mock_from_url):
+    payload = json.dumps([{"id": "c1", "score": 0.9}, {"id": "c2", "score": None}])
+    mock_r = _mock_redis(mock_from_url, [SimpleNamespace(score="0.08", response=payload.encode())])
+
+    cache = RetrievalCache(redis_url="redis://x", embed_dim=2)
+    hits = cache.get_hits([0.1, 0.2])
+
+    assert hits == [RetrievalHit("c1", 0.9), RetrievalHit("c2", None)]
+    mock_r.ft.assert_called_with(RETRIEVAL_INDEX_NAME)
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_cache_uses_looser_threshold_than_answer_cache(mock_from_url):
+    payload = json.dumps([{"id": "c1", "score": 0.9}])
+    _mock_redis(mock_from_url, [SimpleNamespace(score="0.12", response=payload)])
+
+    assert RetrievalCache(redis_url="redis://x", embed_dim=2).get_hits([0.1, 0.2]) is None
+    assert RetrievalCache(redis_url="redis://x", embed_dim=2, similarity_threshold=0.85).get_hits([0.1, 0.2])
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_cache_get_hits_returns_none_for_unreadable_entry(mock_from_url):
+    _mock_redis(mock_from_url, [SimpleNamespace(score="0.0", response=b"not json")])
+
+    assert RetrievalCache(redis_url="redis://x", embed_dim=2).get_hits([0.1, 0.2]) is None
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_cache_set_docs_stores_ids_under_own_prefix(mock_from_url):
+    mock_r = _mock_redis(mock_from_url)
+
+    cache = RetrievalCache(redis_url="redis://x", embed_dim=2, ttl_seconds=120)
+    cache.set_docs([0.1, 0.2], [{"chunk_id": "c1", "rerank_score": 0.7, "text": "t", "source": "a.pdf"}])
+
+    key = mock_r.hset.call_args.args[0]
+    mapping = mock_r.hset.call_args.kwargs["mapping"]
+    assert key.startswith(RETRIEVAL_CACHE_PREFIX)
+    assert json.loads(mapping["response"]) == [{"id": "c1", "score": 0.7}]
+    assert json.loads(mapping["sources"]) == ["a.pdf"]
+    mock_r.expire.assert_any_call(key, 120)
+    mock_r.sadd.assert_called_once_with("rag_cache_source:a.pdf", key)
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_cache_set_docs_skips_docs_without_chunk_id(mock_from_url):
+    mock_r = _mock_redis(mock_from_url)
+
+    RetrievalCache(redis_url="redis://x", embed_dim=2).set_docs([0.1, 0.2], [{"text": "no id"}])
+
+    mock_r.hset.assert_not_called()
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_cache_flush_only_touches_its_prefix(mock_from_url):
+    mock_r = _mock_redis(mock_from_url)
+    mock_r.scan_iter.return_value = []
+
+    RetrievalCache(redis_url="redis://x", embed_dim=2).flush()
+
+    mock_r.scan_iter.assert_called_once_with(match=f"{RETRIEVAL_CACHE_PREFIX}*", count=100)
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_retrieval_entry_does_not_shorten_source_index_of_answer_entry(mock_from_url):
+    mock_r = _mock_redis(mock_from_url)
+    ttls = {}
+
+    def expire(key, ttl, nx=False, gt=False):
+        # Redis EXPIRE semantics: a key without expiry counts as infinite for GT.
+        current = ttls.get(key)
+        if (nx and current is not None) or (gt and (current is None or ttl <= current)):
+            return False
+        ttls[key] = ttl
+        return True
+
+    mock_r.expire.side_effect = expire
+    SemanticCache(redis_url="redis://x", embed_dim=2, ttl_seconds=86400).set([0.1, 0.2], "answer", sources=["a.pdf"])
+    RetrievalCache(redis_url="redis://x", embed_dim=2, ttl_seconds=3600).set_docs(
+        [0.1, 0.2], [{"chunk_id": "c1", "source": "a.pdf"}]
+    )
+
+    assert ttls["rag_cache_source:a.pdf"] == 86400
+    assert mock_r.sadd.call_count == 2
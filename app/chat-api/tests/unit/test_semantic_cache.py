@@ -1,13 +1,21 @@
 """Unit tests for semantic cache (mocked Redis)."""
+import json
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
+import numpy as np
+from redis import exceptions as redis_exceptions
 
+from src.local_semantic_cache import LocalSemanticCache
+from src.retrieval_cache import RetrievalCache
 from src.semantic_cache import (
+    AsyncSemanticCache,
     SemanticCache,
+    VectorEncoding,
     _cosine_distance_to_similarity,
     _embedding_to_bytes,
+    _index_schema,
 )
 
 
@@ -25,6 +33,61 @@ def test_cosine_distance_to_similarity():
     assert _cosine_distance_to_similarity(None) == 0.0
 
 
+def test_vector_encoding_default_is_full_float32():
+    encoding = VectorEncoding()
+    assert encoding.encode([1.0, 0.0, -1.0]) == _embedding_to_bytes([1.0, 0.0, -1.0])
+    assert encoding.layout_suffix(3) == ""
+
+
+def test_vector_encoding_truncates_and_renormalizes_matryoshka_prefix():
+    encoding = VectorEncoding(dim=2)
+    vec = encoding.decode(encoding.encode([3.0, 4.0, 12.0]))
+    assert vec.shape == (2,)
+    assert np.allclose(vec, [0.6, 0.8])
+    assert encoding.index_dim(3) == 2
+    assert encoding.index_dim(1) == 1  # dim larger than the embedding keeps the full embedding
+
+
+@pytest.mark.parametrize("vector_type,itemsize", [("FLOAT16", 2), ("INT8", 1)])
+def test_vector_encoding_compact_types_preserve_direction(vector_type, itemsize):
+    rng = np.random.default_rng(0)
+    embedding = rng.normal(size=64).astype(np.float32)
+    encoding = VectorEncoding(vector_type=vector_type)
+
+    data = encoding.encode(embedding.tolist())
+    decoded = encoding.decode(data)
+
+    assert len(data) == 64 * itemsize
+    cosine = float(decoded @ embedding / (np.linalg.norm(decoded) * np.linalg.norm(embedding)))
+    assert cosine > 0.999
+
+
+def test_vector_encoding_rejects_unknown_type():
+    with pytest.raises(ValueError, match="vector_type"):
+        VectorEncoding(vector_type="BFLOAT8")
+
+
+def test_index_schema_uses_encoding_type_dim_and_hnsw_params():
+    encoding = VectorEncoding(dim=256, vector_type="FLOAT16", hnsw_m=32, hnsw_ef_construction=400, hnsw_ef_runtime=50)
+    vector_field = _index_schema(3072, encoding)[0]
+    args = [str(a) for a in vector_field.args]
+    for name, value in (("TYPE", "FLOAT16"), ("DIM", "256"), ("M", "32"), ("EF_CONSTRUCTION", "400")):
+        assert args[args.index(name) + 1] == value
+    assert args[args.index("EF_RUNTIME") + 1] == "50"
+
+
+def test_compact_layout_gets_its_own_prefix_and_index():
+    encoding = VectorEncoding(dim=256, vector_type="FLOAT16")
+    cache = SemanticCache(redis_url="", embed_dim=3072, vector_encoding=encoding)
+    retrieval = RetrievalCache(redis_url="", embed_dim=3072, vector_encoding=encoding)
+    async_cache = AsyncSemanticCache(redis_url="", embed_dim=3072, vector_encoding=encoding)
+
+    assert (cache.key_prefix, cache.index_name) == ("rag_cache_256float16:", "rag_cache_idx_256float16")
+    assert (retrieval.key_prefix, retrieval.index_name) == ("rag_retrieval_256float16:", "rag_retrieval_idx_256float16")
+    assert async_cache.index_name == cache.index_name
+    assert SemanticCache(redis_url="", embed_dim=3072).index_name == "rag_cache_idx"
+
+
 def test_semantic_cache_disabled_when_redis_url_empty():
     cache = SemanticCache(redis_url="", embed_dim=1536)
     assert cache.enabled is False
@@ -165,6 +228,63 @@ def test_semantic_cache_ensure_index_creates_when_missing(mock_from_url):
     cache.close()
 
 
+@patch("src.semantic_cache.redis.from_url")
+def test_semantic_cache_checks_index_once_per_generation(mock_from_url):
+    mock_r = MagicMock()
+    mock_r.get.return_value = None
+    mock_ft = mock_r.ft.return_value
+    mock_ft.search.return_value = SimpleNamespace(docs=[])
+    mock_from_url.return_value = mock_r
+
+    cache = SemanticCache(redis_url="redis://x", embed_dim=2)
+    cache.get([0.1, 0.2])
+    cache.set([0.1, 0.2], "resp")
+    cache.get([0.1, 0.2])
+
+    mock_ft.info.assert_called_once()
+    cache.close()
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_semantic_cache_follows_new_generation_instead_of_recreating_dropped_index(mock_from_url):
+    indexes = {"rag_cache_idx"}
+    mock_r = MagicMock()
+    mock_r.get.return_value = None
+
+    def ft(name):
+        index = MagicMock()
+
+        def info():
+            if name not in indexes:
+                raise redis_exceptions.ResponseError("Unknown index name")
+            return {}
+
+        def search(query, query_params):
+            info()
+            return SimpleNamespace(docs=[])
+
+        index.info.side_effect = info
+        index.search.side_effect = search
+        index.create_index.side_effect = lambda **kwargs: indexes.add(name)
+        return index
+
+    mock_r.ft.side_effect = ft
+    mock_from_url.return_value = mock_r
+    cache = SemanticCache(redis_url="redis://x", embed_dim=2, generation_refresh_seconds=3600)
+    cache.get([0.1, 0.2])
+
+    # ingestion-worker: INCR rag_cache_generation, then drop the old generation's index.
+    mock_r.get.return_value = b"1"
+    indexes.discard("rag_cache_idx")
+    assert cache.get([0.1, 0.2]) is None
+    cache.set([0.1, 0.2], "resp")
+
+    assert cache.generation == 1
+    assert indexes == {"rag_cache_idx_g1"}
+    assert mock_r.hset.call_args.args[0].startswith("rag_cache_g1:")
+    cache.close()
+
+
 @patch("src.semantic_cache.redis.from_url")
 def test_semantic_cache_flush(mock_from_url):
     mock_r = MagicMock()
@@ -269,3 +389,242 @@ def test_semantic_cache_flush_handles_redis_error(mock_from_url):
     cache.flush()
 
     cache.close()
+
+
+class _FakeAsyncSearch:
+    def __init__(self, owner: "_FakeAsyncRedis") -> None:
+        self.owner = owner
+
+    async def info(self):
+        self.owner.calls.append("info")
+        if not self.owner.index_exists:
+            raise redis_exceptions.ResponseError("Unknown index name")
+        return {}
+
+    async def create_index(self, fields, definition):
+        self.owner.calls.append("create_index")
+        self.owner.index_exists = True
+
+    async def search(self, query, query_params):
+        self.owner.calls.append("search")
+        if not self.owner.index_exists:
+            raise redis_exceptions.ResponseError("rag_cache_idx: no such index")
+        return SimpleNamespace(docs=self.owner.docs)
+
+
+class _FakeAsyncPipeline:
+    def __init__(self, owner: "_FakeAsyncRedis") -> None:
+        self.owner = owner
+        self.commands = []
+
+    def hset(self, key, mapping):
+        self.commands.append(("hset", key, mapping))
+
+    def sadd(self, key, member):
+        self.commands.append(("sadd", key, member))
+
+    def expire(self, key, ttl, **flags):
+        self.commands.append(("expire", key, ttl, *sorted(flags)))
+
+    async def execute(self):
+        self.owner.calls.append("execute")
+        self.owner.executed.append(self.commands)
+
+
+class _FakeAsyncRedis:
+    def __init__(self, docs=None, index_exists=True) -> None:
+        self.docs = docs or []
+        self.index_exists = index_exists
+        self.generation = None
+        self.epoch = None
+        self.calls = []
+        self.executed = []
+        self.indexes = []
+
+    async def mget(self, keys):
+        self.calls.append("mget")
+        return [self.generation, self.epoch]
+
+    def ft(self, name):
+        self.indexes.append(name)
+        return _FakeAsyncSearch(self)
+
+    def pipeline(self, transaction=True):
+        return _FakeAsyncPipeline(self)
+
+
+def _async_cache(fake: _FakeAsyncRedis, **kwargs) -> AsyncSemanticCache:
+    cache = AsyncSemanticCache(redis_url="redis://x", embed_dim=2, **kwargs)
+    cache._client = fake
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_checks_index_once_then_one_round_trip_per_hit():
+    fake = _FakeAsyncRedis(docs=[SimpleNamespace(score="0.01", response=b"cached")])
+    cache = _async_cache(fake)
+
+    assert await cache.aget([0.1, 0.2]) == "cached"
+    assert await cache.aget([0.1, 0.2]) == "cached"
+
+    assert fake.calls == ["mget", "info", "search", "search"]
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_recreates_dropped_index_and_retries():
+    fake = _FakeAsyncRedis(docs=[])
+    cache = _async_cache(fake)
+    await cache.aget([0.1, 0.2])
+    fake.index_exists = False  # e.g. ingestion-worker flushed the cache
+    fake.calls.clear()
+
+    assert await cache.aget([0.1, 0.2]) is None
+
+    assert fake.calls == ["search", "mget", "info", "create_index", "search"]
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_write_behind_pipelines_hset_and_expire():
+    fake = _FakeAsyncRedis()
+    cache = _async_cache(fake, ttl_seconds=60)
+
+    cache.set_behind([0.1, 0.2], "resp")
+    assert fake.executed == []  # not on the caller's path
+    await cache.aflush_pending()
+
+    [commands] = fake.executed
+    assert [c[0] for c in commands] == ["hset", "expire"]
+    assert commands[1][2] == 60
+    assert fake.calls.count("execute") == 1
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_write_behind_drops_when_queue_full():
+    fake = _FakeAsyncRedis()
+    cache = _async_cache(fake, max_pending_writes=1)
+
+    assert cache.set_behind([0.1, 0.2], "a") is not None
+    assert cache.set_behind([0.1, 0.2], "b") is None
+    await cache.aflush_pending()
+
+    assert len(fake.executed) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_disabled_without_url():
+    cache = AsyncSemanticCache(redis_url="", embed_dim=2)
+
+    assert cache.enabled is False
+    assert await cache.aget([0.1, 0.2]) is None
+    cache.set_behind([0.1, 0.2], "x")
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_queries_with_configured_ef_runtime():
+    fake = _FakeAsyncRedis(docs=[])
+    queries = []
+    search = _FakeAsyncSearch.search
+
+    async def recording_search(self, query, query_params):
+        queries.append((query.query_string(), query_params["vec"]))
+        return await search(self, query, query_params)
+
+    cache = _async_cache(fake, vector_encoding=VectorEncoding(vector_type="INT8", hnsw_ef_runtime=64))
+    with patch.object(_FakeAsyncSearch, "search", recording_search):
+        await cache.aget([0.1, 0.2])
+
+    [(query_string, vec)] = queries
+    assert "EF_RUNTIME 64" in query_string
+    assert len(vec) == 2  # INT8: one byte per component
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_local_tier_is_filled_from_redis_hits_and_skips_redis():
+    fake = _FakeAsyncRedis(docs=[SimpleNamespace(score="0.01", response=b"cached")])
+    cache = _async_cache(fake, local=LocalSemanticCache(embed_dim=2))
+
+    assert await cache.aget([0.1, 0.2]) == "cached"
+    fake.calls.clear()
+    assert await cache.aget([0.1, 0.2]) == "cached"
+
+    assert fake.calls == []
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_write_behind_fills_local_tier_immediately():
+    fake = _FakeAsyncRedis()
+    cache = _async_cache(fake, local=LocalSemanticCache(embed_dim=2))
+
+    cache.set_behind([0.3, 0.4], "fresh")
+
+    assert await cache.aget([0.3, 0.4]) == "fresh"
+    assert "search" not in fake.calls
+    await cache.aflush_pending()
+    assert len(fake.executed) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_follows_bumped_generation_and_clears_local_tier():
+    fake = _FakeAsyncRedis(docs=[SimpleNamespace(score="0.01", response=b"old answer")])
+    local = LocalSemanticCache(embed_dim=2)
+    cache = _async_cache(fake, local=local, generation_refresh_seconds=0)
+    assert await cache.aget([0.1, 0.2]) == "old answer"
+    assert fake.indexes[-1] == "rag_cache_idx"
+
+    fake.generation = b"3"  # ingestion-worker: INCR rag_cache_generation
+    fake.docs = []
+    assert await cache.aget([0.1, 0.2]) is None
+
+    assert cache.generation == 3
+    assert (cache.key_prefix, cache.index_name) == ("rag_cache_g3:", "rag_cache_idx_g3")
+    assert fake.indexes[-1] == "rag_cache_idx_g3"
+    assert local.stats()["entries"] == 0
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_semantic_cache_generation_applies_on_top_of_vector_layout(mock_from_url):
+    mock_r = MagicMock()
+    mock_r.get.return_value = b"2"
+    mock_r.ft.return_value.search.return_value = SimpleNamespace(docs=[])
+    mock_from_url.return_value = mock_r
+
+    cache = RetrievalCache(
+        redis_url="redis://x", embed_dim=4, vector_encoding=VectorEncoding(dim=2, vector_type="FLOAT16")
+    )
+    cache.set_docs([0.1, 0.2, 0.3, 0.4], [{"chunk_id": "c1"}])
+
+    assert mock_r.hset.call_args.args[0].startswith("rag_retrieval_2float16_g2:")
+    mock_r.ft.assert_called_with("rag_retrieval_idx_2float16_g2")
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_records_sources_and_reverse_index():
+    fake = _FakeAsyncRedis()
+    cache = _async_cache(fake, ttl_seconds=60)
+
+    cache.set_behind([0.1, 0.2], "resp", sources=["a.pdf", "b.pdf"])
+    await cache.aflush_pending()
+
+    [commands] = fake.executed
+    key, mapping = commands[0][1], commands[0][2]
+    assert json.loads(mapping["sources"]) == ["a.pdf", "b.pdf"]
+    assert ("sadd", "rag_cache_source:a.pdf", key) in commands
+    assert ("sadd", "rag_cache_source:b.pdf", key) in commands
+    assert ("expire", "rag_cache_source:b.pdf", 60, "nx") in commands
+    assert ("expire", "rag_cache_source:b.pdf", 60, "gt") in commands
+
+
+@pytest.mark.asyncio
+async def test_async_semantic_cache_clears_local_tier_on_source_invalidation():
+    fake = _FakeAsyncRedis(docs=[])
+    local = LocalSemanticCache(embed_dim=2)
+    cache = _async_cache(fake, local=local, generation_refresh_seconds=0)
+    await cache.aget([0.1, 0.2])
+    local.set([0.1, 0.2], "answer from a.pdf")
+
+    fake.epoch = b"1"  # ingestion-worker re-ingested a source
+    assert await cache.aget([0.1, 0.2]) is None
+
+    assert cache.generation == 0
+    assert local.stats()["entries"] == 0
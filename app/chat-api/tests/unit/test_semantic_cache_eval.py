@@ -0,0 +1,75 @@
+"""Unit tests for the offline semantic cache encoding evaluation."""
+import json
+
+import pytest
+
+from src.semantic_cache_eval import evaluate, format_table, load_pairs
+
+
+def _line(query, cached_query, match, query_embedding=None, cached_embedding=None):
+    row = {"query": query, "cached_query": cached_query, "match": match}
+    if query_embedding is not None:
+        row["query_embedding"] = query_embedding
+    if cached_embedding is not None:
+        row["cached_embedding"] = cached_embedding
+    return json.dumps(row)
+
+
+def _pairs():
+    return load_pairs(
+        [
+            _line("q1", "c1", True, [1.0, 0.0, 0.0, 0.0], [0.99, 0.1, 0.0, 0.0]),
+            _line("q1", "c2", False, None, [0.0, 1.0, 0.0, 0.0]),
+            # Close in the first two dims only: a Matryoshka prefix of 2 makes it a false hit.
+            _line("q2", "c3", False, [0.0, 0.1, 1.0, 0.0], [0.0, 0.05, 0.0, 1.0]),
+            "",
+        ]
+    )
+
+
+def test_load_pairs_groups_queries_and_matches():
+    pairs = _pairs()
+    assert pairs.queries == ["q1", "q2"]
+    assert pairs.cached == ["c1", "c2", "c3"]
+    assert pairs.matches == {"q1": {"c1"}, "q2": set()}
+
+
+def test_load_pairs_rejects_malformed_line():
+    with pytest.raises(ValueError, match="line 1"):
+        load_pairs(['{"query": "q"}'])
+
+
+def test_evaluate_reports_precision_recall_and_flips_against_full_float32():
+    results = evaluate(_pairs(), dims=[0, 2], vector_types=["FLOAT32", "INT8"], thresholds=[0.9])
+    by_setting = {(r.dim, r.vector_type): r for r in results}
+
+    full = by_setting[(4, "FLOAT32")]
+    assert (full.hits, full.correct_hits, full.precision, full.recall, full.flipped) == (1, 1, 1.0, 1.0, 0)
+    assert full.bytes_per_vector == 16
+    assert by_setting[(4, "INT8")].bytes_per_vector == 4
+
+    truncated = by_setting[(2, "FLOAT32")]
+    assert truncated.hits == 2
+    assert truncated.precision == 0.5
+    assert truncated.recall == 1.0
+    assert truncated.flipped == 1
+    assert "FLOAT32" in format_table(results)
+
+
+def test_evaluate_embeds_texts_without_embeddings():
+    pairs = load_pairs([_line("q", "c", True)])
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+    [result] = evaluate(pairs, dims=[0], vector_types=["FLOAT16"], thresholds=[0.95], embed=embed)
+
+    assert calls == [["q", "c"]]
+    assert result.recall == 1.0
+
+
+def test_evaluate_requires_embedder_for_missing_embeddings():
+    with pytest.raises(ValueError, match="no embedding"):
+        evaluate(load_pairs([_line("q", "c", True)]), dims=[0], vector_types=["FLOAT32"], thresholds=[0.9])
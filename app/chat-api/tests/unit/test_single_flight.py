@@ -0,0 +1,261 @@
+"""Unit tests for single-flight coalescing of identical chat queries."""
+import asyncio
+from typing import AsyncIterator, List, Optional
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.api.services.single_flight import (
+    FLIGHT_LOCK_PREFIX,
+    RedisFlightLock,
+    SingleFlight,
+    flight_key,
+    track_answer_store,
+)
+
+
+def test_flight_key_normalizes_whitespace_and_case():
+    assert flight_key("What is  Section 1983?") == flight_key("what is section 1983? ")
+    assert flight_key("a") != flight_key("b")
+
+
+@pytest.mark.asyncio
+async def test_run_shares_one_execution_between_identical_queries():
+    calls = 0
+    release = asyncio.Event()
+
+    async def generate() -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "answer"
+
+    flights = SingleFlight()
+    waiters = [asyncio.create_task(flights.run(q, generate)) for q in ("Q one", "q  ONE", "q one")]
+    other = asyncio.create_task(flights.run("different", generate))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["answer"] * 3
+    assert await other == "answer"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_run_caller_cancellation_does_not_cancel_shared_execution():
+    release = asyncio.Event()
+
+    async def generate() -> str:
+        await release.wait()
+        return "answer"
+
+    flights = SingleFlight()
+    first = asyncio.create_task(flights.run("q", generate))
+    second = asyncio.create_task(flights.run("q", generate))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "answer"
+
+
+def _token_source(tokens: List[str], started: List[int]):
+    def make() -> AsyncIterator[str]:
+        async def gen() -> AsyncIterator[str]:
+            started.append(1)
+            for token in tokens:
+                await asyncio.sleep(0)
+                yield token
+
+        return gen()
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_stream_fans_out_one_generation_and_replays_for_late_joiners():
+    started: List[int] = []
+    resume = asyncio.Event()
+
+    def make() -> AsyncIterator[str]:
+        async def gen() -> AsyncIterator[str]:
+            started.append(1)
+            yield "a"
+            await resume.wait()
+            yield "b"
+            yield "c"
+
+        return gen()
+
+    flights = SingleFlight()
+    first = flights.stream("q", make)
+    assert await anext(first) == "a"
+
+    async def rest(stream: AsyncIterator[str]) -> str:
+        return "".join([token async for token in stream])
+
+    late = asyncio.create_task(rest(flights.stream("q", make)))
+    await asyncio.sleep(0)
+    resume.set()
+
+    assert "a" + await rest(first) == "abc"
+    assert await late == "abc"
+    assert len(started) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_propagates_errors_to_every_subscriber():
+    def make() -> AsyncIterator[str]:
+        async def gen() -> AsyncIterator[str]:
+            yield "a"
+            await asyncio.sleep(0)
+            raise RuntimeError("llm failed")
+
+        return gen()
+
+    flights = SingleFlight()
+
+    async def collect() -> None:
+        async for _ in flights.stream("q", make):
+            pass
+
+    results = await asyncio.gather(collect(), collect(), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_stream_cancels_generation_when_last_subscriber_leaves():
+    closed = asyncio.Event()
+
+    def make() -> AsyncIterator[str]:
+        async def gen() -> AsyncIterator[str]:
+            try:
+                while True:
+                    await asyncio.sleep(0.001)
+                    yield "t"
+            finally:
+                closed.set()
+
+        return gen()
+
+    flights = SingleFlight()
+    first = flights.stream("q", make)
+    second = flights.stream("q", make)
+    assert await anext(first) == "t"
+    assert await anext(second) == "t"
+
+    await first.aclose()
+    await asyncio.sleep(0.01)
+    assert not closed.is_set()
+
+    await second.aclose()
+    await asyncio.wait_for(closed.wait(), 1.0)
+
+    # A new request after everyone left starts a fresh flight.
+    fresh = flights.stream("q", make)
+    assert await anext(fresh) == "t"
+    await fresh.aclose()
+
+
+class _FakeLock:
+    def __init__(self, owned: bool) -> None:
+        self.owned = owned
+        self.waited = False
+        self.released: List[str] = []
+
+    async def acquire(self, key: str) -> Optional[str]:
+        return "token" if self.owned else None
+
+    async def wait_released(self, key: str) -> None:
+        self.waited = True
+
+    async def release(self, key: str, token: str) -> None:
+        self.released.append(token)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_remote_lock_owner_computes_and_releases():
+    lock = _FakeLock(owned=True)
+    started: List[int] = []
+
+    tokens = [t async for t in SingleFlight(lock=lock).stream("q", _token_source(["a"], started))]
+
+    assert tokens == ["a"]
+    assert lock.released == ["token"]
+    assert not lock.waited
+
+
+@pytest.mark.asyncio
+async def test_remote_lock_is_released_only_after_this_flights_answer_is_stored():
+    lock = _FakeLock(owned=True)
+    events: List[str] = []
+    other_request_store = asyncio.create_task(asyncio.Event().wait())
+
+    async def store() -> None:
+        await asyncio.sleep(0)
+        events.append(f"stored, released={lock.released}")
+
+    async def generate() -> str:
+        track_answer_store(asyncio.create_task(store()))
+        return "answer"
+
+    assert await SingleFlight(lock=lock).run("q", generate) == "answer"
+    assert events == ["stored, released=[]"]
+    assert lock.released == ["token"]
+    # Stores scheduled by other requests are neither awaited nor cancelled.
+    assert not other_request_store.done()
+    other_request_store.cancel()
+
+
+@pytest.mark.asyncio
+async def test_remote_lock_release_does_not_cancel_a_slow_store():
+    lock = _FakeLock(owned=True)
+    slow_store = asyncio.create_task(asyncio.Event().wait())
+
+    async def generate() -> str:
+        track_answer_store(slow_store)
+        return "answer"
+
+    assert await SingleFlight(lock=lock, settle_timeout_seconds=0.01).run("q", generate) == "answer"
+    assert lock.released == ["token"]
+    assert not slow_store.done()
+    slow_store.cancel()
+
+
+@pytest.mark.asyncio
+async def test_remote_lock_held_elsewhere_waits_then_computes():
+    lock = _FakeLock(owned=False)
+
+    async def generate() -> str:
+        return "from cache"
+
+    assert await SingleFlight(lock=lock).run("q", generate) == "from cache"
+    assert lock.waited
+    assert lock.released == []
+
+
+@patch("src.api.services.single_flight.redis.from_url")
+def test_redis_flight_lock_uses_set_nx_with_ttl_and_compare_and_delete(mock_from_url):
+    mock_r = MagicMock()
+    mock_r.set.return_value = True
+    mock_from_url.return_value = mock_r
+    lock = RedisFlightLock("redis://x", ttl_seconds=5)
+
+    token = asyncio.run(lock.acquire("k"))
+    asyncio.run(lock.release("k", token))
+
+    mock_r.set.assert_called_once_with(FLIGHT_LOCK_PREFIX + "k", token, nx=True, px=5000)
+    assert mock_r.eval.call_args.args[1:] == (1, FLIGHT_LOCK_PREFIX + "k", token)
+
+
+@patch("src.api.services.single_flight.redis.from_url")
+def test_redis_flight_lock_soft_fails(mock_from_url):
+    mock_r = MagicMock()
+    mock_r.set.side_effect = ConnectionError("down")
+    mock_from_url.return_value = mock_r
+
+    assert asyncio.run(RedisFlightLock("redis://x").acquire("k")) is None
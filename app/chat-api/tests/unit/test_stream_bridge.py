@@ -0,0 +1,95 @@
+"""Unit tests for the thread -> asyncio streaming bridge and BaseLLM's default async stream."""
+import asyncio
+import threading
+from typing import Iterator, List
+
+import pytest
+
+from code_shared.llm import BaseLLM, aiter_in_thread
+
+
+@pytest.mark.asyncio
+async def test_aiter_in_thread_yields_items_in_order_without_executor(monkeypatch: pytest.MonkeyPatch):
+    loop = asyncio.get_running_loop()
+
+    def _no_executor(*args, **kwargs):
+        raise AssertionError("bridge must not dispatch to the default executor")
+
+    monkeypatch.setattr(loop, "run_in_executor", _no_executor)
+
+    out = [item async for item in aiter_in_thread(lambda: iter(range(500)))]
+
+    assert out == list(range(500))
+
+
+@pytest.mark.asyncio
+async def test_aiter_in_thread_reraises_iterator_error():
+    def _gen() -> Iterator[str]:
+        yield "a"
+        raise ValueError("stream broke")
+
+    out: List[str] = []
+    with pytest.raises(ValueError, match="stream broke"):
+        async for item in aiter_in_thread(_gen):
+            out.append(item)
+
+    assert out == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_aiter_in_thread_stops_and_closes_iterator_when_consumer_stops():
+    closed = threading.Event()
+    produced: List[int] = []
+
+    def _gen() -> Iterator[int]:
+        try:
+            for i in range(10_000):
+                produced.append(i)
+                yield i
+        finally:
+            closed.set()
+
+    stream = aiter_in_thread(_gen, max_buffered=4)
+    async for item in stream:
+        if item == 2:
+            break
+    await stream.aclose()
+
+    assert await asyncio.to_thread(closed.wait, 2.0)
+    assert len(produced) < 100
+
+
+class _SyncStreamingLLM(BaseLLM):
+    def __init__(self) -> None:
+        self.stream_thread = None
+
+    def generate(self, query: str, context: str) -> str:  # pragma: no cover - stream path only
+        raise AssertionError("generate should not be called")
+
+    def generate_stream(self, query: str, context: str) -> Iterator[str]:
+        self.stream_thread = threading.current_thread()
+        yield from ["Hel", "lo", "!"]
+
+
+@pytest.mark.asyncio
+async def test_base_llm_agenerate_stream_bridges_sync_stream_token_by_token():
+    llm = _SyncStreamingLLM()
+
+    out = [chunk async for chunk in llm.agenerate_stream("q", "ctx")]
+
+    assert out == ["Hel", "lo", "!"]
+    assert llm.stream_thread is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_base_llm_agenerate_stream_uses_agenerate_without_sync_stream():
+    class _AsyncOnlyLLM(BaseLLM):
+        def generate(self, query: str, context: str) -> str:  # pragma: no cover - async path only
+            raise AssertionError("generate should not be called")
+
+        async def agenerate(self, query: str, context: str) -> str:
+            return "whole answer"
+
+    out = [chunk async for chunk in _AsyncOnlyLLM().agenerate_stream("q", "ctx")]
+
+    assert out == ["whole answer"]
@@ -0,0 +1,96 @@
+"""Unit tests for WebSocket token coalescing."""
+import asyncio
+from typing import AsyncIterator, List, Tuple
+
+import pytest
+
+from src.api.services.token_coalescer import coalesce_tokens
+
+
+async def _timed(tokens: List[Tuple[float, str]]) -> AsyncIterator[str]:
+    """Yield each token after its delay (seconds since the previous token)."""
+    for delay, token in tokens:
+        await asyncio.sleep(delay)
+        yield token
+
+
+async def _collect(stream: AsyncIterator[str]) -> List[str]:
+    return [chunk async for chunk in stream]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_tokens_sends_first_token_then_batches_burst():
+    tokens = [(0, "Hello")] + [(0, f" w{i}") for i in range(20)]
+
+    out = await _collect(coalesce_tokens(_timed(tokens), max_latency_seconds=0.05, max_bytes=0))
+
+    assert out[0] == "Hello"
+    assert len(out) == 2
+    assert "".join(out) == "".join(t for _, t in tokens)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_tokens_flushes_pending_after_max_latency_while_source_stalls():
+    received: List[Tuple[float, str]] = []
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    tokens = [(0, "a"), (0, "b"), (0.3, "c")]
+    async for chunk in coalesce_tokens(_timed(tokens), max_latency_seconds=0.02, max_bytes=0):
+        received.append((loop.time() - start, chunk))
+
+    assert [chunk for _, chunk in received] == ["a", "b", "c"]
+    # "b" went out after the window, not held until "c" arrived.
+    assert received[1][0] < 0.2
+
+
+@pytest.mark.asyncio
+async def test_coalesce_tokens_flushes_at_max_bytes():
+    tokens = [(0, "x" * 10)] + [(0, "y" * 10) for _ in range(6)]
+
+    out = await _collect(coalesce_tokens(_timed(tokens), max_latency_seconds=10, max_bytes=25))
+
+    assert out == ["x" * 10, "y" * 30, "y" * 30]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_tokens_passes_through_when_disabled():
+    tokens = [(0, "a"), (0, "b"), (0, "c")]
+
+    out = await _collect(coalesce_tokens(_timed(tokens), max_latency_seconds=0, max_bytes=0))
+
+    assert out == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_tokens_flushes_pending_then_reraises_source_error():
+    async def _failing() -> AsyncIterator[str]:
+        yield "a"
+        yield "b"
+        raise RuntimeError("llm failed")
+
+    out: List[str] = []
+    with pytest.raises(RuntimeError, match="llm failed"):
+        async for chunk in coalesce_tokens(_failing(), max_latency_seconds=10, max_bytes=0):
+            out.append(chunk)
+
+    assert out == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_tokens_close_cancels_source():
+    closed = asyncio.Event()
+
+    async def _endless() -> AsyncIterator[str]:
+        try:
+            while True:
+                await asyncio.sleep(0.001)
+                yield "t"
+        finally:
+            closed.set()
+
+    stream = coalesce_tokens(_endless(), max_latency_seconds=0.01, max_bytes=0)
+    assert await anext(stream) == "t"
+    await stream.aclose()
+
+    assert closed.is_set()
@@ -40,7 +40,7 @@ export function useChatWebSocket(
           onDone(content, msg.received_content);
           setStreaming(false);
           setStreamContent("");
-        } else if (msg.t === "error") {
+        } else if (msg.t === "error" || msg.t === "busy") {
           setError(msg.error);
           setStreaming(false);
           setStreamContent("");
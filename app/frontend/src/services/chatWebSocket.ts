@@ -4,7 +4,8 @@ import type { ChatMessage } from "./chatApi";
 export type StreamMessage =
   | { t: "chunk"; content: string }
   | { t: "done"; received_content: string }
-  | { t: "error"; error: string };
+  | { t: "error"; error: string }
+  | { t: "busy"; error: string; retry_after: number };
 
 function buildWsUrl(sessionId: string, token: string | null): string {
   let url = `${getWsBase()}/chat/`;
@@ -23,6 +23,11 @@ class IngestionSettings(BaseSettings):
     CACHE_TTL_SECONDS: int = Field(default=86400)
     CACHE_SIMILARITY_THRESHOLD: float = Field(default=0.95, ge=0.0, le=1.0)
     CACHE_EMBED_DIM: int = Field(default=3072)
+    # Invalidate only cache entries built from re-ingested files; False, --recreate or a file not indexed
+    # before starts a new cache generation instead.
+    CACHE_SOURCE_INVALIDATION: bool = True
+
+    BM25_STATS_PATH: str = Field(default="", description="Directory for the corpus BM25 stats artifact (empty disables).")
 
     model_config = SettingsConfigDict(
         env_file=_env_file(),
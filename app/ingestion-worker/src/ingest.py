@@ -2,18 +2,35 @@
 Ingestion pipeline: load PDFs, chunk, and index into vector store.
 """
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from src.vector_store.base import BaseVectorStore
 from src.chunker import LegalChunker
+from src.semantic_cache import SemanticCache
+from code_shared.text import BM25StatsBuilder, legal_tokenize
 
 
 class IngestionProcessor:
-    """Processes PDF files and loads chunks into a vector store."""
+    """
+    Processes PDF files and loads chunks into a vector store.
+    Re-ingesting a file replaces its chunks; files not indexed before are collected in new_sources.
+    When a stats_builder is given, every indexed chunk also feeds the corpus BM25 statistics, and the
+    replaced chunks are taken out of them, so a re-ingested file is counted once.
+    When a cache is given, cached answers built from each re-ingested file are invalidated. No cache
+    entry records a new file, so the caller has to invalidate more broadly for new_sources.
+    """
 
-    def __init__(self, vector_store: BaseVectorStore) -> None:
+    def __init__(
+        self,
+        vector_store: BaseVectorStore,
+        stats_builder: Optional[BM25StatsBuilder] = None,
+        cache: Optional[SemanticCache] = None,
+    ) -> None:
         self.db = vector_store
         self.chunker = LegalChunker()
+        self.stats_builder = stats_builder
+        self.cache = cache
+        self.new_sources: List[str] = []
 
     def run(self, data_path: str) -> None:
         path = Path(data_path)
@@ -29,5 +46,17 @@ class IngestionProcessor:
                     "text": node.get_content(),
                     "source": file.name,
                 })
+            replaced = self.db.delete_source(file.name)
+            if not replaced:
+                self.new_sources.append(file.name)
+            elif self.stats_builder is not None:
+                for text in replaced:
+                    self.stats_builder.remove(legal_tokenize(text))
             self.db.batch_load(chunks_to_load)
+            if self.stats_builder is not None:
+                for chunk in chunks_to_load:
+                    self.stats_builder.add(legal_tokenize(chunk["text"]))
             print(f"Successfully indexed {len(chunks_to_load)} chunks from {file.name}")
+            if self.cache is not None:
+                removed = self.cache.invalidate_sources([file.name])
+                print(f"Invalidated {removed} cached answers built from {file.name}")
@@ -2,18 +2,41 @@
 Ingestion script entrypoint: load PDFs from data folder into vector store.
 """
 import argparse
+from typing import Optional
 
 from src.core.config import settings
 from src.vector_store import WeaviateClient
 from src.semantic_cache import SemanticCache
 from src.ingest import IngestionProcessor
+from code_shared.text import BM25Stats, BM25StatsBuilder
 
 
 DEFAULT_DATA_FOLDER = "./data"
 
 
+def _stats_builder(recreate: bool) -> Optional[BM25StatsBuilder]:
+    """
+    Corpus BM25 stats carry over between runs (re-ingested files swap their old chunks' counts for
+    the new ones); --recreate starts them over with the collection.
+    """
+    if not settings.BM25_STATS_PATH:
+        return None
+    if not recreate and BM25Stats.exists(settings.BM25_STATS_PATH):
+        return BM25StatsBuilder(base=BM25Stats.load(settings.BM25_STATS_PATH, mmap=False))
+    return BM25StatsBuilder()
+
+
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Ingest PDFs into the vector store.")
+    parser = argparse.ArgumentParser(
+        description="Ingest PDFs into the vector store.",
+        epilog=(
+            "Cache invalidation: with CACHE_SOURCE_INVALIDATION, re-ingesting a file deletes only the cached "
+            "answers and retrieval results built from it. A file that was not indexed before is in no cache "
+            "entry, yet may now belong in any of them, so adding one starts a new cache generation, which "
+            "empties the answer and retrieval caches. Batch new files into one run to pay that once; "
+            "--recreate and CACHE_SOURCE_INVALIDATION=false always start a new generation."
+        ),
+    )
     parser.add_argument(
         "--recreate",
         action="store_true",
@@ -40,18 +63,31 @@ def main() -> None:
         if args.recreate:
             db.initialize_schema(recreate=True)
             print("Collection recreated (existing data removed).")
-        processor = IngestionProcessor(vector_store=db)
-        processor.run(str(args.data))
+        stats_builder = _stats_builder(args.recreate)
         cache = SemanticCache(
             redis_url=settings.REDIS_URL,
             ttl_seconds=settings.CACHE_TTL_SECONDS,
             similarity_threshold=settings.CACHE_SIMILARITY_THRESHOLD,
             embed_dim=settings.CACHE_EMBED_DIM,
         )
-        if cache.enabled:
-            cache.flush()
-            cache.close()
-            print("Semantic cache flushed.")
+        # A recreated collection invalidates every cached chunk id, so that still needs a new generation.
+        source_scoped = cache.enabled and settings.CACHE_SOURCE_INVALIDATION and not args.recreate
+        processor = IngestionProcessor(
+            vector_store=db, stats_builder=stats_builder, cache=cache if source_scoped else None
+        )
+        processor.run(str(args.data))
+        if stats_builder is not None:
+            stats_builder.build().save(settings.BM25_STATS_PATH)
+            print(f"BM25 corpus stats written to {settings.BM25_STATS_PATH} ({stats_builder.n_docs} chunks).")
+        if source_scoped and processor.new_sources:
+            # Source-scoped deletes cannot reach entries that a new document should now be part of.
+            print(f"New sources ingested ({len(processor.new_sources)}); starting a new cache generation.")
+        if cache.enabled and (not source_scoped or processor.new_sources):
+            generation = cache.invalidate()
+            if generation is not None:
+                cache.drop_stale_generations(generation)
+                print(f"Semantic cache invalidated (generation {generation}).")
+        cache.close()
     except Exception as e:
         print(f"Ingestion failed: {e}")
     finally:
@@ -1,9 +1,21 @@
 """
-Minimal semantic cache for ingestion-worker: flush Redis RAG cache after ingest.
-Uses same key prefix/index as chat-api so flush clears chat-api's cache.
+Minimal semantic cache for ingestion-worker: invalidate the Redis RAG cache after ingest.
+Uses same key prefixes/indexes as chat-api, covering chat-api's answer cache and its
+retrieval-result cache (cached chunk ids are stale after a reindex).
+
+invalidate() is a single INCR of the shared generation counter: chat-api caches pick up the new
+generation within CACHE_GENERATION_REFRESH_SECONDS and switch to fresh, generation-suffixed keys
+and indexes (rag_cache_g3: / rag_cache_idx_g3). drop_stale_generations() then drops the older
+generations' indexes; their keys are left to expire through their TTL. flush() still deletes
+everything key by key (every generation and compact vector layout, e.g. rag_cache_256float16:).
+
+invalidate_sources() is the partial-reindex variant: chat-api records, per source document, the set
+of cache keys built from it (SOURCE_INDEX_PREFIX + source); only those entries are deleted, and
+INVALIDATION_EPOCH_KEY is bumped so chat-api workers drop their in-process tier.
 """
 import logging
-from typing import Optional
+import re
+from typing import Iterable, List, Optional
 
 import redis
 
@@ -11,10 +23,43 @@ logger = logging.getLogger(__name__)
 
 CACHE_PREFIX = "rag_cache:"
 INDEX_NAME = "rag_cache_idx"
+RETRIEVAL_CACHE_PREFIX = "rag_retrieval:"
+RETRIEVAL_INDEX_NAME = "rag_retrieval_idx"
+GENERATION_KEY = "rag_cache_generation"
+SOURCE_INDEX_PREFIX = "rag_cache_source:"
+INVALIDATION_EPOCH_KEY = "rag_cache_invalidation_epoch"
+
+# Keys per UNLINK when deleting a source's entries.
+_UNLINK_BATCH = 500
+
+# (key prefix, index name) of every chat-api cache tier invalidated by ingestion.
+CACHE_TIERS = ((CACHE_PREFIX, INDEX_NAME), (RETRIEVAL_CACHE_PREFIX, RETRIEVAL_INDEX_NAME))
+
+
+def _tier_indexes(r: redis.Redis, index_name: str) -> List[str]:
+    """Every index of a tier: the base index plus any layout- or generation-suffixed variants."""
+    names = [index_name]
+    try:
+        for name in r.execute_command("FT._LIST") or []:
+            if isinstance(name, bytes):
+                name = name.decode("utf-8", errors="replace")
+            if name.startswith(f"{index_name}_") and name not in names:
+                names.append(name)
+    except redis.exceptions.ResponseError:
+        pass
+    return names
+
+
+def _index_generation(index_name: str, name: str) -> Optional[int]:
+    """Generation of a tier index (optional layout suffix, optional _g<N>); None if not the tier's."""
+    match = re.fullmatch(rf"{re.escape(index_name)}(?:_\d+(?:float32|float16|int8))?(?:_g(\d+))?", name)
+    if match is None:
+        return None
+    return int(match.group(1) or 0)
 
 
 class SemanticCache:
-    """Flush-only semantic cache (ingestion-worker clears cache after ingest)."""
+    """Invalidation-only semantic cache (ingestion-worker invalidates the cache after ingest)."""
 
     def __init__(
         self,
@@ -38,19 +83,77 @@ class SemanticCache:
             self._client = redis.from_url(self.redis_url, decode_responses=False)
         return self._client
 
+    def invalidate(self) -> Optional[int]:
+        """Start a new cache generation (one atomic INCR); returns it, or None if disabled/failed."""
+        if not self._enabled:
+            return None
+        try:
+            generation = int(self._client_or_raise().incr(GENERATION_KEY))
+            logger.info("Semantic cache invalidated (generation %s).", generation)
+            return generation
+        except Exception as e:
+            logger.warning("Semantic cache invalidate failed: %s", e)
+            return None
+
+    def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Delete only the cache entries built from these sources; returns how many were removed."""
+        if not self._enabled:
+            return 0
+        removed = 0
+        try:
+            r = self._client_or_raise()
+            for source in sources:
+                source_key = f"{SOURCE_INDEX_PREFIX}{source}"
+                keys = list(r.smembers(source_key))
+                for start in range(0, len(keys), _UNLINK_BATCH):
+                    # Count what UNLINK reports; members whose entry already expired are skipped.
+                    removed += int(r.unlink(*keys[start : start + _UNLINK_BATCH]))
+                r.unlink(source_key)
+            r.incr(INVALIDATION_EPOCH_KEY)
+            logger.info("Semantic cache: %s entries invalidated for re-ingested sources.", removed)
+        except Exception as e:
+            logger.warning("Semantic cache source invalidation failed: %s", e)
+        return removed
+
+    def drop_stale_generations(self, generation: int) -> None:
+        """Drop the indexes of generations before `generation`; their keys expire on their own."""
+        if not self._enabled:
+            return
+        try:
+            r = self._client_or_raise()
+            dropped = 0
+            for _, index_name in CACHE_TIERS:
+                for name in _tier_indexes(r, index_name):
+                    index_generation = _index_generation(index_name, name)
+                    if index_generation is None or index_generation >= generation:
+                        continue
+                    try:
+                        r.ft(name).dropindex(delete_documents=False)
+                        dropped += 1
+                    except redis.exceptions.ResponseError:
+                        pass
+            logger.info("Dropped %s stale semantic cache indexes.", dropped)
+        except Exception as e:
+            logger.warning("Semantic cache stale generation cleanup failed: %s", e)
+
     def flush(self) -> None:
         if not self._enabled:
             return
         try:
             r = self._client_or_raise()
             count = 0
-            for key in r.scan_iter(match=f"{CACHE_PREFIX}*", count=100):
-                r.delete(key)
-                count += 1
-            try:
-                r.ft(INDEX_NAME).dropindex(delete_documents=False)
-            except redis.exceptions.ResponseError:
-                pass
+            for prefix, index_name in CACHE_TIERS:
+                # "rag_cache*" covers rag_cache: and the suffixed layouts / generations.
+                for key in r.scan_iter(match=f"{prefix.rstrip(':')}*", count=100):
+                    if key in (GENERATION_KEY, GENERATION_KEY.encode()):
+                        continue
+                    r.delete(key)
+                    count += 1
+                for name in _tier_indexes(r, index_name):
+                    try:
+                        r.ft(name).dropindex(delete_documents=False)
+                    except redis.exceptions.ResponseError:
+                        pass
             logger.info("Semantic cache flushed (%s keys removed).", count)
         except Exception as e:
             logger.warning("Semantic cache flush failed: %s", e)
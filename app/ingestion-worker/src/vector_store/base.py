@@ -18,6 +18,11 @@ class BaseVectorStore(ABC):
     def batch_load(self, items: List[Dict[str, Any]]) -> None:
         pass  # pragma: no cover
 
+    @abstractmethod
+    def delete_source(self, source: str) -> List[str]:
+        """Delete the indexed chunks of this source document; returns their texts (empty if it was new)."""
+        pass  # pragma: no cover
+
     @abstractmethod
     def close(self) -> None:
         pass  # pragma: no cover
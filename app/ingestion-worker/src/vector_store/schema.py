@@ -1,5 +1,9 @@
 """Weaviate collection schema."""
-from weaviate.classes.config import Configure, DataType, Property
+from weaviate.classes.config import Configure, DataType, Property, Tokenization
+
+# Okapi BM25 parameters for the keyword half of hybrid search (Weaviate defaults).
+BM25_B = 0.75
+BM25_K1 = 1.2
 
 
 def init_schema(client, class_name: str, recreate: bool = False) -> None:
@@ -8,8 +12,10 @@ def init_schema(client, class_name: str, recreate: bool = False) -> None:
     client.collections.create(
         name=class_name,
         properties=[
-            Property(name="text", data_type=DataType.TEXT),
+            # Word-tokenized searchable index: corpus-level BM25 for hybrid queries.
+            Property(name="text", data_type=DataType.TEXT, tokenization=Tokenization.WORD, index_searchable=True),
             Property(name="source", data_type=DataType.TEXT),
         ],
         vector_config=Configure.Vectors.self_provided(),
+        inverted_index_config=Configure.inverted_index(bm25_b=BM25_B, bm25_k1=BM25_K1, index_property_length=True),
     )
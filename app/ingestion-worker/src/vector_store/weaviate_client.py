@@ -4,10 +4,14 @@ from urllib.parse import urlparse
 
 import weaviate
 from llama_index.embeddings.openai import OpenAIEmbedding
+from weaviate.classes.query import Filter
 
 from src.vector_store.base import BaseVectorStore
 from src.vector_store.schema import init_schema
 
+# Objects per page when reading or deleting one source's chunks.
+_SOURCE_PAGE_SIZE = 100
+
 
 def _host_port_from_url(url: str) -> tuple[str, int]:
     parsed = urlparse(url)
@@ -49,6 +53,30 @@ class WeaviateClient(BaseVectorStore):
                 vector = self.embed_model.get_text_embedding(item["text"])
                 batch.add_object(properties=item, vector=vector)
 
+    def delete_source(self, source: str) -> List[str]:
+        collection = self.client.collections.use(self.class_name)
+        ids = []
+        texts: List[str] = []
+        offset = 0
+        while True:
+            response = collection.query.fetch_objects(
+                filters=Filter.by_property("source").equal(source),
+                limit=_SOURCE_PAGE_SIZE,
+                offset=offset,
+                return_properties=["source", "text"],
+            )
+            for obj in response.objects:
+                # "source" is word-tokenized, so the filter can also match names made of the same words.
+                if obj.properties.get("source") == source:
+                    ids.append(obj.uuid)
+                    texts.append(obj.properties.get("text") or "")
+            if len(response.objects) < _SOURCE_PAGE_SIZE:
+                break
+            offset += _SOURCE_PAGE_SIZE
+        for start in range(0, len(ids), _SOURCE_PAGE_SIZE):
+            collection.data.delete_many(where=Filter.by_id().contains_any(ids[start : start + _SOURCE_PAGE_SIZE]))
+        return texts
+
     def retrieve(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
         raise NotImplementedError("Ingestion-worker only writes to Weaviate")
 
@@ -23,11 +23,18 @@ class _FakeChunker:
 
 
 class _FakeVectorStore:
-    def __init__(self) -> None:
+    def __init__(self, chunks=()) -> None:
         self.loaded = []
+        self.chunks = list(chunks)
 
     def batch_load(self, items):
         self.loaded.append(items)
+        self.chunks.extend(items)
+
+    def delete_source(self, source):
+        replaced = [c["text"] for c in self.chunks if c["source"] == source]
+        self.chunks = [c for c in self.chunks if c["source"] != source]
+        return replaced
 
 
 def test_ingestion_processor_no_files(tmp_path: Path):
@@ -53,3 +60,71 @@ def test_ingestion_processor_loads_chunks(tmp_path: Path):
     loaded_batch = db.loaded[0]
     assert len(loaded_batch) == 2
     assert loaded_batch[0]["source"] == "case.pdf"
+
+
+def test_ingestion_processor_feeds_bm25_stats(tmp_path: Path):
+    from code_shared.text import BM25StatsBuilder
+
+    (tmp_path / "case.pdf").write_bytes(b"%PDF-1.4 dummy content")
+    builder = BM25StatsBuilder()
+    processor = IngestionProcessor(vector_store=_FakeVectorStore(), stats_builder=builder)
+    processor.chunker = _FakeChunker()  # type: ignore[assignment]
+    processor.run(str(tmp_path))
+
+    stats = builder.build()
+    assert stats.n_docs == 2
+    assert stats.df[stats.vocab["a"]] == 1
+    assert stats.avgdl == 1.0
+
+
+def test_reingested_file_replaces_its_chunks_and_bm25_counts(tmp_path: Path):
+    from code_shared.text import BM25StatsBuilder
+
+    (tmp_path / "case.pdf").write_bytes(b"%PDF-1.4 dummy content")
+    builder = BM25StatsBuilder()
+    db = _FakeVectorStore()
+    for _ in range(2):
+        processor = IngestionProcessor(vector_store=db, stats_builder=builder)
+        processor.chunker = _FakeChunker()  # type: ignore[assignment]
+        processor.run(str(tmp_path))
+
+    assert [c["text"] for c in db.chunks] == ["a", "b"]
+    stats = builder.build()
+    assert stats.n_docs == 2
+    assert stats.df[stats.vocab["a"]] == 1
+    assert processor.new_sources == []
+
+
+class _FakeCache:
+    def __init__(self) -> None:
+        self.invalidated: list[list[str]] = []
+
+    def invalidate_sources(self, sources):
+        self.invalidated.append(list(sources))
+        return 3
+
+
+def test_ingestion_processor_invalidates_cache_per_reingested_file(tmp_path: Path):
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4 dummy content")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF-1.4 dummy content")
+    cache = _FakeCache()
+    db = _FakeVectorStore(chunks=[{"text": "old", "source": "a.pdf"}, {"text": "old", "source": "b.pdf"}])
+    processor = IngestionProcessor(vector_store=db, cache=cache)  # type: ignore[arg-type]
+    processor.chunker = _FakeChunker()  # type: ignore[assignment]
+    processor.run(str(tmp_path))
+
+    assert sorted(cache.invalidated) == [["a.pdf"], ["b.pdf"]]
+    assert processor.new_sources == []
+
+
+def test_ingestion_processor_collects_sources_not_indexed_before(tmp_path: Path):
+    (tmp_path / "known.pdf").write_bytes(b"%PDF-1.4 dummy content")
+    (tmp_path / "new.pdf").write_bytes(b"%PDF-1.4 dummy content")
+    processor = IngestionProcessor(
+        vector_store=_FakeVectorStore(chunks=[{"text": "old", "source": "known.pdf"}]),
+        cache=_FakeCache(),  # type: ignore[arg-type]
+    )
+    processor.chunker = _FakeChunker()  # type: ignore[assignment]
+    processor.run(str(tmp_path))
+
+    assert processor.new_sources == ["new.pdf"]
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+from src.semantic_cache import GENERATION_KEY, INVALIDATION_EPOCH_KEY, SemanticCache, _index_generation
+
+
+def _mock_redis(mock_from_url, indexes=()):
+    mock_r = MagicMock()
+    mock_r.execute_command.return_value = [name.encode() for name in indexes]
+    mock_from_url.return_value = mock_r
+    return mock_r
+
+
+def test_index_generation_parses_layout_and_generation_suffixes():
+    assert _index_generation("rag_cache_idx", "rag_cache_idx") == 0
+    assert _index_generation("rag_cache_idx", "rag_cache_idx_g7") == 7
+    assert _index_generation("rag_cache_idx", "rag_cache_idx_256float16_g2") == 2
+    assert _index_generation("rag_cache_idx", "rag_cache_idx_512int8") == 0
+    assert _index_generation("rag_cache_idx", "rag_retrieval_idx_g2") is None
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_invalidate_is_a_single_incr(mock_from_url):
+    mock_r = _mock_redis(mock_from_url)
+    mock_r.incr.return_value = 4
+
+    assert SemanticCache(redis_url="redis://x").invalidate() == 4
+
+    mock_r.incr.assert_called_once_with(GENERATION_KEY)
+    mock_r.scan_iter.assert_not_called()
+    mock_r.delete.assert_not_called()
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_drop_stale_generations_keeps_current_generation(mock_from_url):
+    mock_r = _mock_redis(
+        mock_from_url,
+        ["rag_cache_idx_g2", "rag_cache_idx_g3", "rag_retrieval_idx_256float16_g1", "rag_retrieval_idx_g3", "other"],
+    )
+
+    SemanticCache(redis_url="redis://x").drop_stale_generations(3)
+
+    dropped = [c.args[0] for c in mock_r.ft.call_args_list]
+    assert dropped == ["rag_cache_idx", "rag_cache_idx_g2", "rag_retrieval_idx", "rag_retrieval_idx_256float16_g1"]
+    mock_r.scan_iter.assert_not_called()
+
+
+def test_invalidate_disabled_without_url():
+    assert SemanticCache(redis_url="").invalidate() is None
+
+
+@patch("src.semantic_cache.redis.from_url")
+def test_invalidate_sources_deletes_only_dependent_entries(mock_from_url):
+    mock_r = _mock_redis(mock_from_url)
+    mock_r.smembers.side_effect = lambda key: {b"rag_cache:k1", b"rag_retrieval:k2"} if key.endswith("a.pdf") else set()
+    mock_r.unlink.side_effect = lambda *keys: len(keys)
+
+    removed = SemanticCache(redis_url="redis://x").invalidate_sources(["a.pdf", "b.pdf"])
+
+    assert removed == 2
+    unlinked = [set(c.args) for c in mock_r.unlink.call_args_list]
+    assert {b"rag_cache:k1", b"rag_retrieval:k2"} in unlinked
+    assert {"rag_cache_source:a.pdf"} in unlinked and {"rag_cache_source:b.pdf"} in unlinked
+    mock_r.incr.assert_called_once_with(INVALIDATION_EPOCH_KEY)
+    mock_r.scan_iter.assert_not_called()
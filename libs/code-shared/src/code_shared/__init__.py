@@ -6,6 +6,7 @@ vector_store and semantic_cache for write/flush. Import from submodules, e.g.:
 
 - `from code_shared.core.exceptions import AppError`
 - `from code_shared.llm import OpenAILLM`
+- `from code_shared.text import legal_tokenize, BM25Stats`
 """
 
 __all__: list[str] = []
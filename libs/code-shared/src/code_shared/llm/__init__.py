@@ -2,5 +2,6 @@
 
 from code_shared.llm.base import BaseLLM
 from code_shared.llm.openai_llm import OpenAILLM
+from code_shared.llm.streaming import aiter_in_thread
 
-__all__ = ["BaseLLM", "OpenAILLM"]
+__all__ = ["BaseLLM", "OpenAILLM", "aiter_in_thread"]
@@ -1,8 +1,11 @@
 """
 Abstract base class for LLM implementations.
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Iterator
+from typing import AsyncIterator, Iterator
+
+from code_shared.llm.streaming import aiter_in_thread
 
 
 class BaseLLM(ABC):
@@ -38,3 +41,26 @@ class BaseLLM(ABC):
         full = self.generate(query, context)
         if full:
             yield full
+
+    async def agenerate(self, query: str, context: str) -> str:
+        """
+        Async variant of generate().
+        Default implementation runs generate() in a worker thread.
+        Override with a native async client to avoid tying up a thread per request.
+        """
+        return await asyncio.to_thread(self.generate, query, context)
+
+    async def agenerate_stream(self, query: str, context: str) -> AsyncIterator[str]:
+        """
+        Async variant of generate_stream().
+        If generate_stream() is overridden, its tokens are bridged from one worker thread onto the
+        event loop (no executor hop per token); otherwise yields the full response from agenerate()
+        as one chunk. Override with a native async stream where the client supports one.
+        """
+        if type(self).generate_stream is not BaseLLM.generate_stream:
+            async for chunk in aiter_in_thread(lambda: self.generate_stream(query, context)):
+                yield chunk
+            return
+        full = await self.agenerate(query, context)
+        if full:
+            yield full
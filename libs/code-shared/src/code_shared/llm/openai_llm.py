@@ -2,7 +2,7 @@
 OpenAI LLM client for RAG response generation.
 """
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import AsyncIterator, Iterator, Optional
 
 from llama_index.core.llms import ChatMessage
 from llama_index.llms.openai import OpenAI
@@ -72,3 +72,18 @@ class OpenAILLM(BaseLLM):
             text = self._stream_chunk_to_str(chunk)
             if text:
                 yield text
+
+    async def agenerate(self, query: str, context: str) -> str:
+        """Async generate using the native OpenAI async chat API."""
+        messages = self._messages(query, context)
+        resp = await self.llm.achat(messages)
+        return resp.message.content
+
+    async def agenerate_stream(self, query: str, context: str) -> AsyncIterator[str]:
+        """Async stream of answer tokens using the native OpenAI async streaming API."""
+        messages = self._messages(query, context)
+        gen = await self.llm.astream_chat(messages)
+        async for chunk in gen:
+            text = self._stream_chunk_to_str(chunk)
+            if text:
+                yield text
@@ -0,0 +1,88 @@
+"""
+Bridge a blocking iterator (e.g. a sync LLM token stream) into an async iterator.
+
+The iterator is drained by one worker thread for its whole lifetime; each item is handed to the
+event loop with loop.call_soon_threadsafe onto an asyncio.Queue. Consumers await the queue directly,
+so there is no executor dispatch or blocking Queue.get per item, and a stream ties up exactly one
+thread no matter how many tokens it yields.
+"""
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+# Items buffered ahead of a slow consumer before the worker thread waits.
+DEFAULT_MAX_BUFFERED = 1024
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+async def aiter_in_thread(
+    make_iterator: Callable[[], Iterator[T]],
+    max_buffered: int = DEFAULT_MAX_BUFFERED,
+) -> AsyncIterator[T]:
+    """
+    Run make_iterator() in a dedicated thread and yield its items on the event loop.
+
+    Exceptions raised by the iterator are re-raised in the consumer. If the consumer stops early
+    (break, cancellation, client disconnect), the worker stops at the next item and closes the
+    iterator.
+
+    Args:
+        make_iterator: Zero-arg callable returning the blocking iterator; called in the worker thread.
+        max_buffered: Items the worker may run ahead of the consumer before it pauses.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[object]" = asyncio.Queue()
+    stop = threading.Event()
+    # Released by the consumer per item taken; bounds how far the worker runs ahead.
+    slots = threading.Semaphore(max_buffered)
+
+    def put(item: object) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed; nobody is listening.
+            stop.set()
+
+    def produce() -> None:
+        try:
+            iterator = make_iterator()
+            try:
+                for item in iterator:
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+                    put(item)
+            finally:
+                close = getattr(iterator, "close", None)
+                if callable(close):
+                    close()
+        except BaseException as e:  # noqa: BLE001 - re-raised in the consumer
+            put(_Failure(e))
+        finally:
+            put(_DONE)
+
+    worker = threading.Thread(target=produce, name="aiter-in-thread", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            slots.release()
+            yield item  # type: ignore[misc]
+    finally:
+        stop.set()
@@ -0,0 +1,11 @@
+"""
+Text utilities shared by ingestion-worker and chat-api.
+
+Both sides must tokenize identically for corpus BM25 statistics to line up, so the legal tokenizer
+and the statistics artifact format live here.
+"""
+
+from code_shared.text.bm25_stats import BM25Stats, BM25StatsBuilder
+from code_shared.text.legal_tokenizer import legal_tokenize
+
+__all__ = ["BM25Stats", "BM25StatsBuilder", "legal_tokenize"]
@@ -0,0 +1,146 @@
+"""
+Corpus-level BM25 statistics artifact.
+
+ingestion-worker builds it over every indexed chunk; chat-api memory-maps it for lexical reranking.
+On-disk layout (a directory):
+- CURRENT: name of the version directory readers should load
+- v<N>/meta.json: format version, document count, total token count
+- v<N>/terms.txt: vocabulary, one term per line; line number is the term id
+- v<N>/df.npy: uint32 document frequency per term id (loaded with mmap_mode="r")
+
+Each save writes a new version directory and then switches CURRENT with one rename, so a reader
+sees either the old artifact or the new one, never a mix. The previous version is kept for readers
+that resolved CURRENT just before the switch; older ones are removed. A directory without CURRENT
+(written before versioning) is read as a single flat version.
+"""
+import json
+import os
+import shutil
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+TERMS_FILE = "terms.txt"
+DF_FILE = "df.npy"
+CURRENT_FILE = "CURRENT"
+_VERSION_PREFIX = "v"
+
+
+def _artifact_dir(root: Path) -> Path:
+    """Version directory CURRENT points at, or root itself for a pre-versioning artifact."""
+    pointer = root / CURRENT_FILE
+    if pointer.exists():
+        return root / pointer.read_text(encoding="utf-8").strip()
+    return root
+
+
+def _versions(root: Path) -> List[Path]:
+    """Version directories under root, oldest first."""
+    found = [
+        p for p in root.iterdir() if p.is_dir() and p.name.startswith(_VERSION_PREFIX) and p.name[1:].isdigit()
+    ]
+    return sorted(found, key=lambda p: int(p.name[1:]))
+
+
+class BM25Stats:
+    """Document frequencies, document count and average length of the indexed corpus."""
+
+    def __init__(self, vocab: Dict[str, int], df: np.ndarray, n_docs: int, total_tokens: int) -> None:
+        self.vocab = vocab
+        self.df = df
+        self.n_docs = n_docs
+        self.total_tokens = total_tokens
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_tokens / self.n_docs if self.n_docs else 0.0
+
+    def idf(self) -> np.ndarray:
+        """Okapi IDF with the +1 smoothing used by Lucene/Weaviate (never negative), float32."""
+        df = self.df.astype(np.float64)
+        return np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the artifact as a new version and switch CURRENT to it with one atomic rename."""
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        terms = sorted(self.vocab, key=self.vocab.__getitem__)
+        df = np.asarray(self.df, dtype=np.uint32)
+        meta = {"version": FORMAT_VERSION, "n_docs": self.n_docs, "total_tokens": self.total_tokens}
+
+        version = f"{_VERSION_PREFIX}{time.time_ns()}"
+        staging = root / f".{version}.tmp"
+        staging.mkdir()
+        (staging / TERMS_FILE).write_text("\n".join(terms), encoding="utf-8")
+        with open(staging / DF_FILE, "wb") as f:
+            np.save(f, df)
+        (staging / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+        staging.rename(root / version)
+
+        tmp_pointer = root / f"{CURRENT_FILE}.tmp"
+        tmp_pointer.write_text(version, encoding="utf-8")
+        os.replace(tmp_pointer, root / CURRENT_FILE)
+
+        # Keep the previous version for readers that resolved CURRENT just before the switch.
+        for old in _versions(root)[:-2]:
+            shutil.rmtree(old, ignore_errors=True)
+        for name in (META_FILE, TERMS_FILE, DF_FILE):
+            (root / name).unlink(missing_ok=True)
+
+    @staticmethod
+    def exists(path: Union[str, Path]) -> bool:
+        """True if an artifact has been saved at path."""
+        root = Path(path)
+        return root.is_dir() and (_artifact_dir(root) / META_FILE).exists()
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "BM25Stats":
+        root = _artifact_dir(Path(path))
+        meta = json.loads((root / META_FILE).read_text(encoding="utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 stats version {meta.get('version')!r} in {root}")
+        text = (root / TERMS_FILE).read_text(encoding="utf-8")
+        terms = text.split("\n") if text else []
+        df = np.load(root / DF_FILE, mmap_mode="r" if mmap else None)
+        if len(terms) != len(df):
+            raise ValueError(f"BM25 stats in {root} are inconsistent ({len(terms)} terms, {len(df)} df entries)")
+        return cls({term: i for i, term in enumerate(terms)}, df, int(meta["n_docs"]), int(meta["total_tokens"]))
+
+
+class BM25StatsBuilder:
+    """Accumulates document frequencies while chunks are indexed (and removed)."""
+
+    def __init__(self, base: Optional[BM25Stats] = None) -> None:
+        self._df: Counter = Counter()
+        self.n_docs = 0
+        self.total_tokens = 0
+        if base is not None:
+            for term, term_id in base.vocab.items():
+                self._df[term] = int(base.df[term_id])
+            self.n_docs = base.n_docs
+            self.total_tokens = base.total_tokens
+
+    def add(self, tokens: Iterable[str]) -> None:
+        tokens = list(tokens)
+        self._df.update(set(tokens))
+        self.n_docs += 1
+        self.total_tokens += len(tokens)
+
+    def remove(self, tokens: Iterable[str]) -> None:
+        """Undo add() for a document that left the corpus (e.g. a re-ingested file's old chunk)."""
+        tokens = list(tokens)
+        self._df.subtract(set(tokens))
+        # Terms no longer in any document leave the vocabulary; counts never go below zero.
+        self._df = +self._df
+        self.n_docs = max(self.n_docs - 1, 0)
+        self.total_tokens = max(self.total_tokens - len(tokens), 0)
+
+    def build(self) -> BM25Stats:
+        terms = sorted(self._df)
+        df = np.fromiter((self._df[t] for t in terms), dtype=np.uint32, count=len(terms))
+        return BM25Stats({t: i for i, t in enumerate(terms)}, df, self.n_docs, self.total_tokens)
@@ -0,0 +1,43 @@
+"""
+Legal-aware tokenizer for lexical (BM25) scoring.
+
+Keeps statute citations intact instead of shredding them on punctuation:
+- "§ 1341(a)" -> "§1341", "1341(a)", "1341"
+- "U.S.C." -> "usc"
+- subsection markers "(b)(2)" -> "(b)", "(2)"
+Everything is casefolded; remaining text splits into word tokens.
+"""
+import re
+from typing import List
+
+_SUBSECTIONS = r"(?:\([0-9a-z]{1,4}\))"
+_TOKEN_RE = re.compile(
+    rf"(?P<section>§+\s*(?P<secnum>\d[\w\-]*(?:\.\d+)*{_SUBSECTIONS}*))"
+    rf"|(?P<abbr>(?:\b[a-z]\.){{2,}})"
+    rf"|(?P<cite>\d[\w\-]*(?:\.\d+)*{_SUBSECTIONS}+)"
+    rf"|(?P<subsec>{_SUBSECTIONS})"
+    r"|(?P<word>\w+)"
+)
+_SUBSECTION_RE = re.compile(_SUBSECTIONS)
+
+
+def _citation_tokens(citation: str) -> List[str]:
+    """'1341(a)(1)' -> ['1341(a)(1)', '1341']; a bare number yields itself."""
+    base = _SUBSECTION_RE.split(citation, maxsplit=1)[0]
+    return [citation, base] if base != citation else [citation]
+
+
+def legal_tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.casefold()):
+        if match.group("section"):
+            citation = match.group("secnum")
+            tokens.append("§" + _SUBSECTION_RE.split(citation, maxsplit=1)[0])
+            tokens.extend(_citation_tokens(citation))
+        elif match.group("abbr"):
+            tokens.append(match.group("abbr").replace(".", ""))
+        elif match.group("cite"):
+            tokens.extend(_citation_tokens(match.group("cite")))
+        else:
+            tokens.append(match.group(0))
+    return tokens